@@ -4,22 +4,49 @@ It includes browser setup, screenshot handling, and custom command-line
 options.
 """
 
+from lib import consts
+from utils.artifact_store import ArtifactStore, pack_html_report
+from pages.async_base_page import AsyncBasePage
+from pages.base_page import BasePage
+from pages.inventory_page import InventoryPage
 from pages.login_page import LoginPage
+from utils.data_loader import load_csv
 from utils.driver_factory import DriverFactory
+from utils.driver_pool import DriverPool, DriverPrewarmer
 from utils.logger import Logger, TestState
-from utils.json_log_to_html import json_log_to_html
-from selenium.webdriver.common.by import By
+from utils.html_report_writer import (FRAGMENT_EXTENSION, HtmlFragmentWriter,
+                                      assemble_html_report)
+from utils.json_log_to_html import records_to_html, screenshot_to_html
+from utils.local_server import LocalSauceDemoServer
+from utils.page_usage import page_usage
+from utils.parallel import (create_run_id, get_run_id, get_worker_id,
+                            is_worker, merge_worker_logs, reset_directory)
+from utils.prioritization import GROUPS, failure_first_order
+from utils.resource_profiles import RESOURCE_PROFILES
+from utils.run_history import (HISTORY_PATH, RunHistory, get_git_commit,
+                               test_results)
+from utils.sharding import assign_shards, load_durations, parse_shard
+from utils.screenshots import ScreenshotWriter, capture_full_page
+from utils.session_state import inject_session
+from utils.startup_metrics import format_startup_summary, load_startup_records
+from utils.user_contexts import UserContextBrowser
+from utils.wait_telemetry import (format_wait_summary_html, load_wait_records,
+                                  save_wait_summary, summarize_waits,
+                                  wait_recorder)
 import pytest
 from datetime import datetime
 import pytest_html
 import os
-import shutil
+import warnings
 
 
-SCREENSHOTS_PATH_RELATIVE = "screenshots"
-SCREENSHOTS_PATH = os.path.join("test_reports", SCREENSHOTS_PATH_RELATIVE)
+ARTIFACTS_PATH_RELATIVE = "artifacts"
+ARTIFACTS_PATH = os.path.join("test_reports", ARTIFACTS_PATH_RELATIVE)
 LOG_PATH_RELATIVE = "logs"
 LOG_PATH = os.path.join("test_reports", LOG_PATH_RELATIVE)
+METRICS_PATH = os.path.join("test_reports", "metrics")
+TEST_LOG_FRAGMENTS_PATH = os.path.join("test_reports", "test_log_fragments")
+TEST_LOG_REPORT = os.path.join("test_reports", "test_log.html")
 
 
 def pytest_addoption(parser):
@@ -46,6 +73,201 @@ def pytest_addoption(parser):
         help="Run tests in Docker environment"
     )
 
+    parser.addoption(
+        "--compress-logs",
+        action="store_true",
+        default=False,
+        help="Write the NDJSON test logs gzip-compressed"
+    )
+
+    parser.addoption(
+        "--screenshot-compression",
+        action="store",
+        default=9,
+        type=int,
+        help="zlib level (0-9) the PNG screenshots of failed tests "
+        "are compressed with, 0 keeps them as the browser encoded them"
+    )
+
+    parser.addoption(
+        "--history-db",
+        action="store",
+        default=HISTORY_PATH,
+        help="SQLite database the durations and outcomes of every run "
+        "are appended to, see python -m utils.run_history"
+    )
+
+    parser.addoption(
+        "--no-history",
+        action="store_true",
+        default=False,
+        help="Do not record this run in the run history"
+    )
+
+    parser.addoption(
+        "--shard",
+        action="store",
+        default=None,
+        help="Only run shard i of n (e.g. 1/4), tests are assigned to the "
+        "shards by their durations in the run history"
+    )
+
+    parser.addoption(
+        "--shard-durations",
+        action="store",
+        default=None,
+        help="JSON file with the test durations to assign the shards by, "
+        "see python -m utils.run_history durations "
+        "(default: the run history database)"
+    )
+
+    parser.addoption(
+        "--order",
+        action="store",
+        default="random",
+        choices=("random", "failure-first"),
+        help="Test order: random (pytest-random-order) or failure-first: "
+        "recently failed and flaky tests first, then the tests whose page "
+        "objects changed since the last green run (see the run history). "
+        "Combine with --maxfail to stop early"
+    )
+
+    parser.addoption(
+        "--pack-report",
+        action="store_true",
+        default=False,
+        help="Also write the HTML report as a single file that contains "
+        "all screenshots and stack traces, for archiving"
+    )
+
+    parser.addoption(
+        "--base-url",
+        action="store",
+        default=consts.BASE_URL,
+        help="Base URL of the application under test"
+    )
+
+    parser.addoption(
+        "--local-server",
+        action="store_true",
+        default=False,
+        help="Run tests against the bundled SauceDemo stand-in server "
+        "on localhost instead of --base-url"
+    )
+
+    parser.addoption(
+        "--resource-profile",
+        action="store",
+        default="visual",
+        choices=list(RESOURCE_PROFILES),
+        help="Resources the browser doesn't load. "
+        "visual: block nothing. "
+        "functional: block images, fonts and analytics. "
+        "Tests can opt in to another profile with the resource_profile "
+        "marker."
+    )
+
+    parser.addoption(
+        "--page-load-strategy",
+        action="store",
+        default="normal",
+        choices=["normal", "eager", "none"],
+        help="How long navigation blocks. "
+        "normal: until all resources are loaded. "
+        "eager: until the DOM is ready. none: not at all. "
+        "With eager and none, only page objects with a ready_locator "
+        "wait until they can be used, other code races the page load."
+    )
+
+    parser.addoption(
+        "--wait-engine",
+        action="store",
+        default="event",
+        choices=["event", "poll"],
+        help="How page objects wait. "
+        "event: resolve in the page as soon as the condition is met. "
+        "poll: poll the condition every 500 ms with WebDriverWait."
+    )
+
+    parser.addoption(
+        "--form-fill",
+        action="store",
+        default="script",
+        choices=["script", "typing"],
+        help="How the login page fills its form. "
+        "script: set the fields and submit in one script call. "
+        "typing: type the credentials with real keystrokes."
+    )
+
+    parser.addoption(
+        "--page-readiness",
+        action="store",
+        default="element",
+        choices=["element", "network-idle"],
+        help="When page objects consider a page ready. "
+        "element: when its ready element is visible. "
+        "network-idle: additionally, when no fetch/XHR request "
+        "was in flight for --network-idle-time."
+    )
+
+    parser.addoption(
+        "--network-idle-time",
+        action="store",
+        type=float,
+        default=0.5,
+        help="Seconds without requests after which the network is idle "
+        "(--page-readiness=network-idle)"
+    )
+
+    parser.addoption(
+        "--driver-mode",
+        action="store",
+        default="fresh",
+        choices=["fresh", "pooled", "prewarmed", "contexts"],
+        help="fresh: start a new browser for every test. "
+        "pooled: reuse browsers from a pool and reset them between tests. "
+        "prewarmed: start a new browser for every test "
+        "in the background while the previous test runs. "
+        "contexts: run every test in its own isolated BiDi user context "
+        "inside one shared browser. With pytest-xdist, "
+        "--contexts-per-browser workers share a browser."
+    )
+
+    parser.addoption(
+        "--pool-size",
+        action="store",
+        type=int,
+        default=1,
+        help="Maximum number of browsers in the pool (--driver-mode=pooled)"
+    )
+
+    parser.addoption(
+        "--driver-max-uses",
+        action="store",
+        type=int,
+        default=25,
+        help="Number of tests after which a pooled browser is recycled"
+    )
+
+    parser.addoption(
+        "--prewarm-depth",
+        action="store",
+        type=int,
+        default=1,
+        help="Number of browsers that are started ahead of time "
+        "(--driver-mode=prewarmed)"
+    )
+
+    parser.addoption(
+        "--contexts-per-browser",
+        action="store",
+        type=int,
+        default=4,
+        help="Maximum number of user contexts that are open at once "
+        "in the shared browser, with pytest-xdist the number of workers "
+        "that share a browser (--driver-mode=contexts)"
+    )
+
 
 ############
 # FIXTURES #
@@ -58,36 +280,144 @@ def logger(request):
     """
     browser_name = request.config.getoption("--browser", default="chrome")
     remote = request.config.getoption("--docker", default=False)
-    logger = Logger((browser_name, "Docker" if remote else "Local"))
+    logger = Logger((browser_name, "Docker" if remote else "Local"),
+                    run_id=get_run_id(request.config),
+                    log_path=LOG_PATH,
+                    worker_id=get_worker_id(request.config),
+                    compress=request.config.getoption("--compress-logs"))
     yield logger
+    logger.close()
+
+
+@pytest.fixture(scope="session")
+def html_log_writer(request):
+    """
+    Provide a writer that streams the test case logs of this worker
+    into an HTML fragment file
+    """
+    worker_id = get_worker_id(request.config)
+    writer = HtmlFragmentWriter(os.path.join(
+        TEST_LOG_FRAGMENTS_PATH, f"{worker_id}{FRAGMENT_EXTENSION}"))
+    yield writer
+    writer.close()
 
 
 @pytest.fixture(scope="function")
-def test_case_log(request, logger):
+def test_case_log(request, logger, html_log_writer):
     """
-    Provide a Log for this test case
+    Provide a Log for this test case.
+    The log is written and added to the report when the call report
+    is made (see pytest_runtest_makereport).
     """
     with logger.create_test_case(request.node.name) as case_log:
 
         yield case_log
 
         if hasattr(request.node, "rep_call"):
-            report = request.node.rep_call
-            if report.failed:
-                case_log.add_error(report)
-            else:
-                if case_log.status == "undefined":
-                    case_log.set_status(TestState.PASSED)
-
-            logger.log_test_case(case_log)
-            json_log = [case_log.get_json_test_data(indent=None, ascii=True)]
-            _add_custom_log_to_report(report, json_log)
             logger.remove_test_case(case_log)
         else:
             raise Warning("Couldn't Log TestData."
                           "Test Report was not found as an attribute")
 
 
+@pytest.fixture(scope="session")
+def base_url(request):
+    """
+    Provide the base URL of the application under test.
+    Starts the bundled stand-in server if --local-server is set.
+    """
+    if not request.config.getoption("--local-server"):
+        yield request.config.getoption("--base-url")
+        return
+
+    if request.config.getoption("--docker"):
+        raise pytest.UsageError(
+            "--local-server listens on localhost and can't be reached "
+            "from the Docker grid. Use --base-url instead.")
+    server = LocalSauceDemoServer().start()
+    yield server.url
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def driver_pool(request):
+    """
+    Provide a pool of reusable browsers for the Test Run
+    """
+    browser_name = request.config.getoption("--browser", default="chrome")
+    remote = request.config.getoption("--docker", default=False)
+    pool = DriverPool(
+        browser_name,
+        remote,
+        max_size=request.config.getoption("--pool-size"),
+        max_uses=request.config.getoption("--driver-max-uses"),
+        **_get_driver_options(request.config))
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def driver_prewarmer(request):
+    """
+    Provide a pre-warmer that starts fresh browsers ahead of time
+    """
+    browser_name = request.config.getoption("--browser", default="chrome")
+    remote = request.config.getoption("--docker", default=False)
+    prewarmer = DriverPrewarmer(
+        browser_name,
+        remote,
+        depth=request.config.getoption("--prewarm-depth"),
+        **_get_driver_options(request.config))
+    yield prewarmer
+    prewarmer.close()
+
+
+@pytest.fixture(scope="session")
+def context_browser(request):
+    """
+    Provide one browser that hosts an isolated user context per test.
+    With pytest-xdist, the workers share the browsers of the controller.
+    """
+    max_contexts = request.config.getoption("--contexts-per-browser")
+    session_info = getattr(request.config, "workerinput",
+                           {}).get("context_browser")
+    if session_info:
+        browser = UserContextBrowser.attach(session_info, max_contexts)
+    else:
+        browser = _launch_context_browser(request.config)
+    yield browser
+    browser.quit()
+
+
+def _launch_context_browser(config):
+    """
+    Start a browser for user contexts with the command line options.
+    """
+    browser_name = config.getoption("--browser", default="chrome")
+    remote = config.getoption("--docker", default=False)
+    return UserContextBrowser.launch(
+        browser_name,
+        remote,
+        max_contexts=config.getoption("--contexts-per-browser"),
+        **_get_driver_options(config))
+
+
+@pytest.fixture(scope="session")
+def async_executor_url(request):
+    """
+    Provide the URL of a WebDriver server for AsyncWebDriver sessions.
+    Locally one driver service is started that hosts all sessions.
+    """
+    if request.config.getoption("--docker", default=False):
+        yield DriverFactory.GRID_URL
+        return
+
+    browser_name = request.config.getoption("--browser", default="chrome")
+    service = DriverFactory.start_driver_service(browser_name)
+    yield service.service_url
+    service.stop()
+
+
 @pytest.fixture(scope="function")
 def setup_browser(request):
     """
@@ -95,22 +425,122 @@ def setup_browser(request):
     """
     browser_name = request.config.getoption("--browser", default="chrome")
     remote = request.config.getoption("--docker", default=False)
-
-    driver = DriverFactory.create_driver(browser_name, remote)
-    yield driver
+    driver_mode = request.config.getoption("--driver-mode", default="fresh")
+    resource_profile = _get_resource_profile(request)
+
+    if driver_mode == "pooled":
+        pool = request.getfixturevalue("driver_pool")
+        driver = pool.acquire()
+        release = pool.release
+    elif driver_mode == "prewarmed":
+        prewarmer = request.getfixturevalue("driver_prewarmer")
+        driver = prewarmer.acquire()
+        release = _quit_driver
+    elif driver_mode == "contexts":
+        browser = request.getfixturevalue("context_browser")
+        driver = browser.new_context()
+        release = _quit_driver
+    else:
+        driver_options = _get_driver_options(request.config)
+        driver_options["resource_profile"] = resource_profile
+        driver = DriverFactory.create_driver(browser_name,
+                                             remote,
+                                             **driver_options)
+        release = _quit_driver
+
+    try:
+        DriverFactory.apply_resource_profile(driver,
+                                             browser_name,
+                                             resource_profile)
+        if driver_mode != "fresh":
+            _warn_ignored_resource_profile(request, browser_name,
+                                           resource_profile)
+        yield driver
+    finally:
+        release(driver)
+
+
+def _quit_driver(driver):
     driver.quit()
 
 
+def _get_driver_options(config):
+    """
+    Get the options for DriverFactory.create_driver from the command line.
+    """
+    return {
+        "resource_profile": config.getoption("--resource-profile"),
+        "page_load_strategy": config.getoption("--page-load-strategy"),
+        "network_tracker":
+            config.getoption("--page-readiness") == "network-idle",
+    }
+
+
+def _get_resource_profile(request):
+    """
+    Get the resource blocking profile for a test.
+    The resource_profile marker overrides the --resource-profile option.
+    """
+    marker = request.node.get_closest_marker("resource_profile")
+    if marker:
+        return marker.args[0]
+    return request.config.getoption("--resource-profile")
+
+
+def _warn_ignored_resource_profile(request, browser_name, resource_profile):
+    """
+    Warn if a shared Firefox can't use the resource profile of the test.
+    Firefox applies the profile at launch only, so pooled, pre-warmed and
+    context drivers keep the --resource-profile they were launched with.
+    """
+    launch_profile = request.config.getoption("--resource-profile")
+    if browser_name.lower() == "firefox" and \
+            resource_profile != launch_profile:
+        warnings.warn(
+            f"{request.node.nodeid} runs with the resource profile "
+            f"{launch_profile!r} instead of {resource_profile!r}: Firefox "
+            f"can't switch the profile of a shared browser, "
+            f"use --driver-mode=fresh")
+
+
 @pytest.fixture(scope="function")
-def standard_login(setup_browser):
+def standard_login(setup_browser, base_url):
     """
     Log in with standard user credentials
     and return the inventory page.
     """
     driver = setup_browser
-    driver.get("https://saucedemo.com")
-    login_page = LoginPage(driver)
-    return login_page.login_expect_success("standard_user", "secret_sauce")
+    driver.get(base_url)
+    login_page = LoginPage(driver, base_url)
+    inventory_page = login_page.login_expect_success("standard_user",
+                                                     "secret_sauce")
+    return inventory_page.verified()
+
+
+@pytest.fixture(scope="function")
+def session_login(setup_browser, base_url, request):
+    """
+    Log in as standard user by injecting the session into the browser
+    and return the inventory page. Skips the login form.
+    Products listed in the `cart` marker are put into the cart:
+    @pytest.mark.cart("Sauce Labs Backpack", "Sauce Labs Onesie")
+    """
+    driver = setup_browser
+    cart_product_ids = []
+    marker = request.node.get_closest_marker("cart")
+    if marker:
+        product_ids = {row["product_name"]: row["product_id"]
+                       for row in load_csv(consts.PRODUCTS_CSV)}
+        for product_name in marker.args:
+            if product_name not in product_ids:
+                raise ValueError(
+                    f"Unknown product in cart marker: '{product_name}'. "
+                    f"Products available: {list(product_ids)}")
+            cart_product_ids.append(product_ids[product_name])
+
+    inject_session(driver, base_url, "standard_user",
+                   cart_product_ids)
+    return InventoryPage(driver).verified()
 
 #########
 # HOOKS #
@@ -122,54 +552,293 @@ def pytest_runtest_makereport(item, call):
     """
     Save test report as test attribute to make it accessible in fixtures.
     And capture screenshots on test failure.
+    Log the test case and add its log to the call report, before
+    pytest-xdist sends the report from the worker to the controller.
+    Pass the page objects the test used to the run history.
     """
+    if call.when == "teardown":
+        item.user_properties.append(("pages", page_usage.pop(item.nodeid)))
     report = yield
     setattr(item, f"rep_{call.when}", report)
-    if report.when == "call" and report.failed:
-        report = _add_screenshots_to_report(report, item)
+    if report.when == "call":
+        if report.failed:
+            report = _add_screenshots_to_report(report, item)
+        if "test_case_log" in item.funcargs:
+            report = _log_test_case(report, item)
     return report
 
 
+def _log_test_case(report, item):
+    """
+    Finish the log of the test case, write it to the logfile
+    and the test log report, and add it to the report.
+    """
+    case_log = item.funcargs["test_case_log"]
+    if report.failed:
+        case_log.add_error(report)
+    elif case_log.status == "undefined":
+        case_log.set_status(TestState.PASSED)
+
+    record = case_log.to_record()
+    item.funcargs["logger"].log_record(record)
+    item.user_properties.append(
+        ("steps", [(*step, duration) for step, duration
+                   in zip(record.steps, record.step_durations)]))
+    item.funcargs["html_log_writer"].write(record)
+    return _add_custom_log_to_report(report, record,
+                                     item.config.artifact_store)
+
+
 def _add_screenshots_to_report(report, item):
+    """
+    Capture a full-page screenshot and link it in the report.
+    The report only loads the screenshot when it is expanded.
+    Identical screenshots, e.g. of reruns, are stored only once.
+    New screenshots are written to disk in the background.
+    """
     driver = item.funcargs.get('setup_browser')
     if driver:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        screenshot_name = f"{item.name}_{timestamp}.png"
-        screenshot_path = os.path.join(SCREENSHOTS_PATH, screenshot_name)
-
-        original_size = driver.get_window_size()
-        required_width = driver.execute_script(
-            'return document.body.parentNode.scrollWidth')
-        required_height = driver.execute_script(
-            'return document.body.parentNode.scrollHeight')
-        driver.set_window_size(required_width, required_height)
-        driver.find_element(By.TAG_NAME, 'body').screenshot(
-            screenshot_path)
-        driver.set_window_size(original_size['width'],
-                               original_size['height'])
-
-        screenshot_path_relative = os.path.join(
-            SCREENSHOTS_PATH_RELATIVE,
-            screenshot_name)
+        screenshot = capture_full_page(driver)
+        artifact_store = item.config.artifact_store
+        screenshot_url, screenshot_path = \
+            artifact_store.reserve(screenshot, ".png")
+        if screenshot_path:
+            future = item.config.screenshot_writer.submit(screenshot,
+                                                          screenshot_path)
+            future.add_done_callback(
+                lambda _: artifact_store.release(screenshot_path))
+
         extras = getattr(report, "extras", [])
-        extras.append(pytest_html.extras.image(screenshot_path_relative))
+        extras.append(pytest_html.extras.html(screenshot_to_html(
+            screenshot_url, f"{item.name}_{timestamp}")))
         report.extras = extras
     return report
 
 
 def pytest_configure(config):
-    _create_screenshot_path()
+    """
+    Create the run id and clean up the report directories.
+    With pytest-xdist this only happens in the controller process,
+    the workers get the run id from the controller.
+    Set how the page objects wait.
+    Start the background writer of the screenshots of failed tests
+    and open the artifact store.
+    """
+    for page_class in (BasePage, AsyncBasePage):
+        page_class.wait_engine = config.getoption("--wait-engine")
+        page_class.readiness = config.getoption("--page-readiness")
+        page_class.network_idle_time = \
+            config.getoption("--network-idle-time")
+    LoginPage.fill_mode = config.getoption("--form-fill")
+    config.artifact_store = ArtifactStore(ARTIFACTS_PATH,
+                                          ARTIFACTS_PATH_RELATIVE)
+    config.screenshot_writer = ScreenshotWriter(
+        compression_level=config.getoption("--screenshot-compression"))
+    if not is_worker(config):
+        config.run_id = create_run_id()
+        config.run_started_at = datetime.now()
+        reset_directory(ARTIFACTS_PATH)
+        reset_directory(LOG_PATH)
+        reset_directory(METRICS_PATH)
+        reset_directory(TEST_LOG_FRAGMENTS_PATH)
+
+
+def pytest_runtest_logreport(report):
+    """Collect the test results for the run history."""
+    test_results.add_report(report)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    """
+    With --shard=i/n, only keep the tests of shard i.
+    With --order=failure-first, move the tests that probably fail first,
+    after pytest-random-order has shuffled the tests.
+    All machines and xdist workers select and order the tests the same way.
+    """
+    if config.getoption("--shard"):
+        _select_shard(config, items)
+    if config.getoption("--order") == "failure-first":
+        _order_failure_first(config, items)
 
 
-def _create_screenshot_path():
-    """Create a directory for screenshots at the start of the session."""
-    if os.path.exists(SCREENSHOTS_PATH):
-        shutil.rmtree(SCREENSHOTS_PATH)
-    os.makedirs(SCREENSHOTS_PATH)
+def _select_shard(config, items):
+    """
+    Only keep the tests of the shard, assigned by their durations.
+    """
+    shard = config.getoption("--shard")
+    try:
+        index, count = parse_shard(shard)
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+
+    durations_file = config.getoption("--shard-durations")
+    if durations_file:
+        durations = load_durations(durations_file)
+    elif os.path.isfile(config.getoption("--history-db")):
+        history = RunHistory(config.getoption("--history-db"))
+        try:
+            durations = history.median_durations(
+                browser=config.getoption("--browser"))
+        finally:
+            history.close()
+    else:
+        durations = {}
+
+    shards, estimates = assign_shards([item.nodeid for item in items],
+                                      durations, count)
+    selected_ids = set(shards[index - 1])
+    deselected = [item for item in items if item.nodeid not in selected_ids]
+    items[:] = [item for item in items if item.nodeid in selected_ids]
+    config.hook.pytest_deselected(items=deselected)
+    config.shard_estimate = (index, count, estimates[index - 1],
+                             max(estimates))
+
+
+def _order_failure_first(config, items):
+    """
+    Run recently failed and flaky tests first, then the tests whose
+    page objects changed. The other tests keep their order.
+    """
+    if not os.path.isfile(config.getoption("--history-db")):
+        return
+    history = RunHistory(config.getoption("--history-db"))
+    try:
+        keys, counts = failure_first_order([item.nodeid for item in items],
+                                           history)
+    finally:
+        history.close()
+    fallback = (len(GROUPS), 0)
+    items.sort(key=lambda item: keys.get(item.nodeid, fallback))
+    config.failure_first_counts = counts
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    Share the run id of the controller with a pytest-xdist worker.
+    With --driver-mode=contexts, share a browser of the controller:
+    --contexts-per-browser workers run their tests in the same browser.
+    """
+    config = node.config
+    node.workerinput["run_id"] = config.run_id
+    if config.getoption("--driver-mode") != "contexts":
+        return
+    if not hasattr(config, "context_browsers"):
+        config.context_browsers = {}
+    worker_number = int(node.gateway.id.removeprefix("gw"))
+    index = worker_number // config.getoption("--contexts-per-browser")
+    if index not in config.context_browsers:
+        config.context_browsers[index] = _launch_context_browser(config)
+    node.workerinput["context_browser"] = \
+        config.context_browsers[index].session_info()
+
+
+def pytest_sessionfinish(session):
+    """
+    Save the driver startup and wait metrics of this process.
+    Merge the logfiles of all workers into one logfile for the run,
+    stream their test case logs into the test log report
+    and summarize the waits of all workers.
+    Append the run to the run history, if it ran tests.
+    Wait for the screenshots of failed tests to be written.
+    """
+    worker_id = get_worker_id(session.config)
+    DriverFactory.startup_recorder.save(
+        os.path.join(METRICS_PATH, f"startup-{worker_id}.json"))
+    wait_recorder.save(os.path.join(METRICS_PATH, f"waits-{worker_id}.json"))
+    if not is_worker(session.config):
+        merge_worker_logs(LOG_PATH, session.config.run_id)
+        assemble_html_report(TEST_LOG_REPORT, TEST_LOG_FRAGMENTS_PATH,
+                             f"Test log {session.config.run_id}")
+        records = load_wait_records(METRICS_PATH)
+        if records:
+            session.config.wait_summary = summarize_waits(records)
+            save_wait_summary(session.config.wait_summary,
+                              os.path.join(METRICS_PATH, "waits-summary.json"))
+        if _records_history(session):
+            _save_run_history(session.config)
+    session.config.screenshot_writer.close()
+
+
+def _records_history(session):
+    """
+    Whether the run goes into the run history. Runs without tests,
+    like --collect-only or runs where nothing was collected, would only
+    add empty runs that push real runs out of the recent runs.
+    """
+    config = session.config
+    return not (config.getoption("--no-history")
+                or config.option.collectonly
+                or session.testscollected == 0)
 
 
-def _add_custom_log_to_report(report, json_log_data):
-    html_report = json_log_to_html(json_log_data)
+def _save_run_history(config):
+    """
+    Append the results of this run to the run history database.
+    """
+    history = RunHistory(config.getoption("--history-db"))
+    try:
+        history.add_run(config.run_id,
+                        config.run_started_at,
+                        test_results.results,
+                        browser=config.getoption("--browser"),
+                        environment="Docker" if config.getoption("--docker")
+                        else "Local",
+                        git_commit=get_git_commit())
+    finally:
+        history.close()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """
+    Show the prioritized tests, the estimated duration of this shard
+    and where the time of the driver startups went.
+    """
+    if is_worker(config):
+        return
+    if hasattr(config, "failure_first_counts"):
+        terminalreporter.write_line("failure-first: " + ", ".join(
+            f"{count} {group}"
+            for group, count in config.failure_first_counts.items()))
+    if hasattr(config, "shard_estimate"):
+        index, count, estimate, slowest = config.shard_estimate
+        terminalreporter.write_line(
+            f"shard {index}/{count}: estimated {estimate:.0f}s "
+            f"(slowest shard {slowest:.0f}s)")
+    records = load_startup_records(METRICS_PATH)
+    if records:
+        terminalreporter.section("driver startup")
+        for line in format_startup_summary(records):
+            terminalreporter.write_line(line)
+
+
+def pytest_html_results_summary(postfix, session):
+    """Add the wait latency tables to the HTML report."""
+    summary = getattr(session.config, "wait_summary", None)
+    if summary:
+        postfix.append(format_wait_summary_html(summary))
+
+
+def pytest_unconfigure(config):
+    """
+    Quit the browsers the controller shared with the workers.
+    Pack the HTML report and its artifacts into a single file
+    after pytest-html has written the report.
+    """
+    for browser in getattr(config, "context_browsers", {}).values():
+        browser.quit()
+    html_path = config.getoption("htmlpath", default=None)
+    if is_worker(config) or not config.getoption("--pack-report") \
+            or not html_path or not os.path.isfile(html_path):
+        return
+    packed_path = f"{os.path.splitext(html_path)[0]}.packed.html"
+    pack_html_report(html_path, packed_path, ARTIFACTS_PATH_RELATIVE)
+
+
+def _add_custom_log_to_report(report, record, artifact_store):
+    html_report = records_to_html([record], artifact_store)
     extras = getattr(report, "extras", [])
     extras.append(pytest_html.extras.html(html_report))
     report.extras = extras
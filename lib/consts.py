@@ -1,3 +1,4 @@
 """ This file contains constants used in the framework """
 
-LOGGER_NAME = "test_logger"
+BASE_URL = "https://www.saucedemo.com"
+PRODUCTS_CSV = "./test_data/products.csv"
@@ -0,0 +1,304 @@
+"""
+This file contains the AsyncBasePage class,
+the asyncio variant of the BasePage.
+It provides awaitable methods for waiting for elements, clicking elements,
+inputting text, and checking the current URL.
+Waits yield to the event loop, so many pages can wait at the same time
+in one thread. Like in BasePage, waits are event-driven by default.
+"""
+
+import asyncio
+from pages.base_page import EVENT_WAIT_STRATEGIES, is_navigation_error
+from pages.page_scripts import (NETWORK_IDLE_SCRIPT,
+                                WAIT_FOR_CONDITION_SCRIPT)
+from selenium.common.exceptions import (InvalidSelectorException,
+                                        JavascriptException,
+                                        NoSuchElementException,
+                                        StaleElementReferenceException,
+                                        TimeoutException)
+from selenium.webdriver.remote.locator_converter import LocatorConverter
+from utils.page_usage import page_usage
+from utils.wait_telemetry import recorded_async_wait
+import functools
+
+
+def verifies_page(method):
+    """
+    Decorator for async page object methods that interact with the page.
+    Verifies the page before the first interaction.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        await self.verified()
+        return await method(self, *args, **kwargs)
+    return wrapper
+
+
+class AsyncBasePage:
+    """
+    Base class for all asynchronous page objects,
+    providing common methods for page interactions.
+    Like in BasePage, a `ready_locator` and a `url_substring` declare
+    the page, which is verified lazily: on the first interaction or with
+    `await page.verified()`, and only once per page object.
+    The `wait_engine` and the `readiness` work like in BasePage.
+    """
+    ready_locator = None
+    url_substring = None
+    wait_engine = "event"
+    readiness = "element"
+    network_idle_time = 0.5
+    _locator_converter = LocatorConverter()
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.timeout = 10  # Default timeout for waits
+        self.poll_frequency = 0.1
+        self.wait_records = []  # Telemetry of the running waits
+        page_usage.record(type(self))
+        self._verified = False
+        self._verifying = False
+
+    async def verified(self):
+        """
+        Waits until the browser shows this page and returns the page object.
+        Checks the URL and the page readiness only once.
+        """
+        if self._verified or self._verifying:
+            return self
+        self._verifying = True
+        try:
+            if self.url_substring:
+                await self.wait_for_url_contains(self.url_substring)
+            await self.wait_for_page_ready()
+            self._verified = True
+        finally:
+            self._verifying = False
+        return self
+
+    async def get_page_title(self):
+        """Returns the title of the current page."""
+        return await self.driver.title()
+
+    async def get_current_url(self):
+        """ Returns the current URL"""
+        return await self.driver.current_url()
+
+    async def url_contains(self, substring):
+        """Checks if the current URL contains a specific substring."""
+        return substring in await self.driver.current_url()
+
+    @recorded_async_wait
+    async def wait_for_url_contains(self, substring):
+        """Waits until the current URL contains a specific substring."""
+        if self.wait_engine == "event":
+            await self._wait_for_event("url",
+                                       f"URL does not contain '{substring}'",
+                                       selector=substring)
+            return
+        await self._wait_until(
+            lambda: self.url_contains(substring),
+            f"URL does not contain '{substring}'")
+
+    @recorded_async_wait
+    async def wait_for_page_ready(self):
+        """
+        Waits for the page to be ready to use.
+        Pages with a `ready_locator` wait until this element is visible.
+        Other pages wait for the page to be fully loaded.
+        With network-idle readiness, all pages wait for the network to be
+        idle instead of the page to be fully loaded.
+        """
+        if self.ready_locator:
+            await self.wait_for_element_visible(self.ready_locator)
+        if self.readiness == "network-idle":
+            await self.wait_for_network_idle()
+            return
+        if self.ready_locator:
+            return
+        if self.wait_engine == "event":
+            await self._wait_for_event("loaded", "Page is not ready")
+            return
+
+        async def is_ready():
+            state = await self.driver.execute_script(
+                "return document.readyState")
+            return state == "complete"
+        await self._wait_until(is_ready, "Page is not ready")
+
+    @recorded_async_wait
+    async def wait_for_network_idle(self, idle_time=None):
+        """
+        Waits until no fetch/XHR request was in flight for the idle time
+        (default: `network_idle_time`).
+        """
+        idle_time = self.network_idle_time if idle_time is None else idle_time
+        await self._wait_in_page("Network is not idle", NETWORK_IDLE_SCRIPT,
+                                 int(idle_time * 1000))
+
+    @verifies_page
+    @recorded_async_wait
+    async def wait_for_element(self, locator):
+        """Waits for an element to be present in the DOM."""
+        if self._can_wait_for_event(locator):
+            return await self._wait_for_locator(
+                "present", locator, f"Element not present: {locator}")
+        return await self._wait_until(
+            lambda: self.driver.find_element(*locator),
+            f"Element not present: {locator}")
+
+    @verifies_page
+    @recorded_async_wait
+    async def wait_for_element_visible(self, locator):
+        """Waits for an element to be visible on the page."""
+        if self._can_wait_for_event(locator):
+            return await self._wait_for_locator(
+                "visible", locator, f"Element not visible: {locator}")
+
+        async def visible_element():
+            element = await self.driver.find_element(*locator)
+            return element if await element.is_displayed() else None
+        return await self._wait_until(visible_element,
+                                      f"Element not visible: {locator}")
+
+    @verifies_page
+    @recorded_async_wait
+    async def wait_for_element_not_visible(self, locator):
+        """Waits for an element to not be visible on the page."""
+        if self._can_wait_for_event(locator):
+            return await self._wait_for_locator(
+                "not_visible", locator, f"Element still visible: {locator}")
+
+        async def invisible():
+            try:
+                element = await self.driver.find_element(*locator)
+                return not await element.is_displayed()
+            except (NoSuchElementException, StaleElementReferenceException):
+                return True
+        return await self._wait_until(invisible,
+                                      f"Element still visible: {locator}")
+
+    @verifies_page
+    @recorded_async_wait
+    async def wait_for_element_clickable(self, locator):
+        """
+        Waits for an element to be clickable.
+        Accepts a locator or an element that was already found.
+        """
+        if self._can_wait_for_event(locator):
+            return await self._wait_for_locator(
+                "clickable", locator, f"Element not clickable: {locator}")
+
+        async def clickable_element():
+            if isinstance(locator, tuple):
+                element = await self.driver.find_element(*locator)
+            else:
+                element = locator
+            if await element.is_displayed() and await element.is_enabled():
+                return element
+            return None
+        return await self._wait_until(clickable_element,
+                                      f"Element not clickable: {locator}")
+
+    async def click_element(self, locator):
+        """Clicks an element after waiting for it to be clickable."""
+        element = await self.wait_for_element_clickable(locator)
+        await element.click()
+
+    async def click_child_element(self, parent_element, child_locator):
+        """
+        Clicks a child element within a parent element.
+        """
+        child_element = await parent_element.find_element(*child_locator)
+        child_element = await self.wait_for_element_clickable(child_element)
+        await child_element.click()
+
+    async def input_text(self, locator, text):
+        """Inputs text into an element after waiting for it to be visible."""
+        element = await self.wait_for_element_visible(locator)
+        await element.send_keys(text)
+
+    async def _wait_until(self, condition, message):
+        """
+        Awaits the condition until it returns a truthy value
+        or the timeout is reached.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            self._count_poll()
+            try:
+                value = await condition()
+                if value:
+                    return value
+            except (NoSuchElementException, StaleElementReferenceException):
+                pass
+            if loop.time() > deadline:
+                raise TimeoutException(message)
+            await asyncio.sleep(self.poll_frequency)
+
+    def _count_poll(self):
+        """Counts a check of the condition of the running wait."""
+        if self.wait_records:
+            self.wait_records[-1].polls += 1
+
+    def _can_wait_for_event(self, locator):
+        """
+        Checks if the event-driven engine can wait for the locator.
+        Other locator strategies fall back to polling.
+        """
+        if self.wait_engine != "event":
+            return False
+        if not isinstance(locator, tuple):
+            return True  # An element that was already found
+        by, _ = self._locator_converter.convert(*locator)
+        return by in EVENT_WAIT_STRATEGIES
+
+    async def _wait_for_locator(self, condition, locator, message):
+        """
+        Waits for a condition of a locator or an element.
+        """
+        if not isinstance(locator, tuple):
+            return await self._wait_for_event(condition, message,
+                                              element=locator)
+        by, value = self._locator_converter.convert(*locator)
+        return await self._wait_for_event(condition, message,
+                                          using=EVENT_WAIT_STRATEGIES[by],
+                                          selector=value)
+
+    async def _wait_for_event(self, condition, message, using=None,
+                              selector=None, element=None):
+        """
+        Waits in the page until the condition is met,
+        see BasePage._wait_for_event.
+        """
+        result = await self._wait_in_page(message, WAIT_FOR_CONDITION_SCRIPT,
+                                          condition, using, selector, element)
+        if isinstance(result, dict):
+            raise InvalidSelectorException(
+                f"{result['error']} (selector: {selector})")
+        return result
+
+    async def _wait_in_page(self, message, script, *args):
+        """
+        Runs an async wait script until it resolves with a truthy value,
+        see BasePage._wait_in_page.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutException(message)
+            self._count_poll()
+            try:
+                result = await self.driver.execute_async_script(
+                    script, *args, int(remaining * 1000))
+            except TimeoutException:
+                continue  # Script timeout
+            except JavascriptException as e:
+                if not is_navigation_error(e):
+                    raise
+                continue
+            if result:
+                return result
@@ -0,0 +1,140 @@
+"""
+This file contains the AsyncInventoryPage class,
+the asyncio variant of the InventoryPage.
+It uses the locators of the synchronous InventoryPage.
+"""
+
+from pages.async_base_page import AsyncBasePage, verifies_page
+from pages.async_item_page import AsyncItemPage
+from pages.inventory_page import InventoryPage
+from pages.page_scripts import (CART_SNAPSHOT_SCRIPT, PRODUCT_INDEX_SCRIPT,
+                                WAIT_FOR_CART_COUNT_SCRIPT)
+from selenium.common.exceptions import StaleElementReferenceException
+from utils.wait_telemetry import recorded_async_wait
+
+
+class AsyncInventoryPage(AsyncBasePage):
+    """
+    Asynchronous page object for the inventory page,
+    providing methods to interact with products and the shopping cart.
+    """
+    inventory_item_locator = InventoryPage.inventory_item_locator
+    item_name_locator = InventoryPage.item_name_locator
+    item_img_locator = InventoryPage.item_img_locator
+    add_to_cart_button_locator = InventoryPage.add_to_cart_button_locator
+    remove_from_cart_button_locator = \
+        InventoryPage.remove_from_cart_button_locator
+    cart_item_count_locator = InventoryPage.cart_item_count_locator
+    url_substring = InventoryPage.url_substring
+    ready_locator = InventoryPage.ready_locator
+
+    def __init__(self, driver):
+        super().__init__(driver)
+        self._product_index = None
+
+    async def get_products(self):
+        """Returns a list of all products in the inventory."""
+        await self.wait_for_element_visible(self.inventory_item_locator)
+        return await self.driver.find_elements(*self.inventory_item_locator)
+
+    async def get_product_by_name(self, product_name):
+        """
+        Returns a product element by its name.
+        Uses the product index, like InventoryPage.get_product_by_name.
+        """
+        index = await self._get_product_index()
+        if product_name not in index:
+            self._product_index = None
+            index = await self._get_product_index()
+        if product_name not in index:
+            raise RuntimeError(
+                f"Product '{product_name}' not found in inventory. "
+                f"Products available: {list(index)}")
+        return index[product_name]
+
+    async def _get_product_index(self):
+        """
+        Returns a dictionary of product name -> product element,
+        built with a single script call.
+        """
+        if self._product_index is None:
+            await self.wait_for_element_visible(self.inventory_item_locator)
+            pairs = await self.driver.execute_script(
+                PRODUCT_INDEX_SCRIPT,
+                self.inventory_item_locator[1],
+                self.item_name_locator[1])
+            self._product_index = dict(pairs)
+        return self._product_index
+
+    async def click_add_to_cart(self, product_name):
+        """Clicks the 'Add to Cart' button for a product."""
+        await self._click_in_product(product_name,
+                                     self.add_to_cart_button_locator)
+
+    async def click_remove_from_cart(self, product_name):
+        """Clicks the 'Remove from Cart' button for a product."""
+        await self._click_in_product(product_name,
+                                     self.remove_from_cart_button_locator)
+
+    async def click_product_link(self, product_name):
+        """
+        Clicks the product link to navigate to the item page.
+        Returns the item page, which is verified on first use.
+        """
+        await self._click_in_product(product_name, self.item_name_locator)
+        return AsyncItemPage(self.driver)
+
+    async def click_product_img(self, product_name):
+        """
+        Clicks the product image to navigate to the item page.
+        Returns the item page, which is verified on first use.
+        """
+        await self._click_in_product(product_name, self.item_img_locator)
+        return AsyncItemPage(self.driver)
+
+    async def _click_in_product(self, product_name, child_locator):
+        """
+        Clicks a child element of a product.
+        Rebuilds the product index once if the product element is stale,
+        like InventoryPage._click_in_product.
+        """
+        product = await self.get_product_by_name(product_name)
+        try:
+            await self.click_child_element(product, child_locator)
+        except StaleElementReferenceException:
+            self._product_index = None
+            product = await self.get_product_by_name(product_name)
+            await self.click_child_element(product, child_locator)
+
+    async def get_num_of_items_in_cart(self):
+        """Returns the number of items in the cart."""
+        cart_item = await self.wait_for_element_visible(
+            self.cart_item_count_locator)
+        return int(await cart_item.text())
+
+    @verifies_page
+    async def get_cart_snapshot(self):
+        """
+        Returns the cart state in a single roundtrip,
+        like InventoryPage.get_cart_snapshot.
+        """
+        return await self.driver.execute_script(CART_SNAPSHOT_SCRIPT,
+                                                *self._cart_selectors())
+
+    @verifies_page
+    @recorded_async_wait
+    async def wait_for_cart_count(self, count):
+        """
+        Waits until the cart badge shows the count (0: no badge shown)
+        and returns the cart snapshot.
+        """
+        return await self._wait_in_page(f"Cart count is not {count}",
+                                        WAIT_FOR_CART_COUNT_SCRIPT,
+                                        *self._cart_selectors(), count)
+
+    def _cart_selectors(self):
+        """Returns the CSS selectors the cart scripts work with."""
+        return (self.inventory_item_locator[1],
+                self.item_name_locator[1],
+                self.cart_item_count_locator[1],
+                self.remove_from_cart_button_locator[1])
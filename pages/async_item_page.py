@@ -0,0 +1,16 @@
+"""
+This file contains the AsyncItemPage class,
+the asyncio variant of the ItemPage.
+"""
+
+from pages.async_base_page import AsyncBasePage
+from pages.item_page import ItemPage
+
+
+class AsyncItemPage(AsyncBasePage):
+    """
+    Asynchronous page object for individual item pages.
+    Note: This class is a placeholder and may be extended in the future.
+    """
+    url_substring = ItemPage.url_substring
+    ready_locator = ItemPage.ready_locator
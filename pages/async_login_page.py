@@ -0,0 +1,96 @@
+"""
+This file contains the AsyncLoginPage class,
+the asyncio variant of the LoginPage.
+It uses the locators of the synchronous LoginPage.
+"""
+
+from lib import consts
+from pages.async_base_page import AsyncBasePage, verifies_page
+from pages.async_inventory_page import AsyncInventoryPage
+from pages.login_page import LoginPage
+from pages.page_scripts import FILL_FORM_SCRIPT
+from selenium.common.exceptions import NoSuchElementException
+from urllib.parse import urlparse
+
+
+class AsyncLoginPage(AsyncBasePage):
+    """
+    Asynchronous page object for the login page,
+    providing methods to perform login actions.
+    """
+    username_locator = LoginPage.username_locator
+    password_locator = LoginPage.password_locator
+    login_button_locator = LoginPage.login_button_locator
+    alert_missing_user_locator = LoginPage.alert_missing_user_locator
+    alert_missing_password_locator = LoginPage.alert_missing_password_locator
+    alert_invalid_credentials_locator = \
+        LoginPage.alert_invalid_credentials_locator
+    alert_locked_user_locator = LoginPage.alert_locked_user_locator
+    ready_locator = LoginPage.ready_locator
+
+    def __init__(self, driver, base_url=consts.BASE_URL, fill_mode=None):
+        super().__init__(driver)
+        self.base_url = base_url
+        self.url_substring = urlparse(base_url).netloc
+        # Same default as the LoginPage: script or typing
+        self.fill_mode = fill_mode or LoginPage.fill_mode
+
+    # Login methods
+    async def _login(self, username, password):
+        """
+        Performs the login action with the provided username and password.
+        Types the credentials only in the typing fill mode.
+        """
+        if self.fill_mode == "script":
+            await self._fill_form(username, password)
+            return
+        await self.input_text(self.username_locator, username)
+        await self.input_text(self.password_locator, password)
+        await self.click_element(self.login_button_locator)
+
+    @verifies_page
+    async def _fill_form(self, username, password):
+        """
+        Sets both fields and clicks the login button in one script call.
+        """
+        missing = await self.driver.execute_script(
+            FILL_FORM_SCRIPT,
+            [[self.username_locator[1], username],
+             [self.password_locator[1], password]],
+            self.login_button_locator[1])
+        if missing:
+            raise NoSuchElementException(f"Element not found: {missing}")
+
+    async def _login_expect_error(self, username, password, error_locator):
+        """Logs in and expects an error message to be displayed."""
+        await self._login(username, password)
+        await self.wait_for_element_visible(error_locator)
+        return self
+
+    async def login_expect_success(self, username, password):
+        """
+        Logs in and expects to be redirected to the inventory page.
+        The redirect is checked when the inventory page is verified.
+        """
+        await self._login(username, password)
+        return AsyncInventoryPage(self.driver)
+
+    async def login_expect_invalid_credentials(self, username, password):
+        """Logs in with invalid credentials and expects an error message."""
+        return await self._login_expect_error(
+            username, password, self.alert_invalid_credentials_locator)
+
+    async def login_expect_missing_username(self, username, password):
+        """Logs in with a missing username and expects an error message."""
+        return await self._login_expect_error(
+            username, password, self.alert_missing_user_locator)
+
+    async def login_expect_missing_password(self, username, password):
+        """Logs in with a missing password and expects an error message."""
+        return await self._login_expect_error(
+            username, password, self.alert_missing_password_locator)
+
+    async def login_expect_locked_user(self, username, password):
+        """Logs in with a locked user and expects an error message."""
+        return await self._login_expect_error(
+            username, password, self.alert_locked_user_locator)
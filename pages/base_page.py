@@ -3,20 +3,104 @@ This file contains the BasePage class,
 which provides common methods for page interactions.
 It includes methods for waiting for elements, clicking elements,
 inputting text, and checking the current URL.
+Waits are event-driven by default: a script in the page resolves as soon
+as the condition is met, instead of polling the browser every 500 ms.
 """
 
+from pages.page_scripts import (NETWORK_IDLE_SCRIPT,
+                                WAIT_FOR_CONDITION_SCRIPT)
+from utils.page_usage import page_usage
+from utils.wait_telemetry import recorded_wait
+from selenium.common.exceptions import (InvalidSelectorException,
+                                        JavascriptException,
+                                        TimeoutException)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.locator_converter import LocatorConverter
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import functools
+import time
+
+# Locator strategies the event-driven waits can resolve in the page
+EVENT_WAIT_STRATEGIES = {By.CSS_SELECTOR: "css",
+                         By.TAG_NAME: "css",
+                         By.XPATH: "xpath"}
+
+# Script errors of Chrome, Firefox and BiDi that mean the page navigated
+# away while a wait script was running
+NAVIGATION_ERRORS = ("document unloaded", "document was unloaded",
+                     "execution context was destroyed",
+                     "inspected target navigated")
+
+
+def is_navigation_error(error):
+    """
+    Checks if a script failed because its document was unloaded.
+    """
+    message = (error.msg or "").lower()
+    return any(text in message for text in NAVIGATION_ERRORS)
+
+
+def verifies_page(method):
+    """
+    Decorator for page object methods that interact with the page.
+    Verifies the page before the first interaction.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.verified()
+        return method(self, *args, **kwargs)
+    return wrapper
 
 
 class BasePage:
     """
     Base class for all page objects,
     providing common methods for page interactions.
+    Page objects can declare a `ready_locator`: the element that has to be
+    visible before the page can be used, and a `url_substring`.
+    Pages are verified lazily: on the first interaction or with an
+    explicit `verified()` call, and only once per page object.
+    The `wait_engine` decides how the waits work:
+    event: resolve in the page as soon as the condition is met.
+    poll: poll the condition with WebDriverWait.
+    The `readiness` decides when a page is ready:
+    element: when the ready element is visible (or the page is loaded).
+    network-idle: additionally, when no request was in flight
+    for `network_idle_time` seconds.
     """
+    ready_locator = None
+    url_substring = None
+    wait_engine = "event"
+    readiness = "element"
+    network_idle_time = 0.5
+    _locator_converter = LocatorConverter()
+
     def __init__(self, driver):
         self.driver = driver
         self.timeout = 10  # Default timeout for waits
+        self.wait_records = []  # Telemetry of the running waits
+        page_usage.record(type(self))
+        self._verified = False
+        self._verifying = False
+
+    def verified(self):
+        """
+        Waits until the browser shows this page and returns the page object.
+        Checks the URL and the page readiness only once,
+        repeated calls return immediately.
+        """
+        if self._verified or self._verifying:
+            return self
+        self._verifying = True
+        try:
+            if self.url_substring:
+                self.wait_for_url_contains(self.url_substring)
+            self.wait_for_page_ready()
+            self._verified = True
+        finally:
+            self._verifying = False
+        return self
 
     def get_page_title(self):
         """Returns the title of the current page."""
@@ -30,43 +114,86 @@ class BasePage:
         """Checks if the current URL contains a specific substring."""
         return substring in self.driver.current_url
 
+    @recorded_wait
     def wait_for_url_contains(self, substring):
         """Waits until the current URL contains a specific substring."""
-        WebDriverWait(self.driver, self.timeout).until(
-                EC.url_contains(substring)
-                )
+        if self.wait_engine == "event":
+            self._wait_for_event("url", f"URL does not contain '{substring}'",
+                                 selector=substring)
+            return
+        self._until(EC.url_contains(substring))
 
+    @recorded_wait
     def wait_for_page_ready(self):
-        """Waits for the page to be fully loaded."""
-        WebDriverWait(self.driver, self.timeout).until(
-            lambda d: d.execute_script(
-                "return document.readyState") == "complete"
-        )
+        """
+        Waits for the page to be ready to use.
+        Pages with a `ready_locator` wait until this element is visible,
+        no matter if images and other resources are still loading.
+        Other pages wait for the page to be fully loaded.
+        With network-idle readiness, all pages wait for the network to be
+        idle instead of the page to be fully loaded.
+        """
+        if self.ready_locator:
+            self.wait_for_element_visible(self.ready_locator)
+        if self.readiness == "network-idle":
+            self.wait_for_network_idle()
+            return
+        if self.ready_locator:
+            return
+        if self.wait_engine == "event":
+            self._wait_for_event("loaded", "Page is not loaded")
+            return
+        self._until(lambda d: d.execute_script(
+            "return document.readyState") == "complete")
 
+    @recorded_wait
+    def wait_for_network_idle(self, idle_time=None):
+        """
+        Waits until no fetch/XHR request was in flight for the idle time
+        (default: `network_idle_time`), e.g. for content loaded by scripts.
+        """
+        idle_time = self.network_idle_time if idle_time is None else idle_time
+        self._wait_in_page("Network is not idle", NETWORK_IDLE_SCRIPT,
+                           int(idle_time * 1000))
+
+    @verifies_page
+    @recorded_wait
     def wait_for_element(self, locator):
         """Waits for an element to be present in the DOM."""
+        if self._can_wait_for_event(locator):
+            return self._wait_for_locator("present", locator,
+                                          f"Element not present: {locator}")
+        return self._until(EC.presence_of_element_located(locator))
 
-        return WebDriverWait(self.driver, self.timeout).until(
-                EC.presence_of_element_located(locator)
-            )
-
+    @verifies_page
+    @recorded_wait
     def wait_for_element_visible(self, locator):
         """Waits for an element to be visible on the page."""
-        return WebDriverWait(self.driver, self.timeout).until(
-                EC.visibility_of_element_located(locator)
-            )
+        if self._can_wait_for_event(locator):
+            return self._wait_for_locator("visible", locator,
+                                          f"Element not visible: {locator}")
+        return self._until(EC.visibility_of_element_located(locator))
 
+    @verifies_page
+    @recorded_wait
     def wait_for_element_not_visible(self, locator):
         """Waits for an element to not be visible on the page."""
-        return WebDriverWait(self.driver, self.timeout).until(
-                EC.invisibility_of_element_located(locator)
-            )
+        if self._can_wait_for_event(locator):
+            return self._wait_for_locator("not_visible", locator,
+                                          f"Element still visible: {locator}")
+        return self._until(EC.invisibility_of_element_located(locator))
 
+    @verifies_page
+    @recorded_wait
     def wait_for_element_clickable(self, locator):
-        """Waits for an element to be clickable."""
-        return WebDriverWait(self.driver, self.timeout).until(
-                EC.element_to_be_clickable(locator)
-            )
+        """
+        Waits for an element to be clickable.
+        Accepts a locator or an element that was already found.
+        """
+        if self._can_wait_for_event(locator):
+            return self._wait_for_locator("clickable", locator,
+                                          f"Element not clickable: {locator}")
+        return self._until(EC.element_to_be_clickable(locator))
 
     def click_element(self, locator):
         """Clicks an element after waiting for it to be clickable."""
@@ -77,9 +204,84 @@ class BasePage:
         Clicks a child element within a parent element.
         """
         child_element = parent_element.find_element(*child_locator)
-        self.wait_for_element_clickable(child_locator)
-        child_element.click()
+        self.wait_for_element_clickable(child_element).click()
 
     def input_text(self, locator, text):
         """Inputs text into an element after waiting for it to be visible."""
         self.wait_for_element_visible(locator).send_keys(text)
+
+    def _can_wait_for_event(self, locator):
+        """
+        Checks if the event-driven engine can wait for the locator.
+        Other locator strategies (e.g. link text) fall back to polling.
+        """
+        if self.wait_engine != "event":
+            return False
+        if not isinstance(locator, tuple):
+            return True  # An element that was already found
+        by, _ = self._locator_converter.convert(*locator)
+        return by in EVENT_WAIT_STRATEGIES
+
+    def _wait_for_locator(self, condition, locator, message):
+        """
+        Waits for a condition of a locator or an element.
+        """
+        if not isinstance(locator, tuple):
+            return self._wait_for_event(condition, message, element=locator)
+        by, value = self._locator_converter.convert(*locator)
+        return self._wait_for_event(condition, message,
+                                    using=EVENT_WAIT_STRATEGIES[by],
+                                    selector=value)
+
+    def _wait_for_event(self, condition, message, using=None, selector=None,
+                        element=None):
+        """
+        Waits in the page until the condition is met.
+        """
+        result = self._wait_in_page(message, WAIT_FOR_CONDITION_SCRIPT,
+                                    condition, using, selector, element)
+        if isinstance(result, dict):
+            raise InvalidSelectorException(
+                f"{result['error']} (selector: {selector})")
+        return result
+
+    def _until(self, condition):
+        """
+        Polls the condition with WebDriverWait and counts the polls.
+        """
+        def counted_condition(driver):
+            self._count_poll()
+            return condition(driver)
+        return WebDriverWait(self.driver, self.timeout).until(
+            counted_condition)
+
+    def _count_poll(self):
+        """Counts a check of the condition of the running wait."""
+        if self.wait_records:
+            self.wait_records[-1].polls += 1
+
+    def _wait_in_page(self, message, script, *args):
+        """
+        Runs an async wait script until it resolves with a truthy value.
+        The remaining time in ms is passed as last argument.
+        If the page navigates away while waiting or the script times out,
+        the wait continues with a new script. Other script errors are
+        raised. Raises a TimeoutException like WebDriverWait.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException(message)
+            self._count_poll()
+            try:
+                result = self.driver.execute_async_script(
+                    script, *args, int(remaining * 1000))
+            except TimeoutException:
+                continue  # Script timeout
+            except JavascriptException as e:
+                if not is_navigation_error(e):
+                    raise
+                continue
+            if result:
+                return result
@@ -5,9 +5,13 @@ It includes methods for managing products, such as adding to cart,
 removing from cart, and navigating to item pages.
 """
 
-from pages.base_page import BasePage
+from pages.base_page import BasePage, verifies_page
 from pages.item_page import ItemPage
+from pages.page_scripts import (CART_SNAPSHOT_SCRIPT, PRODUCT_INDEX_SCRIPT,
+                                WAIT_FOR_CART_COUNT_SCRIPT)
+from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.common.by import By
+from utils.wait_telemetry import recorded_wait
 
 
 class InventoryPage(BasePage):
@@ -15,31 +19,34 @@ class InventoryPage(BasePage):
     Page object for the inventory page,
     providing methods to interact with products and the shopping cart.
     """
+    url_substring = "inventory.html"
+
+    # Locators for the inventory page elements
+    inventory_item_locator = (
+        By.CSS_SELECTOR,
+        "div[data-test='inventory-item']")
+    item_name_locator = (
+        By.CSS_SELECTOR,
+        "div[data-test='inventory-item-name']")
+    item_img_locator = (
+        By.CSS_SELECTOR,
+        "img[data-test^='inventory-item']"
+        "[data-test$='img']")
+    add_to_cart_button_locator = (
+        By.CSS_SELECTOR,
+        "button[data-test^='add-to-cart']")
+    remove_from_cart_button_locator = (
+        By.CSS_SELECTOR,
+        "button[data-test^='remove-']")
+    cart_item_count_locator = (
+        By.CSS_SELECTOR,
+        "span[data-test='shopping-cart-badge']")
+    # The inventory list is rendered, when the first product is visible
+    ready_locator = inventory_item_locator
+
     def __init__(self, driver):
         super().__init__(driver)
-        self.wait_for_url_contains("inventory.html")
-        self.wait_for_page_ready()
-
-        # Locators for the inventory page elements
-        self.inventory_item_locator = (
-            By.CSS_SELECTOR,
-            "div[data-test='inventory-item']")
-        self.item_name_locator = (
-            By.CSS_SELECTOR,
-            "div[data-test='inventory-item-name']")
-        self.item_img_locator = (
-            By.CSS_SELECTOR,
-            "img[data-test^='inventory-item']"
-            "[data-test$='img']")
-        self.add_to_cart_button_locator = (
-            By.CSS_SELECTOR,
-            "button[data-test^='add-to-cart']")
-        self.remove_from_cart_button_locator = (
-            By.CSS_SELECTOR,
-            "button[data-test^='remove-']")
-        self.cart_item_count_locator = (
-            By.CSS_SELECTOR,
-            "span[data-test='shopping-cart-badge']")
+        self._product_index = None
 
     def get_products(self):
         """Returns a list of all products in the inventory."""
@@ -48,40 +55,107 @@ class InventoryPage(BasePage):
         return products
 
     def get_product_by_name(self, product_name):
-        """Returns a product element by its name."""
-        products = self.get_products()
-        for product in products:
-            name = product.find_element(*self.item_name_locator).text
-            if name == product_name:
-                return product
-        raise RuntimeError(
-            f"Product '{product_name}' not found in inventory. "
-            f"Products available: {[p.text for p in products]}")
+        """
+        Returns a product element by its name.
+        Uses the product index, which is rebuilt once if the product
+        is missing, in case the inventory was rendered again.
+        """
+        product = self._get_product_index().get(product_name)
+        if product is None:
+            self._product_index = None
+            product = self._get_product_index().get(product_name)
+        if product is None:
+            raise RuntimeError(
+                f"Product '{product_name}' not found in inventory. "
+                f"Products available: {list(self._product_index)}")
+        return product
 
     def click_add_to_cart(self, product_name):
         """Clicks the 'Add to Cart' button for a product."""
-        product = self.get_product_by_name(product_name)
-        self.click_child_element(product, self.add_to_cart_button_locator)
+        self._click_in_product(product_name, self.add_to_cart_button_locator)
 
     def click_remove_from_cart(self, product_name):
         """Clicks the 'Remove from Cart' button for a product."""
-        product = self.get_product_by_name(product_name)
-        self.click_child_element(product, self.remove_from_cart_button_locator)
+        self._click_in_product(product_name,
+                               self.remove_from_cart_button_locator)
 
     def click_product_link(self, product_name):
-        """Clicks the product link to navigate to the item page."""
-        product = self.get_product_by_name(product_name)
-        self.click_child_element(product, self.item_name_locator)
+        """
+        Clicks the product link to navigate to the item page.
+        Returns the item page, which is verified on first use.
+        """
+        self._click_in_product(product_name, self.item_name_locator)
         return ItemPage(self.driver)
 
     def click_product_img(self, product_name):
-        """Clicks the product image to navigate to the item page."""
-        product = self.get_product_by_name(product_name)
-        self.click_child_element(product, self.item_img_locator)
+        """
+        Clicks the product image to navigate to the item page.
+        Returns the item page, which is verified on first use.
+        """
+        self._click_in_product(product_name, self.item_img_locator)
         return ItemPage(self.driver)
 
+    def _get_product_index(self):
+        """
+        Returns a dictionary of product name -> product element.
+        The index is built with a single script call and kept until
+        the product elements are replaced in the DOM.
+        """
+        if self._product_index is None:
+            self.wait_for_element_visible(self.inventory_item_locator)
+            pairs = self.driver.execute_script(
+                PRODUCT_INDEX_SCRIPT,
+                self.inventory_item_locator[1],
+                self.item_name_locator[1])
+            self._product_index = dict(pairs)
+        return self._product_index
+
+    def _click_in_product(self, product_name, child_locator):
+        """
+        Clicks a child element of a product.
+        Rebuilds the product index once if the product element is stale.
+        """
+        product = self.get_product_by_name(product_name)
+        try:
+            self.click_child_element(product, child_locator)
+        except StaleElementReferenceException:
+            self._product_index = None
+            product = self.get_product_by_name(product_name)
+            self.click_child_element(product, child_locator)
+
     def get_num_of_items_in_cart(self):
         """Returns the number of items in the cart."""
         self.wait_for_element_visible(self.cart_item_count_locator)
         cart_item = self.driver.find_element(*self.cart_item_count_locator)
         return int(cart_item.text)
+
+    @verifies_page
+    def get_cart_snapshot(self):
+        """
+        Returns the cart state in a single roundtrip:
+        {"count": number on the cart badge (0 if no badge is shown,
+                  None if the shown badge has no number),
+         "badge_visible": whether the cart badge is shown,
+         "in_cart": names of the products that show a "Remove" button}
+        """
+        return self.driver.execute_script(CART_SNAPSHOT_SCRIPT,
+                                          *self._cart_selectors())
+
+    @verifies_page
+    @recorded_wait
+    def wait_for_cart_count(self, count):
+        """
+        Waits until the cart badge shows the count (0: no badge shown)
+        and returns the cart snapshot.
+        The page watches the cart itself, so there is no polling.
+        """
+        return self._wait_in_page(f"Cart count is not {count}",
+                                  WAIT_FOR_CART_COUNT_SCRIPT,
+                                  *self._cart_selectors(), count)
+
+    def _cart_selectors(self):
+        """Returns the CSS selectors the cart scripts work with."""
+        return (self.inventory_item_locator[1],
+                self.item_name_locator[1],
+                self.cart_item_count_locator[1],
+                self.remove_from_cart_button_locator[1])
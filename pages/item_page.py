@@ -1,10 +1,11 @@
 """
 This file contains the ItemPage class.
 This class is a placeholder for future development
-and currently does not contain any specific methods or attributes.
+and currently only contains what is needed to verify the page.
 """
 
 from pages.base_page import BasePage
+from selenium.webdriver.common.by import By
 
 
 class ItemPage(BasePage):
@@ -13,8 +14,10 @@ class ItemPage(BasePage):
     providing methods to interact with item details.
     Note: This class is a placeholder and may be extended in the future.
     """
-    def __init__(self, driver):
-        super().__init__(driver)
-        url_substring = "inventory-item.html"
-        self.wait_for_url_contains(url_substring)
-        self.wait_for_page_ready()
+    url_substring = "inventory-item.html"
+
+    # Locators for the item page elements
+    item_name_locator = (
+        By.CSS_SELECTOR,
+        "div[data-test='inventory-item-name']")
+    ready_locator = item_name_locator
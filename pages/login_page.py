@@ -6,9 +6,13 @@ such as successful login, missing username, missing password,
 locked user, and invalid credentials.
 """
 
+from lib import consts
 from selenium.webdriver.common.by import By
+from urllib.parse import urlparse
 from pages.inventory_page import InventoryPage
-from pages.base_page import BasePage
+from pages.base_page import BasePage, verifies_page
+from pages.page_scripts import FILL_FORM_SCRIPT
+from selenium.common.exceptions import NoSuchElementException
 
 
 class LoginPage(BasePage):
@@ -16,43 +20,65 @@ class LoginPage(BasePage):
     Page object for the login page,
     providing methods to perform login actions.
     """
-    def __init__(self, driver):
-        super().__init__(driver)
-        self.wait_for_url_contains("saucedemo.com")
-        self.wait_for_page_ready()
+    # Locators for the login page elements
+    username_locator = (
+        By.CSS_SELECTOR,
+        "input[data-test='username']")
+    password_locator = (
+        By.CSS_SELECTOR,
+        "input[data-test='password']")
+    login_button_locator = (
+        By.CSS_SELECTOR,
+        "input[data-test='login-button']")
+    alert_missing_user_locator = (
+        By.XPATH, "//h3[contains(@data-test, 'error') and "
+        "contains(., 'Username is required')]")
+    alert_missing_password_locator = (
+        By.XPATH, "//h3[contains(@data-test, 'error') and "
+        "contains(., 'Password is required')]")
+    alert_invalid_credentials_locator = (
+        By.XPATH, "//h3[contains(@data-test, 'error') and "
+        "contains(., 'not match')]")
+    alert_locked_user_locator = (
+        By.XPATH, "//h3[contains(@data-test, 'error') and "
+        "contains(., 'locked out')]")
+    ready_locator = login_button_locator
+    # script: fill the form and submit in one script call
+    # typing: type the credentials with real keystrokes
+    fill_mode = "script"
 
-        # Locators for the login page elements
-        self.username_locator = (
-            By.CSS_SELECTOR,
-            "input[data-test='username']")
-        self.password_locator = (
-            By.CSS_SELECTOR,
-            "input[data-test='password']")
-        self.login_button_locator = (
-            By.CSS_SELECTOR,
-            "input[data-test='login-button']")
-        self.alert_missing_user_locator = (
-            By.XPATH, "//h3[contains(@data-test, 'error') and "
-            "contains(., 'Username is required')]")
-        self.alert_missing_password_locator = (
-            By.XPATH, "//h3[contains(@data-test, 'error') and "
-            "contains(., 'Password is required')]")
-        self.alert_invalid_credentials_locator = (
-            By.XPATH, "//h3[contains(@data-test, 'error') and "
-            "contains(., 'not match')]")
-        self.alert_locked_user_locator = (
-            By.XPATH, "//h3[contains(@data-test, 'error') and "
-            "contains(., 'locked out')]")
+    def __init__(self, driver, base_url=consts.BASE_URL, fill_mode=None):
+        super().__init__(driver)
+        self.url_substring = urlparse(base_url).netloc
+        if fill_mode:
+            self.fill_mode = fill_mode
 
     # Login methods
     def _login(self, username, password):
         """
         Performs the login action with the provided username and password.
+        Types the credentials only in the typing fill mode.
         """
+        if self.fill_mode == "script":
+            self._fill_form(username, password)
+            return
         self.input_text(self.username_locator, username)
         self.input_text(self.password_locator, password)
         self.click_element(self.login_button_locator)
 
+    @verifies_page
+    def _fill_form(self, username, password):
+        """
+        Sets both fields and clicks the login button in one script call.
+        """
+        missing = self.driver.execute_script(
+            FILL_FORM_SCRIPT,
+            [[self.username_locator[1], username],
+             [self.password_locator[1], password]],
+            self.login_button_locator[1])
+        if missing:
+            raise NoSuchElementException(f"Element not found: {missing}")
+
     def _login_expect_error(self, username, password, error_locator):
         """Logs in and expects an error message to be displayed."""
         self._login(username, password)
@@ -60,9 +86,11 @@ class LoginPage(BasePage):
         return self
 
     def login_expect_success(self, username, password):
-        """Logs in and expects to be redirected to the inventory page."""
+        """
+        Logs in and expects to be redirected to the inventory page.
+        The redirect is checked when the inventory page is verified.
+        """
         self._login(username, password)
-        self.wait_for_url_contains("inventory.html")
         return InventoryPage(self.driver)
 
     def login_expect_invalid_credentials(self, username, password):
@@ -0,0 +1,294 @@
+"""
+This file contains the JavaScript snippets the page objects run in the
+browser. Doing work in one script call instead of many WebDriver
+commands saves roundtrips. The snippets are shared by the synchronous
+and the asynchronous page objects.
+"""
+
+# Returns [name, element] pairs for all products in one roundtrip.
+# arguments: item selector, name selector
+PRODUCT_INDEX_SCRIPT = """
+    const [itemSelector, nameSelector] = arguments;
+    return Array.from(document.querySelectorAll(itemSelector)).map(item => {
+        const name = item.querySelector(nameSelector);
+        return [name ? name.textContent.trim() : "", item];
+    });
+"""
+
+# Resolves as soon as a wait condition is met, without polling over the wire.
+# A MutationObserver re-checks the condition on every DOM change. Events and
+# a slow in-page timer cover changes that are no DOM mutations, like CSS
+# transitions, history navigation and layout changes.
+# Resolves with the element (present, visible, clickable), true (not_visible,
+# url, loaded), null on timeout, or {error} if the locator is invalid.
+# arguments: condition, using (css, xpath), selector or URL substring,
+#            element (instead of a selector), timeout in ms
+WAIT_FOR_CONDITION_SCRIPT = """
+    const [condition, using, selector, target, timeout] = arguments;
+    const done = arguments[arguments.length - 1];
+    let finished = false;
+
+    function find() {
+        if (target) {
+            return target.isConnected ? target : null;
+        }
+        if (using === "xpath") {
+            return document.evaluate(
+                selector, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(selector);
+    }
+
+    function isVisible(element) {
+        if (element.checkVisibility) {
+            return element.checkVisibility(
+                {opacityProperty: true, visibilityProperty: true});
+        }
+        const style = getComputedStyle(element);
+        return element.getClientRects().length > 0 &&
+            style.visibility === "visible" && style.opacity !== "0";
+    }
+
+    function check() {
+        switch (condition) {
+            case "url":
+                return location.href.includes(selector) || null;
+            case "loaded":
+                return document.readyState === "complete" || null;
+        }
+        const element = find();
+        switch (condition) {
+            case "present":
+                return element;
+            case "visible":
+                return element && isVisible(element) ? element : null;
+            case "clickable":
+                return element && isVisible(element) && !element.disabled
+                    ? element : null;
+            case "not_visible":
+                return !element || !isVisible(element) || null;
+        }
+    }
+
+    const observer = new MutationObserver(evaluate);
+    const timer = setTimeout(() => finish(null), timeout);
+    const fallback = setInterval(evaluate, 250);
+    const events = ["transitionend", "animationend", "popstate",
+                    "hashchange", "readystatechange", "load"];
+
+    function finish(result) {
+        if (finished) {
+            return;
+        }
+        finished = true;
+        observer.disconnect();
+        clearTimeout(timer);
+        clearInterval(fallback);
+        events.forEach(
+            name => window.removeEventListener(name, evaluate, true));
+        done(result);
+    }
+
+    function evaluate() {
+        if (finished) {
+            return;
+        }
+        try {
+            const result = check();
+            if (result) {
+                finish(result);
+            }
+        } catch (error) {
+            finish({error: error.message});
+        }
+    }
+
+    evaluate();
+    if (!finished) {
+        observer.observe(document, {childList: true, subtree: true,
+                                    attributes: true, characterData: true});
+        events.forEach(name => window.addEventListener(name, evaluate, true));
+    }
+"""
+
+# Counts the fetch/XHR requests in flight and remembers when the network
+# was last active. Finished resources (images, scripts, styles) count as
+# activity too. Can be preloaded into every new document (CDP, BiDi),
+# otherwise NETWORK_IDLE_SCRIPT installs it on first use.
+NETWORK_TRACKER_SCRIPT = """
+    (() => {
+        if (window.__networkTracker) {
+            return;
+        }
+        const tracker = {inflight: 0, lastActivity: performance.now()};
+        window.__networkTracker = tracker;
+        const start = () => {
+            tracker.inflight++;
+            tracker.lastActivity = performance.now();
+        };
+        const end = () => {
+            tracker.inflight = Math.max(0, tracker.inflight - 1);
+            tracker.lastActivity = performance.now();
+        };
+
+        const fetch = window.fetch;
+        if (fetch) {
+            window.fetch = function () {
+                start();
+                try {
+                    return fetch.apply(this, arguments).finally(end);
+                } catch (error) {
+                    end();
+                    throw error;
+                }
+            };
+        }
+        const send = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            start();
+            this.addEventListener("loadend", end, {once: true});
+            try {
+                return send.apply(this, arguments);
+            } catch (error) {
+                end();
+                throw error;
+            }
+        };
+        if (window.PerformanceObserver) {
+            new PerformanceObserver(list => {
+                for (const entry of list.getEntries()) {
+                    tracker.lastActivity = Math.max(tracker.lastActivity,
+                                                    entry.responseEnd);
+                }
+            }).observe({type: "resource", buffered: true});
+        }
+    })();
+"""
+
+# Resolves with true when the DOM is parsed and no request was in flight
+# for the idle time, or with null on timeout.
+# arguments: idle time in ms, timeout in ms
+NETWORK_IDLE_SCRIPT = NETWORK_TRACKER_SCRIPT + """
+    const [idleTime, timeout] = arguments;
+    const done = arguments[arguments.length - 1];
+    const tracker = window.__networkTracker;
+    const deadline = performance.now() + timeout;
+
+    function check() {
+        const now = performance.now();
+        const busy = document.readyState === "loading" || tracker.inflight > 0;
+        const idleFor = now - tracker.lastActivity;
+        if (!busy && idleFor >= idleTime) {
+            done(true);
+        } else if (now >= deadline) {
+            done(null);
+        } else {
+            // Sleep until the idle time could be over, re-check while busy
+            const delay = busy ? 50 : idleTime - idleFor;
+            setTimeout(check, Math.min(Math.max(delay, 10), deadline - now));
+        }
+    }
+    check();
+"""
+
+# Reads the cart state the inventory page shows: whether the cart badge
+# is shown, its count (0 if no badge is shown, null if the shown badge
+# has no number) and the products that show a "Remove" button.
+_CART_SNAPSHOT_FUNCTION = """
+    function cartSnapshot(itemSelector, nameSelector, badgeSelector,
+                          removeSelector) {
+        const badge = document.querySelector(badgeSelector);
+        const badgeVisible = Boolean(badge) &&
+            badge.getClientRects().length > 0 &&
+            getComputedStyle(badge).visibility !== "hidden";
+        const badgeCount = badgeVisible ?
+            parseInt(badge.textContent, 10) : 0;
+        const inCart = [];
+        for (const item of document.querySelectorAll(itemSelector)) {
+            const name = item.querySelector(nameSelector);
+            if (name && item.querySelector(removeSelector)) {
+                inCart.push(name.textContent.trim());
+            }
+        }
+        return {
+            count: Number.isNaN(badgeCount) ? null : badgeCount,
+            badge_visible: badgeVisible,
+            in_cart: inCart
+        };
+    }
+"""
+
+# Returns the cart snapshot in one roundtrip.
+# arguments: item, name, badge and remove button selector
+CART_SNAPSHOT_SCRIPT = _CART_SNAPSHOT_FUNCTION + """
+    return cartSnapshot(...arguments);
+"""
+
+# Resolves with the cart snapshot as soon as the badge shows the count
+# (0: no badge is shown), or with null on timeout.
+# Watches the badge and buttons for changes.
+# arguments: item, name, badge and remove button selector, count,
+#            timeout in ms
+WAIT_FOR_CART_COUNT_SCRIPT = _CART_SNAPSHOT_FUNCTION + """
+    const selectors = Array.from(arguments).slice(0, 4);
+    const [count, timeout] = Array.from(arguments).slice(4, 6);
+    const done = arguments[arguments.length - 1];
+    let finished = false;
+
+    const observer = new MutationObserver(evaluate);
+    const timer = setTimeout(() => finish(null), timeout);
+
+    function finish(result) {
+        if (!finished) {
+            finished = true;
+            observer.disconnect();
+            clearTimeout(timer);
+            done(result);
+        }
+    }
+
+    function evaluate() {
+        const snapshot = cartSnapshot(...selectors);
+        if (snapshot.count === count) {
+            finish(snapshot);
+        }
+    }
+
+    evaluate();
+    if (!finished) {
+        observer.observe(document.body, {childList: true, subtree: true,
+                                         characterData: true,
+                                         attributes: true,
+                                         attributeFilter: ["data-test",
+                                                           "class",
+                                                           "style"]});
+    }
+"""
+
+# Fills form fields and submits the form in one roundtrip.
+# The values are set with the native value setter and announced with
+# input/change events, so frameworks like React see them like typed text.
+# Returns the selector of a missing element, or null.
+# arguments: [[field selector, value], ...], submit button selector
+FILL_FORM_SCRIPT = """
+    const [fields, submitSelector] = arguments;
+    const setValue = Object.getOwnPropertyDescriptor(
+        HTMLInputElement.prototype, "value").set;
+    for (const [selector, value] of fields) {
+        const input = document.querySelector(selector);
+        if (!input) {
+            return selector;
+        }
+        input.focus();
+        setValue.call(input, value);
+        input.dispatchEvent(new Event("input", {bubbles: true}));
+        input.dispatchEvent(new Event("change", {bubbles: true}));
+    }
+    const submit = document.querySelector(submitSelector);
+    if (!submit) {
+        return submitSelector;
+    }
+    submit.click();
+    return null;
+"""
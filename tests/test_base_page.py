@@ -0,0 +1,103 @@
+"""
+This file contains tests for the event-driven waits of the base pages
+and their telemetry.
+The waits run against a stub driver that answers the wait scripts,
+so no browser is needed.
+"""
+
+from pages.async_base_page import AsyncBasePage
+from pages.base_page import BasePage
+from utils.wait_telemetry import wait_recorder
+import asyncio
+import pytest
+from selenium.common.exceptions import JavascriptException
+from selenium.webdriver.common.by import By
+
+UNLOAD_ERRORS = [
+    "javascript error: document unloaded while waiting for result",
+    "Document was unloaded",
+    "Execution context was destroyed.",
+]
+
+
+class ScriptDriver:
+    """
+    Stub driver that answers execute_async_script with the given
+    results in order. Exceptions are raised.
+    """
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def execute_async_script(self, script, *args):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class AsyncScriptDriver(ScriptDriver):
+    """Stub driver for the asynchronous page objects."""
+    async def execute_async_script(self, script, *args):
+        return super().execute_async_script(script, *args)
+
+
+@pytest.mark.parametrize("message", UNLOAD_ERRORS)
+def test_wait_continues_after_unload(message):
+    """Test that a wait continues in the new page after a navigation."""
+    driver = ScriptDriver(JavascriptException(message), True)
+
+    BasePage(driver).wait_for_network_idle()
+
+    assert driver.calls == 2
+
+
+def test_wait_raises_script_errors():
+    """Test that a wait raises errors of the wait script itself."""
+    driver = ScriptDriver(
+        JavascriptException("javascript error: tracker is not defined"),
+        True)
+
+    with pytest.raises(JavascriptException, match="tracker is not defined"):
+        BasePage(driver).wait_for_network_idle()
+    assert driver.calls == 1
+
+
+def test_async_wait_continues_after_unload():
+    """Test that an async wait continues in the new page."""
+    driver = AsyncScriptDriver(JavascriptException(UNLOAD_ERRORS[0]), True)
+
+    asyncio.run(AsyncBasePage(driver).wait_for_network_idle())
+
+    assert driver.calls == 2
+
+
+def test_async_wait_raises_script_errors():
+    """Test that an async wait raises errors of the wait script itself."""
+    driver = AsyncScriptDriver(
+        JavascriptException("javascript error: tracker is not defined"),
+        True)
+
+    with pytest.raises(JavascriptException, match="tracker is not defined"):
+        asyncio.run(AsyncBasePage(driver).wait_for_network_idle())
+    assert driver.calls == 1
+
+
+def test_nested_waits_are_recorded_once():
+    """
+    Test that the waits inside wait_for_page_ready are not recorded
+    separately, so their time is not counted twice.
+    """
+    class ReadyPage(BasePage):
+        ready_locator = (By.CSS_SELECTOR, "main")
+        readiness = "network-idle"
+
+    driver = ScriptDriver(*[True] * 10)
+    recorded = len(wait_recorder.records)
+
+    ReadyPage(driver).wait_for_page_ready()
+
+    records = wait_recorder.records[recorded:]
+    assert [record["wait"] for record in records] == ["wait_for_page_ready"]
+    assert records[0]["polls"] == driver.calls
@@ -0,0 +1,84 @@
+"""
+This file contains tests for the reset of pooled drivers.
+The resets run against a stub driver that records the commands,
+so no browser is needed.
+"""
+
+from utils.driver_pool import DriverPool
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_handle = handle
+
+
+class ResetDriver:
+    """
+    Stub driver with a window per session history.
+    Records the CDP commands and the other commands it receives.
+    """
+    def __init__(self, browser_name, histories):
+        self.caps = {"browserName": browser_name}
+        self.histories = histories
+        self.window_handles = list(histories)
+        self.current_handle = self.window_handles[0]
+        self.switch_to = _SwitchTo(self)
+        self.commands = []
+
+    def execute(self, driver_command, params):
+        self.commands.append((params["cmd"], params["params"]))
+        if params["cmd"] == "Page.getNavigationHistory":
+            return {"value": {"entries": [
+                {"url": url} for url in self.histories[self.current_handle]]}}
+        return {"value": {}}
+
+    def execute_script(self, script, *args):
+        self.commands.append(("clear current origin", self.current_handle))
+        return True
+
+    def close(self):
+        self.commands.append(("close", self.current_handle))
+
+    def delete_all_cookies(self):
+        self.commands.append(("delete cookies", self.current_handle))
+
+    def get(self, url):
+        self.commands.append(("get", url))
+
+
+def test_chrome_reset_clears_every_visited_origin():
+    """
+    Test that Chrome clears the cookies and the storage of all origins
+    the windows of a test navigated to, not only the current one.
+    """
+    driver = ResetDriver("chrome", {
+        "main": ["about:blank", "https://www.saucedemo.com/",
+                 "https://www.saucedemo.com/inventory.html",
+                 "https://example.com/"],
+        "popup": ["https://help.example.org/page", "data:text/html,"]})
+
+    assert DriverPool._reset(driver) is True
+
+    cleared = [params["origin"] for cmd, params in driver.commands
+               if cmd == "Storage.clearDataForOrigin"]
+    assert cleared == ["https://example.com",
+                       "https://help.example.org",
+                       "https://www.saucedemo.com"]
+    assert ("Network.clearBrowserCookies", {}) in driver.commands
+    assert ("close", "popup") in driver.commands
+    assert driver.commands[-1] == ("get", "about:blank")
+
+
+def test_firefox_reset_clears_current_origin():
+    """Test that other browsers clear the origin that is loaded."""
+    driver = ResetDriver("firefox", {"main": [], "popup": []})
+
+    assert DriverPool._reset(driver) is True
+
+    assert driver.commands == [("close", "popup"),
+                               ("clear current origin", "main"),
+                               ("delete cookies", "main"),
+                               ("get", "about:blank")]
@@ -9,7 +9,7 @@ from utils.logger import TestState
 
 
 @pytest.mark.intfail
-def test_intentionally_fail(standard_login, test_case_log, request):
+def test_intentionally_fail(session_login, test_case_log, request):
     """
     This test is intentionally failing for demonstration purposes.
     It is designed to fail when the --intentionally-fail option is not set.
@@ -29,7 +29,7 @@ def test_intentionally_fail(standard_login, test_case_log, request):
                     "It is intentionally failing for demonstration purposes.")
 
     test_case_log.start_step(1, "Login and navigate to Inventory Page")
-    inventory_page = standard_login
+    inventory_page = session_login
     test_case_log.mark_step_finished(1)
 
     test_case_log.start_step(2, "Do something bad!")
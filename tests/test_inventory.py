@@ -6,7 +6,6 @@ adding/removing products from the cart, and verifying cart item counts.
 
 from utils.data_loader import load_csv
 import pytest
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException
 
 products = load_csv("./test_data/products.csv")
@@ -15,8 +14,9 @@ custom_ids = [f"{row['custom_id']}" for row in products]
 
 @pytest.mark.parametrize("product", products, ids=custom_ids)
 @pytest.mark.flaky(reruns=3, reruns_delay=1)
+@pytest.mark.resource_profile("visual")
 @pytest.mark.inventory
-def test_img_click(standard_login, test_case_log, product):
+def test_img_click(session_login, test_case_log, product):
     """Test clicking product images on the inventory page."""
     product_name = product["product_name"]
 
@@ -30,12 +30,12 @@ def test_img_click(standard_login, test_case_log, product):
     test_case_log.set_group("Inventory")
 
     test_case_log.start_step(1, "Login and navigate to Inventory Page")
-    inventory_page = standard_login
+    inventory_page = session_login
     test_case_log.mark_step_finished(1)
 
     test_case_log.start_step(2, "Click on product image")
     try:
-        inventory_page.click_product_img(product_name)
+        inventory_page.click_product_img(product_name).verified()
     except RuntimeError as e:
         raise AssertionError(e)
     test_case_log.mark_step_finished(2)
@@ -43,8 +43,9 @@ def test_img_click(standard_login, test_case_log, product):
 
 @pytest.mark.parametrize("product", products, ids=custom_ids)
 @pytest.mark.flaky(reruns=3, reruns_delay=1)
+@pytest.mark.resource_profile("functional")
 @pytest.mark.inventory
-def test_link_click(standard_login, test_case_log, product):
+def test_link_click(session_login, test_case_log, product):
     """Test clicking product links on the inventory page."""
     product_name = product["product_name"]
 
@@ -58,19 +59,20 @@ def test_link_click(standard_login, test_case_log, product):
     test_case_log.set_group("Inventory")
 
     test_case_log.start_step(1, "Login and navigating to Inventory Page")
-    inventory_page = standard_login
+    inventory_page = session_login
     test_case_log.mark_step_finished(1)
 
     test_case_log.start_step(2, "Click on product title")
     try:
-        inventory_page.click_product_link(product_name)
+        inventory_page.click_product_link(product_name).verified()
     except RuntimeError as e:
         raise AssertionError(e)
     test_case_log.mark_step_finished(2)
 
 
+@pytest.mark.resource_profile("functional")
 @pytest.mark.inventory
-def test_cart_count(standard_login, test_case_log):
+def test_cart_count(session_login, test_case_log):
     """Test adding and removing products from the cart."""
 
     test_case_log.set_description(
@@ -81,10 +83,9 @@ def test_cart_count(standard_login, test_case_log):
     test_case_log.set_group("Inventory")
 
     test_case_log.start_step(1, "Login and navigate to Inventory Page")
-    inventory_page = standard_login
+    inventory_page = session_login
     test_case_log.mark_step_finished(1)
 
-    driver = inventory_page.driver
     expected_cart_count = 0
 
     for i, product in enumerate(products):
@@ -98,16 +99,15 @@ def test_cart_count(standard_login, test_case_log):
         inventory_page.click_add_to_cart(product_name)
 
         try:
-            WebDriverWait(driver, inventory_page.timeout).until(
-                lambda d:
-                inventory_page.get_num_of_items_in_cart() ==
-                expected_cart_count)
+            cart = inventory_page.wait_for_cart_count(expected_cart_count)
         except TimeoutException:
             raise AssertionError(
-                f"Cart item count after adding should be"
+                f"Cart item count after adding should be "
                 f"{expected_cart_count}, "
                 f"but got "
-                f"{inventory_page.get_num_of_items_in_cart()}")
+                f"{inventory_page.get_cart_snapshot()['count']}")
+        assert product_name in cart["in_cart"], (
+            f"{product_name} should show 'Remove' after adding it")
         test_case_log.mark_step_finished(i+2)
 
     for i, product in enumerate(products):
@@ -119,24 +119,45 @@ def test_cart_count(standard_login, test_case_log):
                                  " Expecting cart cound to be"
                                  f" {expected_cart_count}")
         inventory_page.click_remove_from_cart(product_name)
-        if expected_cart_count > 0:
-            try:
-                WebDriverWait(driver, inventory_page.timeout).until(
-                    lambda d:
-                    inventory_page.get_num_of_items_in_cart() ==
-                    expected_cart_count)
-            except TimeoutException:
-                raise AssertionError(
-                    f"Cart item count after removing should be "
-                    f"{expected_cart_count}"
-                    f" , but got "
-                    f"{inventory_page.get_num_of_items_in_cart()}")
-        else:
-            try:
-                inventory_page.wait_for_element_not_visible(
-                    inventory_page.cart_item_count_locator)
-            except TimeoutException:
-                raise AssertionError("Cart count still visible after "
-                                     "removing all items. "
-                                     "Expected it to be invisible.")
+        # A count of 0 means no cart badge is shown
+        try:
+            cart = inventory_page.wait_for_cart_count(expected_cart_count)
+        except TimeoutException:
+            raise AssertionError(
+                f"Cart item count after removing should be "
+                f"{expected_cart_count}"
+                f" , but got "
+                f"{inventory_page.get_cart_snapshot()['count']}")
+        assert product_name not in cart["in_cart"], (
+            f"{product_name} should show 'Add to cart' after removing it")
+        if expected_cart_count == 0:
+            assert not cart["badge_visible"], (
+                "The cart badge should be hidden after removing "
+                "the last product")
         test_case_log.mark_step_finished(i + len(products) + 2)
+
+
+@pytest.mark.cart("Sauce Labs Backpack", "Sauce Labs Onesie")
+@pytest.mark.resource_profile("functional")
+@pytest.mark.inventory
+def test_prefilled_cart(session_login, test_case_log):
+    """Test starting with products that are already in the cart."""
+
+    test_case_log.set_description(
+        "Testing the counter badge of a cart"
+        " that already contains two products"
+    )
+    test_case_log.set_severity("Low")
+    test_case_log.set_owner("QA")
+    test_case_log.set_group("Inventory")
+
+    test_case_log.start_step(1, "Login with prefilled cart"
+                             " and navigate to Inventory Page")
+    inventory_page = session_login
+    test_case_log.mark_step_finished(1)
+
+    test_case_log.start_step(2, "Expecting cart count to be 2")
+    num_of_items = inventory_page.get_num_of_items_in_cart()
+    assert num_of_items == 2, (
+        f"Cart item count should be 2, but got {num_of_items}")
+    test_case_log.mark_step_finished(2)
@@ -3,8 +3,12 @@ This file contains tests for the login functionality of the application.
 It includes tests for successful login, missing username, missing password,
 locked user, and invalid credentials.
 """
+from pages.async_login_page import AsyncLoginPage
 from pages.login_page import LoginPage
+from utils.async_webdriver import AsyncWebDriver
 from utils.data_loader import load_csv
+from utils.driver_factory import DriverFactory
+import asyncio
 import pytest
 from selenium.common.exceptions import TimeoutException
 
@@ -14,7 +18,7 @@ custom_ids = [f"{row['custom_id']}" for row in users]
 
 @pytest.mark.parametrize("user", users, ids=custom_ids)
 @pytest.mark.login
-def test_login(setup_browser, test_case_log, user):
+def test_login(setup_browser, base_url, test_case_log, user):
     """
     Test logging in with various user scenarios.
     This test covers successful login, missing username, missing password,
@@ -33,9 +37,9 @@ def test_login(setup_browser, test_case_log, user):
     test_case_log.set_owner("QA")
     test_case_log.set_group("Login")
 
-    test_case_log.start_step(1, "Navigate to saucedemo.org")
-    driver.get("https://saucedemo.com")
-    login_page = LoginPage(driver)
+    test_case_log.start_step(1, f"Navigate to {base_url}")
+    driver.get(base_url)
+    login_page = LoginPage(driver, base_url)
     test_case_log.mark_step_finished(1)
 
     match expected:
@@ -46,7 +50,7 @@ def test_login(setup_browser, test_case_log, user):
             try:
                 login_page.login_expect_success(
                     username,
-                    password)
+                    password).verified()
                 test_case_log.mark_step_finished(2)
             except TimeoutException:
                 msg = ("Login failed or did not redirect"
@@ -113,3 +117,83 @@ def test_login(setup_browser, test_case_log, user):
 
         case _:
             pytest.fail(f"Unexpected expected value: {expected}")
+
+
+@pytest.mark.login
+def test_login_typing(setup_browser, base_url, test_case_log):
+    """
+    Test logging in by typing the credentials with real keystrokes.
+    The other login tests fill the form with a script.
+    """
+    driver = setup_browser
+
+    test_case_log.set_description(
+        "Testing Login as 'Standard_User' by typing the credentials."
+        " Expecting 'inventory_page' after clicking login button."
+        )
+    test_case_log.set_severity("Medium")
+    test_case_log.set_owner("QA")
+    test_case_log.set_group("Login")
+
+    test_case_log.start_step(1, f"Navigate to {base_url}")
+    driver.get(base_url)
+    login_page = LoginPage(driver, base_url, fill_mode="typing")
+    test_case_log.mark_step_finished(1)
+
+    test_case_log.start_step(2, "Type valid credentials and log in")
+    try:
+        login_page.login_expect_success("standard_user",
+                                        "secret_sauce").verified()
+    except TimeoutException:
+        raise AssertionError("Login failed or did not redirect"
+                             " to inventory page."
+                             f" Current URL: {driver.current_url}")
+    test_case_log.mark_step_finished(2)
+
+
+@pytest.mark.login
+def test_concurrent_logins(async_executor_url, base_url, test_case_log,
+                           request):
+    """
+    Test logging in with several browser sessions at the same time.
+    All sessions are driven by one asyncio event loop.
+    """
+    num_of_sessions = 3
+    browser_name = request.config.getoption("--browser", default="chrome")
+    capabilities = DriverFactory.get_capabilities(browser_name)
+
+    test_case_log.set_description(
+        f"Testing Login as 'Standard_User' in {num_of_sessions}"
+        " concurrent sessions."
+        " Expecting 'inventory_page' in every session."
+        )
+    test_case_log.set_severity("Medium")
+    test_case_log.set_owner("QA")
+    test_case_log.set_group("Login")
+
+    async def login():
+        driver = await AsyncWebDriver.create(async_executor_url,
+                                             capabilities)
+        try:
+            await driver.get(base_url)
+            login_page = AsyncLoginPage(driver, base_url)
+            inventory_page = await login_page.login_expect_success(
+                "standard_user", "secret_sauce")
+            await inventory_page.verified()
+        finally:
+            await driver.quit()
+
+    async def login_concurrently():
+        return await asyncio.gather(
+            *(login() for _ in range(num_of_sessions)),
+            return_exceptions=True)
+
+    test_case_log.start_step(
+        1,
+        f"Log in with valid credentials in {num_of_sessions} sessions")
+    results = asyncio.run(login_concurrently())
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert not errors, (
+        f"Login failed in {len(errors)} of {num_of_sessions} sessions: "
+        f"{errors}")
+    test_case_log.mark_step_finished(1)
@@ -0,0 +1,38 @@
+"""
+This file contains tests for the recording of the page objects
+each test uses.
+"""
+
+from pages.inventory_page import InventoryPage
+from pages.login_page import LoginPage
+from utils.page_usage import PageUsageRecorder
+
+TEST_ID = "tests/test_inventory.py::test_cart_count"
+
+
+def test_page_modules_are_recorded_per_test(monkeypatch):
+    """
+    Test that the modules of a page class and its base pages
+    are recorded for the running test, once each.
+    """
+    recorder = PageUsageRecorder()
+    monkeypatch.setenv("PYTEST_CURRENT_TEST", f"{TEST_ID} (call)")
+
+    recorder.record(InventoryPage)
+    recorder.record(LoginPage)
+    recorder.record(InventoryPage)
+
+    assert recorder.pop(TEST_ID) == ["pages/base_page.py",
+                                     "pages/inventory_page.py",
+                                     "pages/login_page.py"]
+    assert recorder.pop(TEST_ID) == []
+
+
+def test_pages_outside_tests_are_not_recorded(monkeypatch):
+    """Test that page objects created outside a test are ignored."""
+    recorder = PageUsageRecorder()
+    monkeypatch.delenv("PYTEST_CURRENT_TEST", raising=False)
+
+    recorder.record(InventoryPage)
+
+    assert recorder.pages == {}
@@ -0,0 +1,49 @@
+"""
+This file contains tests for the reports of parallel runs.
+They run a small suite with pytest-xdist in a separate pytest process
+and check its HTML report. No browser is needed.
+"""
+
+import html
+import json
+import os
+import re
+import subprocess
+import sys
+import pytest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOGGED_TESTS = """
+def test_logged_first(test_case_log):
+    test_case_log.set_description("First test logged by a worker")
+
+
+def test_logged_second(test_case_log):
+    test_case_log.set_description("Second test logged by a worker")
+"""
+
+
+def test_log_extras_in_parallel_report(tmp_path):
+    """
+    Test that the test case logs of xdist workers are in the HTML report.
+    """
+    pytest.importorskip("xdist")
+    (tmp_path / "test_logged.py").write_text(LOGGED_TESTS)
+    env = dict(os.environ, PYTHONPATH=ROOT_PATH)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-p", "conftest", "-n", "2",
+         "--html=report.html", "--no-history", "test_logged.py"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    report = (tmp_path / "report.html").read_text(encoding="utf-8")
+    blob = re.search(r'data-jsonblob="([^"]*)"', report).group(1)
+    tests = json.loads(html.unescape(blob))["tests"]
+    for test_name, description in (
+            ("test_logged_first", "First test logged by a worker"),
+            ("test_logged_second", "Second test logged by a worker")):
+        extras = tests[f"test_logged.py::{test_name}"][0]["extras"]
+        assert any(description in extra["content"] for extra in extras), \
+            f"The log of {test_name} is missing in the report"
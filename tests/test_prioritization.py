@@ -0,0 +1,130 @@
+"""
+This file contains tests for the failure-first order of the tests.
+The order is computed from a temporary run history.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from utils import prioritization
+from utils.prioritization import _add_importing_pages, failure_first_order
+from utils.run_history import RunHistory
+
+STARTED_AT = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def history(tmp_path):
+    """Provide an empty run history."""
+    history = RunHistory(str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+
+def add_run(history, number, outcomes, git_commit=None, pages=()):
+    """
+    Add a run with the outcomes of its tests ({test_id: outcome}).
+    "flaky" is a test that passed on a rerun.
+    """
+    history.add_run(
+        f"run-{number}", STARTED_AT + timedelta(minutes=number),
+        [{"test_id": test_id,
+          "outcome": "passed" if outcome == "flaky" else outcome,
+          "duration": 1.0, "reruns": 1 if outcome == "flaky" else 0,
+          "worker": None, "steps": [], "pages": list(pages)}
+         for test_id, outcome in outcomes.items()],
+        git_commit=git_commit)
+
+
+def test_failed_tests_first_then_flaky_tests(history, monkeypatch):
+    """
+    Test that recently failed tests come first, the latest failure first,
+    then the flaky tests. Tests that are not collected are left out.
+    """
+    monkeypatch.setattr(prioritization, "get_changed_pages",
+                        lambda commit: set())
+    add_run(history, 1, {"old_failure": "failed", "flaky": "passed"})
+    add_run(history, 2, {"new_failure": "error", "flaky": "flaky",
+                         "not_collected": "failed", "stable": "passed"})
+
+    keys, counts = failure_first_order(
+        ["stable", "flaky", "old_failure", "new_failure", "unknown"],
+        history)
+
+    assert sorted(keys, key=keys.get) == \
+        ["new_failure", "old_failure", "flaky"]
+    assert counts == {"recently failed": 2, "flaky": 1,
+                      "using changed pages": 0}
+
+
+def test_tests_using_changed_pages_come_next(history, monkeypatch):
+    """
+    Test that the tests using a page that changed since the last green
+    commit come after the failed tests.
+    """
+    changed_since = []
+    monkeypatch.setattr(
+        prioritization, "get_changed_pages",
+        lambda commit: changed_since.append(commit) or {"pages/cart.py"})
+    add_run(history, 1, {"cart": "passed"}, "green", ["pages/cart.py"])
+    add_run(history, 2, {"login": "passed"}, "green", ["pages/login.py"])
+    add_run(history, 3, {"cart": "failed"}, "red", ["pages/cart.py"])
+    add_run(history, 4, {"checkout": "passed"}, "red", ["pages/cart.py"])
+
+    keys, counts = failure_first_order(["login", "checkout", "cart"],
+                                       history)
+
+    assert changed_since == ["green"]
+    assert sorted(keys, key=keys.get) == ["cart", "checkout"]
+    assert counts == {"recently failed": 1, "flaky": 0,
+                      "using changed pages": 1}
+
+
+def test_commit_is_only_green_if_all_its_shards_passed(history):
+    """
+    Test that a passing shard of a failing run at the same commit
+    does not make the commit green.
+    """
+    add_run(history, 1, {"a": "passed", "b": "passed"}, "old")
+    add_run(history, 2, {"a": "passed"}, "new")
+    add_run(history, 3, {"b": "failed"}, "new")
+    add_run(history, 4, {"c": "passed"}, "newest")
+    add_run(history, 5, {"d": "error"}, "newest")
+
+    assert history.last_green_commit() == "old"
+
+
+def test_recent_failures_count_the_shards_as_one_run(history):
+    """
+    Test that the recent runs of the failure-first order are runs
+    of all shards, not single shards.
+    """
+    add_run(history, 1, {"a": "failed"}, "old")
+    add_run(history, 2, {"b": "failed"}, "new")
+    add_run(history, 3, {"c": "failed"}, "new")
+
+    failures = [row["test_id"] for row in history.recent_failures(runs=1)]
+
+    assert sorted(failures) == ["b", "c"]
+
+
+def test_pages_that_import_changed_pages_are_affected(tmp_path,
+                                                      monkeypatch):
+    """
+    Test that pages importing a changed page, also through other
+    pages, count as changed.
+    """
+    pages_path = tmp_path / "pages"
+    pages_path.mkdir()
+    (pages_path / "base_page.py").write_text("import os\n")
+    (pages_path / "inventory_page.py").write_text(
+        "from pages.base_page import BasePage\n")
+    (pages_path / "cart_page.py").write_text(
+        "import pages.inventory_page\n")
+    (pages_path / "login_page.py").write_text(
+        "from utils.logger import Logger\n")
+    monkeypatch.chdir(tmp_path)
+
+    affected = _add_importing_pages({"pages/base_page.py"})
+
+    assert affected == {"pages/base_page.py", "pages/inventory_page.py",
+                        "pages/cart_page.py"}
@@ -0,0 +1,90 @@
+"""
+This file contains tests for the run history.
+The recording tests run a small suite in a separate pytest process.
+No browser is needed.
+"""
+
+from datetime import datetime, timedelta
+import os
+import sqlite3
+import subprocess
+import sys
+import pytest
+from utils.run_history import RunHistory
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLAIN_TESTS = """
+def test_plain():
+    pass
+"""
+
+
+def run_suite(tmp_path, *args):
+    """Run the plain test suite with the conftest of this repo."""
+    (tmp_path / "test_plain.py").write_text(PLAIN_TESTS)
+    env = dict(os.environ, PYTHONPATH=ROOT_PATH)
+    return subprocess.run(
+        [sys.executable, "-m", "pytest", "-p", "conftest",
+         "--history-db=history.db", *args],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+
+def recorded_runs(tmp_path):
+    """Returns the number of runs in the run history."""
+    db_path = tmp_path / "history.db"
+    if not db_path.exists():
+        return 0
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_run_is_recorded(tmp_path):
+    """Test that a run with tests is added to the run history."""
+    result = run_suite(tmp_path, "test_plain.py")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    assert recorded_runs(tmp_path) == 1
+
+
+@pytest.mark.parametrize("args", [
+    ["--collect-only", "test_plain.py"],
+    ["-k", "no_such_test", "test_plain.py"],
+])
+def test_runs_without_tests_are_not_recorded(tmp_path, args):
+    """
+    Test that collect-only runs and runs without tests
+    are not added to the run history.
+    """
+    run_suite(tmp_path, *args)
+
+    assert recorded_runs(tmp_path) == 0
+
+
+def test_median_durations_of_one_browser(tmp_path):
+    """
+    Test that the durations of a browser only come from its runs.
+    """
+    history = RunHistory(str(tmp_path / "history.db"))
+    started_at = datetime(2026, 1, 1)
+    try:
+        for number, (browser, duration) in enumerate(
+                [("chrome", 1.0), ("firefox", 5.0), ("chrome", 3.0)]):
+            history.add_run(f"run-{number}",
+                            started_at + timedelta(minutes=number),
+                            [{"test_id": "test_a.py::test_a",
+                              "outcome": "passed", "duration": duration,
+                              "reruns": 0, "worker": None,
+                              "steps": [], "pages": []}],
+                            browser=browser)
+
+        assert history.median_durations(browser="chrome") == \
+            {"test_a.py::test_a": 1.0}
+        assert history.median_durations(browser="firefox") == \
+            {"test_a.py::test_a": 5.0}
+        assert history.median_durations() == {"test_a.py::test_a": 3.0}
+    finally:
+        history.close()
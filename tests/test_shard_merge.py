@@ -0,0 +1,117 @@
+"""
+This file contains tests for merging the reports of the shards.
+The shard reports are generated by small pytest-html runs
+in a separate pytest process. No browser is needed.
+"""
+
+import html
+import json
+import re
+import subprocess
+import sys
+import pytest
+from utils.shard_merge import merge_html_reports
+
+pytest.importorskip("pytest_html")
+
+SHARD_TESTS = {
+    "shard1": """
+def test_first():
+    pass
+""",
+    "shard2": """
+import pytest
+
+
+def test_second():
+    pass
+
+
+def test_broken():
+    assert False
+
+
+@pytest.mark.skip(reason="not in this run")
+def test_skipped():
+    pass
+""",
+}
+
+
+def generate_report(shard_dir, tests):
+    """Run the tests with pytest-html and return the report path."""
+    shard_dir.mkdir()
+    (shard_dir / "test_shard.py").write_text(tests)
+    subprocess.run(
+        [sys.executable, "-m", "pytest", "-p", "no:cacheprovider",
+         "--html=report.html", "test_shard.py"],
+        cwd=shard_dir, capture_output=True, timeout=120)
+    return shard_dir / "report.html"
+
+
+def outcome_counts(report):
+    """Returns the counts of the outcomes in the summary of a report."""
+    return {result: int(count) for result, count in re.findall(
+        r'data-test-result="(\w+)"[^>]*>\s*<span class="\1">(\d+)', report)}
+
+
+def disabled_filters(report):
+    """Returns the outcomes whose filter checkbox is disabled."""
+    return set(re.findall(r'data-test-result="(\w+)"[^>]*\bdisabled\b',
+                          report))
+
+
+@pytest.fixture
+def shard_reports(tmp_path):
+    """Provide the pytest-html reports of two shards."""
+    return [generate_report(tmp_path / name, tests)
+            for name, tests in SHARD_TESTS.items()]
+
+
+@pytest.mark.parametrize("closing_tag", ["/>", ">"])
+def test_merged_report_counts_the_tests_of_all_shards(tmp_path,
+                                                      shard_reports,
+                                                      closing_tag):
+    """
+    Test that the merged report has the tests and outcome counts
+    of all shards, with the checkboxes of pytest-html 4.1 ("/>")
+    and 4.2 (">").
+    """
+    for report_file in shard_reports:
+        report = report_file.read_text(encoding="utf-8")
+        report = re.sub(r'(data-test-result="\w+"[^>]*?)\s*/?>',
+                        lambda match: match.group(1) + closing_tag, report)
+        report_file.write_text(report, encoding="utf-8")
+    merged_file = tmp_path / "merged.html"
+
+    merge_html_reports([str(file) for file in shard_reports],
+                       str(merged_file))
+
+    merged = merged_file.read_text(encoding="utf-8")
+    counts = outcome_counts(merged)
+    assert counts["passed"] == 2
+    assert counts["failed"] == 1
+    assert counts["skipped"] == 1
+    assert counts["error"] == 0
+    assert disabled_filters(merged) == {"xfailed", "xpassed", "error",
+                                        "rerun"}
+    assert '<p class="run-count">3 tests in 2 shards.</p>' in merged
+    blob = re.search(r'data-jsonblob="([^"]*)"', merged).group(1)
+    assert {test_id.split("::")[1] for test_id in
+            json.loads(html.unescape(blob))["tests"]} == \
+        {"test_first", "test_second", "test_broken", "test_skipped"}
+
+
+def test_unknown_report_layout_raises(tmp_path, shard_reports):
+    """
+    Test that the merge fails if it can't find the outcome counts,
+    instead of keeping the counts of the first shard.
+    """
+    report = shard_reports[0].read_text(encoding="utf-8")
+    shard_reports[0].write_text(
+        report.replace('<span class="passed">', '<span class="ok">'),
+        encoding="utf-8")
+
+    with pytest.raises(ValueError, match="outcome counts"):
+        merge_html_reports([str(file) for file in shard_reports],
+                           str(tmp_path / "merged.html"))
@@ -0,0 +1,62 @@
+"""
+This file contains tests for the split of the tests into shards.
+"""
+
+import pytest
+from utils.sharding import DEFAULT_DURATION, assign_shards, parse_shard
+
+
+def test_longest_tests_are_spread_over_the_shards():
+    """
+    Test that each test goes to the shard with the least work,
+    longest test first, so the shards finish at about the same time.
+    """
+    durations = {"a": 8.0, "b": 7.0, "c": 6.0, "d": 5.0, "e": 4.0}
+
+    shards, estimates = assign_shards(list(durations), durations, 2)
+
+    assert shards == [["a", "d", "e"], ["b", "c"]]
+    assert estimates == [17.0, 13.0]
+
+
+def test_ties_are_assigned_in_the_same_order():
+    """
+    Test that equally long tests are assigned by their id, so every
+    machine computes the same shards whatever the collection order.
+    """
+    durations = {"b": 1.0, "a": 1.0, "d": 1.0, "c": 1.0}
+
+    shards, _ = assign_shards(["d", "c", "b", "a"], durations, 2)
+
+    assert shards == [["a", "c"], ["b", "d"]]
+    assert assign_shards(["a", "b", "c", "d"], durations, 2)[0] == shards
+
+
+def test_unknown_tests_are_estimated_with_the_median():
+    """Test that tests without history count as the median test."""
+    durations = {"a": 1.0, "b": 3.0, "c": 20.0}
+
+    _, estimates = assign_shards(["a", "b", "c", "new"], durations, 1)
+
+    assert estimates == [1.0 + 3.0 + 20.0 + 3.0]
+
+
+def test_tests_without_any_history_use_the_default_duration():
+    """Test that the tests are spread evenly without history."""
+    shards, estimates = assign_shards(["a", "b", "c"], {}, 3)
+
+    assert sorted(len(shard) for shard in shards) == [1, 1, 1]
+    assert estimates == [DEFAULT_DURATION] * 3
+
+
+def test_parse_shard():
+    """Test that "i/n" is parsed into the shard index and count."""
+    assert parse_shard("2/4") == (2, 4)
+
+
+@pytest.mark.parametrize("value", ["", "1", "a/b", "1/2/3", "0/4", "5/4",
+                                   "1/0", "-1/4"])
+def test_parse_shard_rejects_invalid_shards(value):
+    """Test that invalid shard options are rejected."""
+    with pytest.raises(ValueError, match="Invalid shard"):
+        parse_shard(value)
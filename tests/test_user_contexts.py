@@ -0,0 +1,164 @@
+"""
+This file contains tests for the user context mode,
+which runs several tests in one shared browser.
+The contexts attach to a fake WebDriver BiDi endpoint that answers
+the commands of the user contexts, so no browser is needed.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import socket
+import threading
+import time
+import pytest
+from selenium.common.exceptions import JavascriptException
+from wsproto import ConnectionType, WSConnection
+from wsproto.events import (AcceptConnection, CloseConnection, Ping, Request,
+                            TextMessage)
+from utils.user_contexts import UserContextBrowser
+
+# Resolves with the page time when the script started and ended
+TIMED_WAIT_SCRIPT = """
+    const [waitTime, done] = arguments;
+    const started = Date.now();
+    setTimeout(() => done([started, Date.now()]), waitTime);
+"""
+
+
+class FakeBidiServer:
+    """
+    Minimal WebDriver BiDi endpoint for one client.
+    Answers script.callFunction with the times it received and answered
+    the command, after `script_time` seconds and without holding back
+    the other commands. Scripts that contain "throw" fail.
+    """
+    def __init__(self, script_time=0.5):
+        self.script_time = script_time
+        self.command_ids = []
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.url = f"ws://127.0.0.1:{self._server.getsockname()[1]}/session"
+        self._send_lock = threading.Lock()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def close(self):
+        self._server.close()
+
+    def _serve(self):
+        self._socket, _ = self._server.accept()
+        self._ws = WSConnection(ConnectionType.SERVER)
+        message = ""
+        while data := self._socket.recv(65536):
+            self._ws.receive_data(data)
+            for event in self._ws.events():
+                if isinstance(event, Request):
+                    self._send(AcceptConnection())
+                elif isinstance(event, (Ping, CloseConnection)):
+                    self._send(event.response())
+                elif isinstance(event, TextMessage):
+                    message += event.data
+                    if event.message_finished:
+                        self._handle(json.loads(message))
+                        message = ""
+
+    def _send(self, event):
+        with self._send_lock:
+            self._socket.sendall(self._ws.send(event))
+
+    def _reply(self, command_id, result):
+        self._send(TextMessage(json.dumps(
+            {"type": "success", "id": command_id, "result": result})))
+
+    def _handle(self, command):
+        command_id, method = command["id"], command["method"]
+        self.command_ids.append(command_id)
+        if method == "script.callFunction":
+            threading.Timer(self.script_time, self._answer_script,
+                            (command, time.time() * 1000)).start()
+            return
+        self._reply(command_id, {
+            "browser.createUserContext": {"userContext": f"user-{command_id}"},
+            "browsingContext.create": {"context": f"tab-{command_id}"},
+            "browser.getUserContexts": {"userContexts": [
+                {"userContext": "default"}]},
+        }.get(method, {}))
+
+    def _answer_script(self, command, received):
+        if "throw" in command["params"]["functionDeclaration"]:
+            self._reply(command["id"], {
+                "type": "exception", "realm": "realm",
+                "exceptionDetails": {"text": "Error: script failed"}})
+            return
+        self._reply(command["id"], {
+            "type": "success", "realm": "realm",
+            "result": {"type": "array", "value": [
+                {"type": "number", "value": received},
+                {"type": "number", "value": time.time() * 1000}]}})
+
+
+@pytest.fixture
+def fake_browser(tmp_path):
+    """Provide a UserContextBrowser attached to a fake BiDi endpoint."""
+    server = FakeBidiServer()
+    browser = UserContextBrowser.attach({
+        "executor_url": "http://127.0.0.1:9",
+        "session_id": "fake-session",
+        "capabilities": {"browserName": "chrome",
+                         "webSocketUrl": server.url},
+        "lock_file": str(tmp_path / "contexts.lock")})
+    browser.server = server
+    yield browser
+    browser.quit()
+    server.close()
+
+
+def test_contexts_wait_at_the_same_time(fake_browser):
+    """
+    Test that the waits of two user contexts run at the same time
+    in the shared browser, instead of one after the other.
+    """
+    drivers = [fake_browser.new_context() for _ in range(2)]
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            spans = list(executor.map(
+                lambda driver: driver.execute_async_script(
+                    TIMED_WAIT_SCRIPT, 500),
+                drivers))
+    finally:
+        for driver in drivers:
+            driver.quit()
+
+    latest_start = max(started for started, _ in spans)
+    earliest_end = min(ended for _, ended in spans)
+    assert latest_start < earliest_end, \
+        f"The contexts waited one after the other: {spans}"
+
+
+def test_selenium_commands_share_the_command_ids(fake_browser):
+    """
+    Test that BiDi commands of Selenium's modules, sent while the
+    contexts wait, don't reuse the id of a command in flight.
+    """
+    driver = fake_browser.new_context()
+    try:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            waits = [executor.submit(driver.execute_async_script,
+                                     TIMED_WAIT_SCRIPT, 500)
+                     for _ in range(2)]
+            fake_browser.driver.browser.get_user_contexts()
+            for wait in waits:
+                wait.result()
+    finally:
+        driver.quit()
+
+    ids = fake_browser.server.command_ids
+    assert len(ids) == len(set(ids)), f"Command ids were reused: {ids}"
+
+
+def test_script_errors_raise_javascript_exception(fake_browser):
+    """Test that a failing script raises like a classic script does."""
+    driver = fake_browser.new_context()
+    try:
+        with pytest.raises(JavascriptException, match="script failed"):
+            driver.execute_script("throw new Error('script failed');")
+    finally:
+        driver.quit()
@@ -0,0 +1,170 @@
+"""
+This module provides a content-addressed store for report artifacts,
+such as screenshots and stack traces. Every artifact is saved once under
+the SHA-256 hash of its content, so identical artifacts of different
+tests, reruns and workers share one file. The reports only reference the
+artifacts, the browser loads them when a test is expanded.
+For archiving, a report can be packed into a single file that contains
+every referenced artifact once.
+"""
+
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+# Resolves the artifact references of a packed report when they are shown
+_PACKED_REPORT_SCRIPT = """
+(() => {
+    const artifacts = JSON.parse(
+        document.getElementById("packed-artifacts").textContent);
+    const urls = {};
+    const resolve = (element, attribute) => {
+        const url = element.getAttribute(attribute);
+        const artifact = artifacts[url];
+        if (!artifact) {
+            return;
+        }
+        if (!urls[url]) {
+            const bytes = Uint8Array.from(atob(artifact.data),
+                                          (c) => c.charCodeAt(0));
+            urls[url] = URL.createObjectURL(
+                new Blob([bytes], {type: artifact.type}));
+        }
+        element.setAttribute(attribute, urls[url]);
+    };
+    const resolveAll = (root) => {
+        root.querySelectorAll("img[src], iframe[src], source[src]")
+            .forEach((element) => resolve(element, "src"));
+        root.querySelectorAll("a[href]")
+            .forEach((element) => resolve(element, "href"));
+    };
+    new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            if (mutation.type === "attributes") {
+                resolve(mutation.target, mutation.attributeName);
+            } else {
+                mutation.addedNodes.forEach((node) => {
+                    if (node.nodeType === Node.ELEMENT_NODE) {
+                        resolve(node, node.hasAttribute("href")
+                                ? "href" : "src");
+                        resolveAll(node);
+                    }
+                });
+            }
+        }
+    }).observe(document.body, {subtree: true, childList: true,
+                               attributes: true,
+                               attributeFilter: ["src", "href"]});
+    resolveAll(document);
+})();
+"""
+
+
+class ArtifactStore:
+    """
+    Save artifacts under the hash of their content.
+    `url_prefix` is the path of the store relative to the reports.
+    Artifacts are written to a temporary file and renamed, so a stored
+    artifact is always complete, even if a writer fails or dies.
+    """
+    def __init__(self, root, url_prefix):
+        self.root = root
+        self.url_prefix = url_prefix
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def put(self, content, extension):
+        """
+        Save an artifact and return its URL.
+        An artifact that is already stored is not written again.
+        """
+        url, file_path = self.reserve(content, extension)
+        if file_path:
+            data = content.encode("utf-8") if isinstance(content, str) \
+                else content
+            try:
+                write_atomic(file_path, data)
+            finally:
+                self.release(file_path)
+        return url
+
+    def reserve(self, content, extension):
+        """
+        Returns the URL of an artifact and the path to write it to.
+        The path is None if the artifact is already stored,
+        e.g. by another test, rerun or worker, or is being written
+        by this process. Call `release` with the path when the write
+        is done or failed.
+        """
+        data = content.encode("utf-8") if isinstance(content, str) \
+            else content
+        key = hashlib.sha256(data).hexdigest()
+        url = f"{self.url_prefix}/{key[:2]}/{key}{extension}"
+        file_path = os.path.join(self.root, key[:2], f"{key}{extension}")
+        with self._lock:
+            if file_path in self._pending or os.path.exists(file_path):
+                return url, None
+            self._pending.add(file_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        return url, file_path
+
+    def release(self, file_path):
+        """
+        End the reservation of an artifact. If it was not written,
+        the next `reserve` of the artifact returns the path again.
+        """
+        with self._lock:
+            self._pending.discard(file_path)
+
+
+def write_atomic(file_path, data):
+    """
+    Write a file, so that readers only ever see its complete content.
+    """
+    temporary_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, file_path)
+
+
+def pack_html_report(report_file, packed_file, url_prefix):
+    """
+    Write a copy of an HTML report that contains all artifacts it
+    references, each only once. The artifacts are decoded when the
+    browser shows them. Returns the number of packed artifacts.
+    """
+    with open(report_file, encoding="utf-8") as file:
+        report = file.read()
+
+    report_dir = os.path.dirname(report_file)
+    pattern = re.compile(
+        rf"{re.escape(url_prefix)}/[0-9a-f]{{2}}/[0-9a-f]{{64}}\.\w+")
+    artifacts = {}
+    for url in sorted(set(pattern.findall(report))):
+        file_path = os.path.join(report_dir, *url.split("/"))
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path, "rb") as file:
+            data = base64.b64encode(file.read()).decode("ascii")
+        mime_type = mimetypes.guess_type(file_path)[0] \
+            or "application/octet-stream"
+        if mime_type.startswith("text/"):
+            mime_type += ";charset=utf-8"
+        artifacts[url] = {"type": mime_type, "data": data}
+
+    payload = json.dumps(artifacts).replace("</", "<\\/")
+    scripts = (f'<script type="application/json" id="packed-artifacts">'
+               f'{payload}</script>\n'
+               f'<script>{_PACKED_REPORT_SCRIPT}</script>\n')
+    position = report.rfind("</body>")
+    if position == -1:
+        position = len(report)
+    with open(packed_file, "w", encoding="utf-8") as file:
+        file.write(report[:position])
+        file.write(scripts)
+        file.write(report[position:])
+    return len(artifacts)
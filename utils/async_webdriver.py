@@ -0,0 +1,271 @@
+"""
+This module provides a minimal asyncio-native WebDriver client.
+It speaks the W3C WebDriver protocol over asyncio streams, so a single
+event loop can drive many browser sessions at once without a thread
+per browser. Errors are raised as the usual Selenium exceptions.
+"""
+
+import asyncio
+import json
+import pkgutil
+from urllib.parse import urlparse
+import h11
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+from selenium.webdriver.remote.locator_converter import LocatorConverter
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f713ede40ed"
+
+_IS_DISPLAYED_JS = pkgutil.get_data(
+    "selenium", "webdriver/remote/isDisplayed.js").decode("utf8")
+
+
+class _HttpConnection:
+    """
+    Keep-alive HTTP/1.1 connection to a WebDriver server.
+    Requests on one connection are sent one after another.
+    A request fails with a TimeoutException if the server doesn't
+    answer within `timeout` seconds, so a hung driver can't block
+    the event loop forever.
+    """
+    def __init__(self, executor_url, timeout=120):
+        url = urlparse(executor_url)
+        self.timeout = timeout
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.netloc = url.netloc
+        self.base_path = url.path.rstrip("/")
+
+        self._reader = None
+        self._writer = None
+        self._connection = None
+        self._lock = asyncio.Lock()
+
+    async def request(self, method, path, payload=None):
+        """
+        Send a request and return the status code and the parsed body.
+        """
+        body = b"" if payload is None else json.dumps(payload).encode()
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._open()
+                return await self._send(method, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError,
+                    h11.ProtocolError):
+                await self.close()
+                raise
+            except asyncio.TimeoutError:
+                # The response would arrive as the answer to the next request
+                await self.close()
+                raise TimeoutException(
+                    f"No response to {method} {path} "
+                    f"after {self.timeout}s") from None
+
+    async def close(self):
+        """Close the underlying socket."""
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        self._reader = None
+        self._writer = None
+        self._connection = None
+
+    async def _open(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+        self._connection = h11.Connection(h11.CLIENT)
+
+    async def _send(self, method, path, body):
+        connection = self._connection
+        headers = [
+            ("Host", self.netloc),
+            ("Accept", "application/json"),
+            ("Content-Type", "application/json;charset=UTF-8"),
+            ("Content-Length", str(len(body))),
+        ]
+        data = connection.send(h11.Request(method=method,
+                                           target=self.base_path + path,
+                                           headers=headers))
+        if body:
+            data += connection.send(h11.Data(data=body))
+        data += connection.send(h11.EndOfMessage())
+        self._writer.write(data)
+        await asyncio.wait_for(self._writer.drain(), self.timeout)
+
+        status = None
+        chunks = []
+        while True:
+            event = connection.next_event()
+            if event is h11.NEED_DATA:
+                connection.receive_data(await asyncio.wait_for(
+                    self._reader.read(65536), self.timeout))
+            elif isinstance(event, h11.Response):
+                status = event.status_code
+            elif isinstance(event, h11.Data):
+                chunks.append(event.data)
+            elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                break
+
+        if connection.our_state is h11.DONE and \
+                connection.their_state is h11.DONE:
+            connection.start_next_cycle()
+        else:
+            await self.close()
+        return status, b"".join(chunks).decode("utf-8")
+
+
+class AsyncWebDriver:
+    """
+    Asynchronous WebDriver session.
+    Offers the subset of the Selenium WebDriver API the page objects use,
+    with every command being awaitable.
+    """
+    def __init__(self, connection, session_id, capabilities):
+        self._connection = connection
+        self.session_id = session_id
+        self.caps = capabilities
+        self.error_handler = ErrorHandler()
+        self.locator_converter = LocatorConverter()
+
+    @classmethod
+    async def create(cls, executor_url, capabilities, timeout=120):
+        """
+        Start a new session on a WebDriver server (driver service or grid).
+        Commands fail with a TimeoutException if the server doesn't answer
+        within `timeout` seconds.
+        """
+        connection = _HttpConnection(executor_url, timeout)
+        payload = {"capabilities": {"firstMatch": [{}],
+                                    "alwaysMatch": capabilities}}
+        value = await cls._request(connection, ErrorHandler(),
+                                   "POST", "/session", payload)
+        return cls(connection, value["sessionId"], value["capabilities"])
+
+    async def execute(self, method, path, payload=None):
+        """
+        Send a command for this session and return the unwrapped value.
+        """
+        value = await self._request(self._connection,
+                                    self.error_handler,
+                                    method,
+                                    f"/session/{self.session_id}{path}",
+                                    payload)
+        return self._unwrap(value)
+
+    async def quit(self):
+        """End the session and close the connection."""
+        try:
+            await self.execute("DELETE", "")
+        finally:
+            await self._connection.close()
+
+    async def get(self, url):
+        """Navigate to the given URL."""
+        await self.execute("POST", "/url", {"url": url})
+
+    async def current_url(self):
+        """Returns the URL of the current page."""
+        return await self.execute("GET", "/url")
+
+    async def title(self):
+        """Returns the title of the current page."""
+        return await self.execute("GET", "/title")
+
+    async def execute_script(self, script, *args):
+        """Execute JavaScript synchronously in the current page."""
+        return await self.execute("POST", "/execute/sync",
+                                  {"script": script,
+                                   "args": self._wrap(list(args))})
+
+    async def execute_async_script(self, script, *args):
+        """Execute JavaScript asynchronously in the current page."""
+        return await self.execute("POST", "/execute/async",
+                                  {"script": script,
+                                   "args": self._wrap(list(args))})
+
+    async def find_element(self, by, value):
+        """Find the first element matching the locator."""
+        by, value = self.locator_converter.convert(by, value)
+        return await self.execute("POST", "/element",
+                                  {"using": by, "value": value})
+
+    async def find_elements(self, by, value):
+        """Find all elements matching the locator."""
+        by, value = self.locator_converter.convert(by, value)
+        return await self.execute("POST", "/elements",
+                                  {"using": by, "value": value})
+
+    @staticmethod
+    async def _request(connection, error_handler, method, path, payload):
+        status, body = await connection.request(method, path, payload)
+        if status >= 400:
+            error_handler.check_response({"status": status, "value": body})
+        return json.loads(body)["value"]
+
+    def _wrap(self, value):
+        if isinstance(value, AsyncWebElement):
+            return {ELEMENT_KEY: value.id}
+        if isinstance(value, (list, tuple)):
+            return [self._wrap(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self._wrap(v) for k, v in value.items()}
+        return value
+
+    def _unwrap(self, value):
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncWebElement(self, value[ELEMENT_KEY])
+            return {k: self._unwrap(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._unwrap(v) for v in value]
+        return value
+
+
+class AsyncWebElement:
+    """Element of an AsyncWebDriver session."""
+    def __init__(self, parent, element_id):
+        self.parent = parent
+        self.id = element_id
+
+    async def _execute(self, method, path, payload=None):
+        return await self.parent.execute(method,
+                                         f"/element/{self.id}{path}",
+                                         payload)
+
+    async def click(self):
+        """Click the element."""
+        await self._execute("POST", "/click", {})
+
+    async def send_keys(self, text):
+        """Type text into the element."""
+        await self._execute("POST", "/value",
+                            {"text": text, "value": list(text)})
+
+    async def text(self):
+        """Returns the visible text of the element."""
+        return await self._execute("GET", "/text")
+
+    async def is_enabled(self):
+        """Checks if the element is enabled."""
+        return await self._execute("GET", "/enabled")
+
+    async def is_displayed(self):
+        """Checks if the element is visible to a user."""
+        return await self.parent.execute_script(
+            f"return ({_IS_DISPLAYED_JS}).apply(null, arguments);", self)
+
+    async def find_element(self, by, value):
+        """Find the first child element matching the locator."""
+        by, value = self.parent.locator_converter.convert(by, value)
+        return await self._execute("POST", "/element",
+                                   {"using": by, "value": value})
+
+    async def find_elements(self, by, value):
+        """Find all child elements matching the locator."""
+        by, value = self.parent.locator_converter.convert(by, value)
+        return await self._execute("POST", "/elements",
+                                   {"using": by, "value": value})
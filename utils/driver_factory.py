@@ -4,27 +4,206 @@ instances for different browsers.
 It supports both local and remote WebDriver instances."
 """
 
+from pages.page_scripts import NETWORK_TRACKER_SCRIPT
 from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.common.driver_finder import DriverFinder
+from utils.resource_profiles import get_resource_profile
+from utils.startup_metrics import DriverPathCache, StartupRecorder
+import os
 
 
 class DriverFactory:
     """
     Factory class to create WebDriver instances for different browsers.
     It supports both local and remote WebDriver instances.
+    The startup of every session is measured by the startup recorder.
+    Resolved driver and browser binaries are kept in a persistent cache.
     """
+    GRID_URL = "http://localhost:4444/wd/hub"
+    startup_recorder = StartupRecorder()
+    path_cache = DriverPathCache(os.path.join(".cache", "driver_paths.json"))
 
     @staticmethod
-    def create_driver(browser_name, remote):
+    def create_driver(browser_name, remote, enable_bidi=False,
+                      resource_profile="visual", page_load_strategy="normal",
+                      network_tracker=False):
         """
         Create a WebDriver instance for the specified browser.
         If remote is True, it creates a remote WebDriver instance.
+        If enable_bidi is True, the session supports WebDriver BiDi.
+        The resource profile decides which resources the browser blocks.
+        The page load strategy (normal, eager, none) decides
+        how long navigation commands block.
+        If network_tracker is True, every new document counts its requests
+        from the start, for the network-idle readiness of the page objects.
+        """
+        option_args = (browser_name, enable_bidi, resource_profile,
+                       page_load_strategy)
+        options = DriverFactory._create_session_options(*option_args)
+
+        with DriverFactory.startup_recorder.measure(browser_name,
+                                                    remote) as startup:
+            if remote:
+                driver = DriverFactory._create_remote_driver(options,
+                                                             startup)
+            else:
+                try:
+                    driver = DriverFactory._create_local_driver(
+                        options, browser_name, startup)
+                except SessionNotCreatedException:
+                    if not startup.cached:
+                        raise
+                    # Cached binaries don't fit anymore, e.g. after an update
+                    DriverFactory.path_cache.invalidate(browser_name)
+                    options = DriverFactory._create_session_options(
+                        *option_args)
+                    driver = DriverFactory._create_local_driver(
+                        options, browser_name, startup)
+
+        if browser_name.lower() == "firefox":
+            driver.resource_profile = resource_profile
+        else:
+            DriverFactory.apply_resource_profile(driver,
+                                                 browser_name,
+                                                 resource_profile)
+        if network_tracker:
+            DriverFactory._preload_network_tracker(driver,
+                                                   browser_name,
+                                                   enable_bidi)
+        return driver
+
+    @staticmethod
+    def apply_resource_profile(driver, browser_name, resource_profile):
+        """
+        Switch the resource blocking profile of a running driver.
+        Chrome blocks the URLs of the profile via CDP request interception.
+        Firefox applies its preferences at launch only,
+        so Firefox drivers keep the profile they were created with.
+        """
+        if getattr(driver, "resource_profile", "visual") == resource_profile:
+            return
+        if browser_name.lower() != "chrome":
+            return
+
+        profile = get_resource_profile(resource_profile)
+        driver.execute("executeCdpCommand",
+                       {"cmd": "Network.enable", "params": {}})
+        driver.execute("executeCdpCommand",
+                       {"cmd": "Network.setBlockedURLs",
+                        "params": {"urls": profile["blocked_urls"]}})
+        driver.resource_profile = resource_profile
+
+    @staticmethod
+    def attach_driver(executor_url, session_id, capabilities):
+        """
+        Create a driver for a session that another process started,
+        e.g. to share one browser between pytest-xdist workers.
+        Quitting the driver only disconnects it, the session keeps running.
+        """
+        options = DriverFactory._create_browser_options(
+            capabilities["browserName"])
+        return _AttachedDriver(executor_url, options, session_id,
+                               capabilities)
+
+    @staticmethod
+    def get_capabilities(browser_name, enable_bidi=False):
+        """
+        Get the W3C capabilities for the specified browser.
+        Used to start sessions that are not created by Selenium,
+        e.g. AsyncWebDriver sessions.
+        """
+        options = DriverFactory._create_browser_options(browser_name)
+        options.enable_bidi = enable_bidi
+        return options.to_capabilities()
+
+    @staticmethod
+    def start_driver_service(browser_name):
+        """
+        Start a local driver service (chromedriver, geckodriver)
+        for the specified browser. One service can host many sessions.
+        The caller has to stop the service.
         """
         options = DriverFactory._create_browser_options(browser_name)
+        service = DriverFactory._create_service(browser_name)
+        DriverFactory._resolve_binaries(service, options, browser_name)
+        service.start()
+        return service
+
+    @staticmethod
+    def _create_session_options(browser_name, enable_bidi, resource_profile,
+                                page_load_strategy):
+        """
+        Create the browser options for a new session.
+        """
+        options = DriverFactory._create_browser_options(browser_name)
+        options.enable_bidi = enable_bidi
+        options.page_load_strategy = page_load_strategy
+        if browser_name.lower() == "firefox":
+            profile = get_resource_profile(resource_profile)
+            for name, value in profile["firefox_prefs"].items():
+                options.set_preference(name, value)
+        return options
+
+    @staticmethod
+    def _preload_network_tracker(driver, browser_name, enable_bidi):
+        """
+        Run the network tracker in every new document before the page
+        scripts. BiDi preload scripts also cover all user contexts.
+        Without BiDi or CDP (Firefox), the page objects install the tracker
+        when they wait, so requests started before are not counted.
+        """
+        if enable_bidi:
+            driver.script.pin(f"() => {{ {NETWORK_TRACKER_SCRIPT} }}")
+        elif browser_name.lower() == "chrome":
+            driver.execute("executeCdpCommand",
+                           {"cmd": "Page.addScriptToEvaluateOnNewDocument",
+                            "params": {"source": NETWORK_TRACKER_SCRIPT}})
 
-        if remote:
-            return DriverFactory._create_remote_driver(options)
+    @staticmethod
+    def _create_service(browser_name):
+        """
+        Create the driver service for the specified browser.
+        """
+        if browser_name.lower() == "chrome":
+            return webdriver.ChromeService()
+        elif browser_name.lower() == "firefox":
+            return webdriver.FirefoxService()
         else:
-            return DriverFactory._create_local_driver(options, browser_name)
+            raise ValueError(f"Unsupported browser: {browser_name}")
+
+    @staticmethod
+    def _resolve_binaries(service, options, browser_name):
+        """
+        Set the paths of the driver and browser binaries.
+        Uses the path cache if possible, otherwise Selenium Manager.
+        Returns True if the paths came from the cache.
+        """
+        cached = DriverFactory.path_cache.get(browser_name)
+        if cached:
+            service.path = cached["driver_path"]
+            if cached["browser_path"]:
+                options.binary_location = cached["browser_path"]
+            return True
+
+        finder = DriverFinder(service, options)
+        service.path = finder.get_driver_path()
+        if finder.get_browser_path():
+            options.binary_location = finder.get_browser_path()
+        return False
+
+    @staticmethod
+    def _get_versions(driver):
+        """
+        Get the browser and driver versions of a running session.
+        """
+        caps = driver.capabilities
+        driver_version = caps.get("moz:geckodriverVersion") or \
+            caps.get("chrome", {}).get("chromedriverVersion", "").split(" ")[0]
+        return {
+            "browser": caps.get("browserVersion"),
+            "driver": driver_version
+        }
 
     @staticmethod
     def _create_browser_options(browser_name):
@@ -61,21 +240,64 @@ class DriverFactory:
         return options
 
     @staticmethod
-    def _create_local_driver(options, browser_name):
+    def _create_local_driver(options, browser_name, startup):
         """
         Create a local WebDriver instance for the specified browser.
+        Measures the resolve, launch and session phases of the startup.
         """
-        if browser_name.lower() == "chrome":
-            return webdriver.Chrome(options=options)
-        elif browser_name.lower() == "firefox":
-            return webdriver.Firefox(options=options)
-        else:
-            raise ValueError(f"Unsupported browser: {browser_name}")
+        service = DriverFactory._create_service(browser_name)
+        with startup.phase("resolve"):
+            startup.cached = DriverFactory._resolve_binaries(service,
+                                                             options,
+                                                             browser_name)
+
+        # The driver starts the service itself, so wrap it for measuring
+        start_service = service.start
+
+        def start_service_measured():
+            with startup.phase("launch"):
+                start_service()
+        service.start = start_service_measured
+
+        with startup.phase("session"):
+            if browser_name.lower() == "chrome":
+                driver = webdriver.Chrome(options=options, service=service)
+            else:
+                driver = webdriver.Firefox(options=options, service=service)
+        startup.add("session", -startup.phases.get("launch", 0.0))
+
+        if not startup.cached:
+            DriverFactory.path_cache.put(browser_name,
+                                         service.path,
+                                         options.binary_location,
+                                         DriverFactory._get_versions(driver))
+        return driver
 
     @staticmethod
-    def _create_remote_driver(options):
+    def _create_remote_driver(options, startup):
         """
         Create a remote WebDriver instance for the specified browser.
+        The grid resolves and launches the browser during the session phase.
         """
-        grid_url = "http://localhost:4444/wd/hub"
-        return webdriver.Remote(command_executor=grid_url, options=options)
+        with startup.phase("session"):
+            return webdriver.Remote(command_executor=DriverFactory.GRID_URL,
+                                    options=options)
+
+
+class _AttachedDriver(webdriver.Remote):
+    """
+    Remote driver that joins a running session instead of starting one.
+    """
+    def __init__(self, executor_url, options, session_id, capabilities):
+        self._attached_session = (session_id, capabilities)
+        super().__init__(command_executor=executor_url, options=options)
+
+    def start_session(self, capabilities):
+        self.session_id, self.caps = self._attached_session
+
+    def quit(self):
+        """Disconnect from the session without ending it."""
+        if self._websocket_connection:
+            # The socket stays open while the session runs, close it here
+            self._websocket_connection._ws.close()
+        self.command_executor.close()
@@ -0,0 +1,227 @@
+"""
+This module provides a bounded pool of reusable WebDriver instances.
+Drivers are handed out warm, reset between tests and recycled
+after a maximum number of uses or when the session becomes unhealthy.
+It also provides a pre-warmer that starts fresh drivers in the
+background for suites that need a new browser for every test.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from urllib.parse import urlparse
+from selenium.common.exceptions import WebDriverException
+from utils.driver_factory import DriverFactory
+
+
+class DriverPool:
+    """
+    Bounded pool of WebDriver instances for a test run.
+    Instead of launching a new browser for every test, drivers are
+    reused and their state is reset when they are given back.
+    Additional keyword arguments are passed to DriverFactory.create_driver.
+    """
+    def __init__(self, browser_name, remote, max_size=1, max_uses=25,
+                 acquire_timeout=60, **driver_options):
+        self.browser_name = browser_name
+        self.remote = remote
+        self.driver_options = driver_options
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = []
+        self._uses = {}
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Get a driver from the pool.
+        Creates a new driver if no idle driver is available and the pool
+        is not full yet. Otherwise waits for a driver to be released.
+        """
+        with self._condition:
+            has_capacity = self._condition.wait_for(
+                lambda: self._idle or len(self._uses) < self.max_size,
+                timeout=self.acquire_timeout)
+            if not has_capacity:
+                raise TimeoutError(
+                    f"No driver available in pool after "
+                    f"{self.acquire_timeout}s (max size: {self.max_size})")
+            if self._idle:
+                return self._idle.pop()
+            # Reserve the slot before the slow browser launch
+            placeholder = object()
+            self._uses[placeholder] = 0
+
+        try:
+            driver = DriverFactory.create_driver(self.browser_name,
+                                                 self.remote,
+                                                 **self.driver_options)
+        except Exception:
+            with self._condition:
+                self._uses.pop(placeholder)
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._uses.pop(placeholder)
+            self._uses[driver] = 0
+        return driver
+
+    def release(self, driver):
+        """
+        Give a driver back to the pool.
+        The browser state is reset. Drivers that reached the maximum
+        number of uses or failed the health check are quit.
+        """
+        with self._condition:
+            self._uses[driver] += 1
+            worn_out = self._uses[driver] >= self.max_uses
+
+        if worn_out or not self._reset(driver):
+            self._discard(driver)
+            return
+
+        with self._condition:
+            self._idle.append(driver)
+            self._condition.notify()
+
+    def close(self):
+        """Quit all drivers that are managed by this pool."""
+        with self._condition:
+            drivers = [d for d in self._uses if hasattr(d, "quit")]
+            self._idle.clear()
+        for driver in drivers:
+            self._discard(driver)
+
+    def _discard(self, driver):
+        """Quit a driver and free its slot in the pool."""
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        with self._condition:
+            self._uses.pop(driver, None)
+            self._condition.notify()
+
+    @staticmethod
+    def _reset(driver):
+        """
+        Reset the browser state and check that the session is healthy.
+        Closes additional windows and clears cookies, localStorage and
+        sessionStorage before leaving the page. Chrome clears all cookies
+        and the storage of every origin the windows navigated to via CDP.
+        Other browsers can only clear the cookies and storage of the
+        origin that is currently loaded. The data of other origins a test
+        visited stays until the driver is recycled after max_uses.
+        Returns False if the session did not respond properly.
+        """
+        try:
+            chrome = driver.caps.get("browserName", "").lower() == "chrome"
+            origins = set()
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                if chrome:
+                    origins |= _visited_origins(driver)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            alive = driver.execute_script(
+                "try {"
+                "  window.localStorage.clear();"
+                "  window.sessionStorage.clear();"
+                "} catch (e) {}"
+                "return true;")
+            if chrome:
+                origins |= _visited_origins(driver)
+                _execute_cdp(driver, "Network.clearBrowserCookies")
+                for origin in sorted(origins):
+                    _execute_cdp(driver, "Storage.clearDataForOrigin",
+                                 {"origin": origin, "storageTypes": "all"})
+            else:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return alive is True
+        except WebDriverException:
+            return False
+
+
+def _execute_cdp(driver, cmd, params=None):
+    """Run a Chrome DevTools Protocol command and return its result."""
+    return driver.execute("executeCdpCommand",
+                          {"cmd": cmd, "params": params or {}})["value"]
+
+
+def _visited_origins(driver):
+    """
+    Returns the http(s) origins in the session history
+    of the current window.
+    """
+    history = _execute_cdp(driver, "Page.getNavigationHistory")
+    origins = set()
+    for entry in history["entries"]:
+        url_parts = urlparse(entry["url"])
+        if url_parts.scheme in ("http", "https"):
+            origins.add(f"{url_parts.scheme}://{url_parts.netloc}")
+    return origins
+
+
+class DriverPrewarmer:
+    """
+    Start fresh WebDriver instances ahead of time.
+    While a test runs, background threads already launch the browsers
+    for the next tests, so the browser startup overlaps with test execution.
+    Every driver is handed out only once and has to be quit by the caller.
+    Additional keyword arguments are passed to DriverFactory.create_driver.
+    """
+    def __init__(self, browser_name, remote, depth=1, **driver_options):
+        if depth < 1:
+            raise ValueError(f"Pre-warm depth must be at least 1: {depth}")
+        self.browser_name = browser_name
+        self.remote = remote
+        self.driver_options = driver_options
+        self.depth = depth
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=depth,
+            thread_name_prefix="driver-prewarm")
+        self._pending = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Get the next pre-warmed driver and start warming up a replacement.
+        Blocks only if the next driver has not finished starting yet.
+        """
+        with self._lock:
+            self._fill()
+            future = self._pending.popleft()
+            self._fill()
+        return future.result()
+
+    def close(self):
+        """Stop warming up drivers and quit the ones that are not used."""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        for future in pending:
+            if future.cancelled() or future.exception():
+                continue
+            try:
+                future.result().quit()
+            except WebDriverException:
+                pass
+
+    def _fill(self):
+        """Schedule driver launches until the look-ahead depth is reached."""
+        while len(self._pending) < self.depth:
+            self._pending.append(self._executor.submit(
+                DriverFactory.create_driver,
+                self.browser_name,
+                self.remote,
+                **self.driver_options))
@@ -0,0 +1,79 @@
+"""
+This file contains the writer of the streamed test log report.
+Every worker appends the HTML of each finished test case to its own
+fragment file while the tests run, so no report is built in memory.
+At the end of the session, the controller streams the fragments of all
+workers into one HTML document, which includes the stylesheet once.
+"""
+
+import html
+import os
+import shutil
+from utils.json_log_to_html import STYLESHEET_PATH, iter_test_case_html
+
+FRAGMENT_EXTENSION = ".part.html"
+
+_REPORT_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+"""
+
+_REPORT_BODY = """</style>
+</head>
+<body>
+"""
+
+_REPORT_FOOTER = """
+</body>
+</html>
+"""
+
+
+class HtmlFragmentWriter:
+    """
+    Append the HTML of finished test cases to a fragment file.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self._file = open(file_path, "a", encoding="utf-8")
+
+    def write(self, record):
+        """
+        Render a test case record into the fragment file.
+        """
+        for chunk in iter_test_case_html(record):
+            self._file.write(chunk)
+        self._file.flush()
+
+    def close(self):
+        """Close the fragment file."""
+        self._file.close()
+
+
+def assemble_html_report(report_file, fragment_path, title):
+    """
+    Stream the fragment files of all workers into one HTML report.
+    Returns the path of the report, or None without fragments.
+    """
+    if not os.path.isdir(fragment_path):
+        return None
+    fragment_names = sorted(name for name in os.listdir(fragment_path)
+                            if name.endswith(FRAGMENT_EXTENSION))
+    if not fragment_names:
+        return None
+
+    with open(report_file, "w", encoding="utf-8") as report:
+        report.write(_REPORT_HEAD.format(title=html.escape(title)))
+        with open(STYLESHEET_PATH, encoding="utf-8") as stylesheet:
+            shutil.copyfileobj(stylesheet, report)
+        report.write(_REPORT_BODY)
+        for fragment_name in fragment_names:
+            with open(os.path.join(fragment_path, fragment_name),
+                      encoding="utf-8") as fragment:
+                shutil.copyfileobj(fragment, report)
+        report.write(_REPORT_FOOTER)
+    return report_file
@@ -0,0 +1,53 @@
+"""
+This module provides a local stand-in server for SauceDemo.
+It serves a minimal copy of the login, inventory and item pages
+with the same data-test attributes, so tests can run without
+depending on the public internet.
+"""
+
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import os
+import threading
+
+SITE_PATH = os.path.join(os.path.dirname(__file__), "local_site")
+
+
+class _QuietRequestHandler(SimpleHTTPRequestHandler):
+    """Serve the stand-in pages without writing every request to stderr."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalSauceDemoServer:
+    """
+    In-process HTTP server for the SauceDemo stand-in pages.
+    Runs on a background thread and listens on localhost.
+    """
+    def __init__(self, host="127.0.0.1", port=0):
+        handler = partial(_QuietRequestHandler, directory=SITE_PATH)
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """Returns the base URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="local-saucedemo-server",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and wait for the background thread."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
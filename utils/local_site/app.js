@@ -0,0 +1,237 @@
+/*
+ * Minimal stand-in for the SauceDemo login, inventory and item pages.
+ * It keeps the data-test attributes, the session cookie and the
+ * localStorage cart of the real application, so the page objects
+ * can run against it unchanged.
+ */
+
+const SESSION_COOKIE = "session-username";
+const CART_STORAGE_KEY = "cart-contents";
+const PASSWORD = "secret_sauce";
+const USERS = [
+    "standard_user",
+    "locked_out_user",
+    "problem_user",
+    "performance_glitch_user",
+    "error_user",
+    "visual_user",
+];
+const LOCKED_USERS = ["locked_out_user"];
+
+const PRODUCTS = [
+    {id: 4, name: "Sauce Labs Backpack", price: "29.99",
+     desc: "Streamlined Sly Pack with unequaled laptop and tablet protection."},
+    {id: 0, name: "Sauce Labs Bike Light", price: "9.99",
+     desc: "A red light isn't the desired state in testing."},
+    {id: 1, name: "Sauce Labs Bolt T-Shirt", price: "15.99",
+     desc: "Get your testing superhero on with the Sauce Labs bolt T-shirt."},
+    {id: 5, name: "Sauce Labs Fleece Jacket", price: "49.99",
+     desc: "It's not every day that you come across a midweight quarter-zip."},
+    {id: 2, name: "Sauce Labs Onesie", price: "7.99",
+     desc: "Rib snap infant onesie for the junior automation engineer."},
+    {id: 3, name: "Test.allTheThings() T-Shirt (Red)", price: "15.99",
+     desc: "This classic Sauce Labs t-shirt is perfect to wear when cozying up."},
+];
+
+function slug(name) {
+    return name.toLowerCase().replace(/ /g, "-");
+}
+
+function getSessionUser() {
+    for (const cookie of document.cookie.split("; ")) {
+        const [key, value] = cookie.split("=");
+        if (key === SESSION_COOKIE && value) {
+            return value;
+        }
+    }
+    return null;
+}
+
+function getCart() {
+    try {
+        return JSON.parse(window.localStorage.getItem(CART_STORAGE_KEY)) || [];
+    } catch (e) {
+        return [];
+    }
+}
+
+function setCart(cart) {
+    if (cart.length) {
+        window.localStorage.setItem(CART_STORAGE_KEY, JSON.stringify(cart));
+    } else {
+        window.localStorage.removeItem(CART_STORAGE_KEY);
+    }
+}
+
+function element(tag, attributes, text) {
+    const el = document.createElement(tag);
+    for (const [key, value] of Object.entries(attributes || {})) {
+        el.setAttribute(key, value);
+    }
+    if (text !== undefined) {
+        el.textContent = text;
+    }
+    return el;
+}
+
+function renderCartBadge() {
+    const link = document.querySelector("[data-test='shopping-cart-link']");
+    link.replaceChildren();
+    const count = getCart().length;
+    if (count > 0) {
+        link.appendChild(element("span", {
+            "class": "shopping_cart_badge",
+            "data-test": "shopping-cart-badge",
+        }, String(count)));
+    }
+}
+
+function cartButton(product, testIdSuffix) {
+    const inCart = getCart().includes(product.id);
+    const prefix = inCart ? "remove" : "add-to-cart";
+    const button = element("button", {
+        "class": "btn btn_inventory",
+        "data-test": testIdSuffix ? `${prefix}-${testIdSuffix}` : prefix,
+    }, inCart ? "Remove" : "Add to cart");
+    button.addEventListener("click", () => {
+        const cart = getCart().filter((id) => id !== product.id);
+        if (!inCart) {
+            cart.push(product.id);
+        }
+        setCart(cart);
+        button.replaceWith(cartButton(product, testIdSuffix));
+        renderCartBadge();
+    });
+    return button;
+}
+
+function requireSession(path) {
+    if (getSessionUser() === null) {
+        window.sessionStorage.setItem("login-error",
+            `Epic sadface: You can only access '${path}' when you are logged in.`);
+        window.location.href = "/";
+        return false;
+    }
+    return true;
+}
+
+function showLoginError(message) {
+    const container = document.querySelector(".error-message-container");
+    container.replaceChildren(element("h3", {"data-test": "error"}, message));
+}
+
+function renderLogin() {
+    const pendingError = window.sessionStorage.getItem("login-error");
+    if (pendingError) {
+        window.sessionStorage.removeItem("login-error");
+        showLoginError(pendingError);
+    }
+
+    document.getElementById("login_form").addEventListener("submit", (event) => {
+        event.preventDefault();
+        const username = document.querySelector("[data-test='username']").value;
+        const password = document.querySelector("[data-test='password']").value;
+
+        if (!username) {
+            showLoginError("Epic sadface: Username is required");
+        } else if (!password) {
+            showLoginError("Epic sadface: Password is required");
+        } else if (!USERS.includes(username) || password !== PASSWORD) {
+            showLoginError("Epic sadface: Username and password do not "
+                           + "match any user in this service");
+        } else if (LOCKED_USERS.includes(username)) {
+            showLoginError("Epic sadface: Sorry, this user has been locked out.");
+        } else {
+            document.cookie = `${SESSION_COOKIE}=${username}; path=/`;
+            window.location.href = "/inventory.html";
+        }
+    });
+}
+
+function renderInventory() {
+    if (!requireSession("/inventory.html")) {
+        return;
+    }
+    const list = document.querySelector("[data-test='inventory-list']");
+    for (const product of PRODUCTS) {
+        const itemUrl = `/inventory-item.html?id=${product.id}`;
+        const item = element("div", {
+            "class": "inventory_item",
+            "data-test": "inventory-item",
+        });
+
+        const imgLink = element("a", {
+            "href": itemUrl,
+            "id": `item_${product.id}_img_link`,
+            "data-test": `item-${product.id}-img-link`,
+        });
+        imgLink.appendChild(element("img", {
+            "class": "inventory_item_img",
+            "src": "/product.svg",
+            "alt": product.name,
+            "data-test": `inventory-item-${slug(product.name)}-img`,
+        }));
+
+        const titleLink = element("a", {
+            "href": itemUrl,
+            "id": `item_${product.id}_title_link`,
+            "data-test": `item-${product.id}-title-link`,
+        });
+        titleLink.appendChild(element("div", {
+            "class": "inventory_item_name",
+            "data-test": "inventory-item-name",
+        }, product.name));
+
+        item.append(
+            imgLink,
+            titleLink,
+            element("div", {"data-test": "inventory-item-desc"}, product.desc),
+            element("div", {"data-test": "inventory-item-price"}, `$${product.price}`),
+            cartButton(product, slug(product.name)),
+        );
+        list.appendChild(item);
+    }
+    renderCartBadge();
+}
+
+function renderItem() {
+    if (!requireSession("/inventory-item.html")) {
+        return;
+    }
+    const id = Number(new URLSearchParams(window.location.search).get("id"));
+    const product = PRODUCTS.find((p) => p.id === id);
+    const container = document.querySelector("[data-test='inventory-container']");
+
+    if (product === undefined) {
+        container.appendChild(element("div", {
+            "data-test": "inventory-item-name",
+        }, "ITEM NOT FOUND"));
+    } else {
+        container.append(
+            element("img", {
+                "class": "inventory_details_img",
+                "src": "/product.svg",
+                "alt": product.name,
+                "data-test": `item-${slug(product.name)}-img`,
+            }),
+            element("div", {"data-test": "inventory-item-name"}, product.name),
+            element("div", {"data-test": "inventory-item-desc"}, product.desc),
+            element("div", {"data-test": "inventory-item-price"}, `$${product.price}`),
+            cartButton(product, null),
+        );
+    }
+
+    document.querySelector("[data-test='back-to-products']")
+        .addEventListener("click", () => {
+            window.location.href = "/inventory.html";
+        });
+    renderCartBadge();
+}
+
+const PAGES = {
+    login: renderLogin,
+    inventory: renderInventory,
+    item: renderItem,
+};
+
+PAGES[document.body.dataset.page]();
@@ -0,0 +1,99 @@
+"""
+This file contains a non-blocking writer for newline-delimited JSON logs.
+The test thread only puts the records into a queue. A background thread
+serializes them in batches, appends them to the logfile and flushes,
+so every line is one complete JSON record that log ingestion tools
+can stream. Optionally, the file is gzip-compressed.
+"""
+
+import gzip
+import json
+import queue
+import threading
+import time
+
+_CLOSE = object()  # Tells the writer thread to stop
+
+
+class NdjsonLogWriter:
+    """
+    Append JSON records to a logfile from a background thread.
+    Records are written in batches of up to `batch_size` records,
+    at the latest after `flush_interval` seconds.
+    """
+    def __init__(self, file_path, compress=False, batch_size=100,
+                 flush_interval=0.5):
+        self.file_path = file_path
+        self.compress = compress
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.error = None
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run,
+                                        name=f"log-writer:{file_path}",
+                                        daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        """
+        Queue a record for writing. Returns immediately.
+        """
+        if self.error:
+            raise RuntimeError(
+                f"Log writer for {self.file_path} failed") from self.error
+        self._queue.put(record)
+
+    def close(self):
+        """
+        Write all queued records and close the logfile.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        if self.error:
+            raise RuntimeError(
+                f"Log writer for {self.file_path} failed") from self.error
+
+    def _open(self):
+        if self.compress:
+            return gzip.open(self.file_path, "at", encoding="utf-8")
+        return open(self.file_path, "a", encoding="utf-8")
+
+    def _run(self):
+        """
+        Wait for records and write them in batches until closed.
+        """
+        try:
+            with self._open() as file:
+                closed = False
+                while not closed:
+                    batch, closed = self._next_batch()
+                    if batch:
+                        file.write("".join(
+                            json.dumps(record, ensure_ascii=False,
+                                       separators=(",", ":")) + "\n"
+                            for record in batch))
+                        file.flush()
+        except Exception as e:
+            self.error = e
+
+    def _next_batch(self):
+        """
+        Returns the next batch of records and if the writer was closed.
+        Blocks until a record arrives, then collects the records that
+        arrive within the flush interval.
+        """
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while item is not _CLOSE:
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                return batch, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+        return batch, True
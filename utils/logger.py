@@ -1,27 +1,38 @@
 """
 This file contains classes needed for Logging the tests.
 """
-from lib import consts
 from datetime import datetime
 from contextlib import contextmanager
+from dataclasses import dataclass
 from enum import StrEnum
+from itertools import zip_longest
 import json
-import logging
 import os
+import time
 import pytest
-import shutil
+from utils.log_writer import NdjsonLogWriter
+from utils.parallel import CONTROLLER_ID, create_run_id
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
 
 
 class Logger:
     """
     Create a Logger that is used for a testrun.
-    It logs the data of each test case in JSON format.
+    It logs the data of each test case as one JSON record per line
+    (NDJSON). The records are written by a background thread,
+    optionally gzip-compressed.
     """
-    def __init__(self, env):
+    def __init__(self, env, run_id=None,
+                 log_path=os.path.join("test_reports", "logs"),
+                 worker_id=CONTROLLER_ID, compress=False):
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.run_id = "RUN-" + self.timestamp
+        self.run_id = run_id or create_run_id()
         self.env = env
-        self.logger = None
+        self.log_path = log_path
+        self.worker_id = worker_id
+        self.compress = compress
+        self.writer = None
         self.test_cases = {}
 
         self._setup_logger()
@@ -39,21 +50,21 @@ class Logger:
         """
         Write test data of a given test case to logfile.
         """
-        data = test_case.get_json_test_data()
-
-        match test_case.log_level:
-            case "DEBUG":
-                self.logger.debug(data)
-            case "INFO":
-                self.logger.info(data)
-            case "WARNING":
-                self.logger.warning(data)
-            case "ERROR":
-                self.logger.error(data)
-            case "CRITICAL":
-                self.logger.critical(data)
-            case _:
-                ValueError(f"Unexpected Log Level: {data["log_level"]}")
+        self.log_record(test_case.to_record())
+
+    def log_record(self, record):
+        """
+        Write a finished test case record to logfile.
+        Only queues the record, the writer thread serializes and writes it.
+        """
+        if record.log_level not in LOG_LEVELS:
+            raise ValueError(f"Unexpected Log Level: {record.log_level}")
+
+        log_entry = {"level": record.log_level,
+                     "logged_at": datetime.now().astimezone().isoformat(),
+                     "worker": self.worker_id}
+        log_entry.update(record.to_dict())
+        self.writer.write(log_entry)
 
     def log_test_cases(self):
         """
@@ -68,29 +79,27 @@ class Logger:
         """
         self.test_cases.pop(test_case.test_id)
 
-    def _setup_logger(self):
+    def close(self):
         """
-        Create directories for logfile and clean up old log files.
-        Create python logger and add JSON Formatter.
+        Write the queued records and close the logfile of this logger.
         """
-        log_path = os.path.join("test_reports", "logs")
-        if os.path.exists(log_path):
-            shutil.rmtree(log_path)
-        os.makedirs(log_path)
-
-        log_file = os.path.join(log_path, f"{self.run_id}.log")
+        if self.writer:
+            self.writer.close()
+            self.writer = None
 
-        logger = logging.getLogger(consts.LOGGER_NAME)
-        logger.setLevel(logging.INFO)
-
-        file_handler = logging.FileHandler(log_file)
-        formatter = logging.Formatter(
-            "%(levelname)s - %(message)s"
-        )
-        file_handler.setFormatter(formatter)
+    def _setup_logger(self):
+        """
+        Create the directory for the logfile of this worker.
+        Each worker of a run writes to its own logfile, so parallel
+        workers never share a file.
+        Start the writer for the NDJSON logfile.
+        """
+        log_path = os.path.join(self.log_path, self.run_id)
+        os.makedirs(log_path, exist_ok=True)
 
-        logger.addHandler(file_handler)
-        self.logger = logger
+        extension = "ndjson.gz" if self.compress else "ndjson"
+        log_file = os.path.join(log_path, f"{self.worker_id}.{extension}")
+        self.writer = NdjsonLogWriter(log_file, compress=self.compress)
 
 
 class TestState(StrEnum):
@@ -152,13 +161,17 @@ class TestCase:
         """
         self.steps[number] = {
             "descrpition": desc,
-            "state": "started"}
+            "state": "started",
+            "started": time.perf_counter(),
+            "duration": None}
 
     def mark_step_finished(self, number: int):
         """
-        Mark a step as sucessfully finished.
+        Mark a step as sucessfully finished and measure its duration.
         """
-        self.steps[number]["state"] = "finished"
+        step = self.steps[number]
+        step["state"] = "finished"
+        step["duration"] = time.perf_counter() - step["started"]
 
     def add_error(self, test_report: pytest.TestReport):
         """
@@ -179,15 +192,93 @@ class TestCase:
         """
         Gets Test data in JSON format.
         """
-        test_data = self._get_test_data()
-        json_test_data = json.dumps(test_data,
+        json_test_data = json.dumps(self.to_record().to_dict(),
                                     indent=indent,
                                     ensure_ascii=ascii)
         return json_test_data
 
-    def _get_test_data(self):
+    def to_record(self):
+        """
+        Returns an immutable snapshot of this test case.
         """
-        Returns Test Data as JSON
+        error = self.error or {}
+        return TestCaseRecord(
+            test_id=self.test_id,
+            description=self.description,
+            run_id=self.run_id,
+            severity=self.severity,
+            owner=self.owner,
+            env=tuple(self.env),
+            steps=tuple((number, step["descrpition"], step["state"])
+                        for number, step in self.steps.items()),
+            step_durations=tuple(step["duration"]
+                                 for step in self.steps.values()),
+            status=self.status,
+            log_level=self.log_level,
+            error_message=error.get("message"),
+            stacktrace=tuple(error.get("stacktrace", ())))
+
+    def _get_stack_trace(self, report: pytest.TestReport):
+        """
+        Extracts stacktrace from a pytest.TestReport
+        """
+        lines = report.longrepr.reprtraceback.reprentries[0].lines
+        return lines
+
+
+@dataclass(frozen=True)
+class TestCaseRecord:
+    """
+    Immutable record of a finished test case.
+    The logfile and the HTML report are both created from this record,
+    without serializing and parsing the test data in between.
+    Steps are (number, description, state) tuples,
+    `step_durations` holds their durations in seconds, in the same order
+    (None for steps that were not finished).
+    """
+    test_id: str
+    description: str
+    run_id: str
+    severity: str
+    owner: str
+    env: tuple
+    steps: tuple
+    status: str
+    log_level: str = "INFO"
+    error_message: str | None = None
+    stacktrace: tuple = ()
+    step_durations: tuple = ()
+
+    @classmethod
+    def from_dict(cls, test_data, log_level="INFO"):
+        """
+        Create a record from test data in the log format,
+        e.g. a line of a logfile.
+        """
+        metadata = test_data.get("metadata", {})
+        error = test_data.get("error") or {}
+        return cls(
+            test_id=test_data.get("test_id", ""),
+            description=test_data.get("description", ""),
+            run_id=metadata.get("run_id", ""),
+            severity=metadata.get("severity", ""),
+            owner=metadata.get("owner", ""),
+            env=tuple(metadata.get("env", ())),
+            steps=tuple((number, step.get("descrpition", ""),
+                         step.get("state", ""))
+                        for number, step in
+                        test_data.get("steps", {}).items()),
+            step_durations=tuple(step.get("duration") for step in
+                                 test_data.get("steps", {}).values()),
+            status=test_data.get("status", "undefined"),
+            log_level=test_data.get("level", log_level),
+            error_message=error.get("message"),
+            stacktrace=tuple(error.get("stacktrace", ())))
+
+    def to_dict(self):
+        """
+        Returns the test data in the log format
+        as JSON serializable dictionary.
         """
         test_data = {
             "test_id": self.test_id,
@@ -196,20 +287,18 @@ class TestCase:
                 {"run_id": self.run_id,
                  "severity": self.severity,
                  "owner": self.owner,
-                 "env": self.env
+                 "env": list(self.env)
                  },
-            "steps": self.steps,
+            "steps": {str(number): {"descrpition": description,
+                                    "state": state,
+                                    "duration": duration}
+                      for (number, description, state), duration
+                      in zip_longest(self.steps, self.step_durations)},
             "status": self.status
         }
 
-        if self.error:
-            test_data["error"] = self.error
+        if self.error_message is not None:
+            test_data["error"] = {"message": self.error_message,
+                                  "stacktrace": list(self.stacktrace)}
 
         return test_data
-
-    def _get_stack_trace(self, report: pytest.TestReport):
-        """
-        Extracts stacktrace from a pytest.TestReport
-        """
-        lines = report.longrepr.reprtraceback.reprentries[0].lines
-        return lines
@@ -0,0 +1,43 @@
+"""
+This file contains the recorder of the page objects each test uses.
+Every page object registers its class when it is created, the recorder
+keeps the page modules (pages/*.py) per test, including the base pages.
+The usage is stored in the run history, so a run can start with the
+tests whose page objects changed.
+"""
+
+import os
+import threading
+
+
+class PageUsageRecorder:
+    """
+    Collect the page modules used by the tests of this process.
+    """
+    def __init__(self):
+        self.pages = {}
+        self._lock = threading.Lock()
+
+    def record(self, page_class):
+        """
+        Record the modules of a page class and its base classes
+        for the running test.
+        """
+        test = os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0]
+        if not test:
+            return
+        modules = {f"{cls.__module__.replace('.', '/')}.py"
+                   for cls in page_class.__mro__
+                   if cls.__module__.startswith("pages.")}
+        with self._lock:
+            self.pages.setdefault(test, set()).update(modules)
+
+    def pop(self, test_id):
+        """
+        Returns the sorted page modules a test used and forgets them.
+        """
+        with self._lock:
+            return sorted(self.pages.pop(test_id, ()))
+
+
+page_usage = PageUsageRecorder()
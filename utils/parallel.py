@@ -0,0 +1,76 @@
+"""
+This file contains helpers to run the tests in parallel with pytest-xdist.
+All workers share the run id of the controller process and write
+their logs and screenshots into their own partition.
+The partitions are merged by the controller at the end of the session.
+"""
+
+from datetime import datetime
+import os
+import shutil
+import uuid
+
+CONTROLLER_ID = "main"
+
+
+def is_worker(config):
+    """Checks if this process is a pytest-xdist worker."""
+    return hasattr(config, "workerinput")
+
+
+def get_worker_id(config):
+    """Returns the id of the xdist worker, e.g. 'gw0', or 'main'."""
+    if is_worker(config):
+        return config.workerinput["workerid"]
+    return CONTROLLER_ID
+
+
+def create_run_id():
+    """
+    Create a unique id for a test run.
+    The random suffix prevents collisions between runs started
+    within the same second, e.g. on different CI machines.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"RUN-{timestamp}-{uuid.uuid4().hex[:6]}"
+
+
+def get_run_id(config):
+    """
+    Returns the run id of this test run.
+    Workers get the run id of the controller via their workerinput.
+    """
+    if is_worker(config):
+        return config.workerinput["run_id"]
+    return config.run_id
+
+
+def reset_directory(path):
+    """Remove a directory with all its content and create it again."""
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+
+def merge_worker_logs(log_path, run_id):
+    """
+    Merge the log files of all workers of a run into a single log file.
+    The NDJSON files are concatenated byte by byte, which also gives
+    a valid file for gzip-compressed logs.
+    Returns the path of the merged log file.
+    """
+    worker_log_path = os.path.join(log_path, run_id)
+    if not os.path.isdir(worker_log_path):
+        return None
+    log_names = sorted(os.listdir(worker_log_path))
+    if not log_names:
+        return None
+
+    extension = log_names[0].split(".", 1)[1]
+    merged_log_file = os.path.join(log_path, f"{run_id}.{extension}")
+    with open(merged_log_file, "wb") as merged_log:
+        for log_name in log_names:
+            worker_log_file = os.path.join(worker_log_path, log_name)
+            with open(worker_log_file, "rb") as worker_log:
+                shutil.copyfileobj(worker_log, merged_log)
+    return merged_log_file
@@ -0,0 +1,102 @@
+"""
+This module orders the tests of a run failure-first, to find a breaking
+change as early as possible instead of after the whole suite:
+1. tests that failed in the recent runs, the latest failure first
+2. flaky tests, which only passed on a rerun
+3. tests that use page objects (pages/*.py) that changed since the last
+   green run, including pages that import a changed module
+4. all other tests, in the order they were collected
+The information comes from the run history.
+"""
+
+import ast
+import os
+import subprocess
+
+PAGES_PATH = "pages"
+
+GROUPS = ("recently failed", "flaky", "using changed pages")
+
+
+def failure_first_order(test_ids, history, runs=10):
+    """
+    Returns the sort keys of the prioritized tests ({test_id: key})
+    and the number of tests in each group.
+    Tests without a key run after the prioritized tests.
+    """
+    test_ids = set(test_ids)
+    keys = {}
+    counts = dict.fromkeys(GROUPS, 0)
+    for rank, row in enumerate(history.recent_failures(runs)):
+        if row["test_id"] in test_ids:
+            group = 0 if row["failures"] else 1
+            keys[row["test_id"]] = (group, rank)
+            counts[GROUPS[group]] += 1
+
+    changed_pages = get_changed_pages(history.last_green_commit())
+    if changed_pages:
+        for test_id in history.tests_using_pages(changed_pages):
+            if test_id in test_ids and test_id not in keys:
+                keys[test_id] = (2, 0)
+                counts[GROUPS[2]] += 1
+    return keys, counts
+
+
+def get_changed_pages(commit):
+    """
+    Returns the page modules that changed since a commit (committed or
+    not), and the page modules that import them.
+    Returns an empty set if git can't compare with the commit.
+    """
+    if not commit:
+        return set()
+    try:
+        result = subprocess.run(
+            ["git", "diff", "--name-only", commit, "--", PAGES_PATH],
+            capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return set()
+    if result.returncode != 0:
+        return set()  # e.g. the commit is not in a shallow clone
+    changed = {line for line in result.stdout.splitlines()
+               if line.endswith(".py")}
+    return _add_importing_pages(changed)
+
+
+def _add_importing_pages(changed):
+    """
+    Add the page modules that import a changed module, directly
+    or through other page modules.
+    """
+    imports = {}
+    if os.path.isdir(PAGES_PATH):
+        for name in os.listdir(PAGES_PATH):
+            if name.endswith(".py"):
+                page_file = f"{PAGES_PATH}/{name}"
+                imports[page_file] = _imported_pages(page_file)
+
+    affected = set(changed)
+    added = True
+    while added:
+        added = False
+        for page_file, imported in imports.items():
+            if page_file not in affected and imported & affected:
+                affected.add(page_file)
+                added = True
+    return affected
+
+
+def _imported_pages(page_file):
+    """
+    Returns the page modules a page module imports.
+    """
+    with open(page_file, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), page_file)
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            modules.add(node.module)
+        elif isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+    return {f"{module.replace('.', '/')}.py" for module in modules
+            if module.startswith(f"{PAGES_PATH}.")}
@@ -0,0 +1,38 @@
+"""
+This file contains the network resource blocking profiles.
+A profile decides which resources the browser doesn't load,
+so tests that don't care about images or fonts get lighter pages.
+Chrome blocks the URL patterns via CDP, Firefox uses preferences.
+"""
+
+RESOURCE_PROFILES = {
+    # Load everything, e.g. for tests that interact with images
+    "visual": {
+        "blocked_urls": [],
+        "firefox_prefs": {},
+    },
+    # Block images, web fonts and analytics
+    "functional": {
+        "blocked_urls": [
+            "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+            "*.woff", "*.woff2", "*.ttf", "*.otf",
+            "*google-analytics.com*", "*googletagmanager.com*",
+            "*backtrace.io*",
+        ],
+        "firefox_prefs": {
+            "permissions.default.image": 2,
+            "gfx.downloadable_fonts.enabled": False,
+            "browser.display.use_document_fonts": 0,
+        },
+    },
+}
+
+
+def get_resource_profile(name):
+    """Returns the resource blocking profile with the given name."""
+    try:
+        return RESOURCE_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown resource profile: '{name}'. "
+            f"Profiles available: {list(RESOURCE_PROFILES)}")
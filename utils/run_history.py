@@ -0,0 +1,570 @@
+"""
+This module provides the run history: a local SQLite database that every
+test run appends to, while the reports and logs of a run are replaced by
+the next run. It keeps the outcome, duration and rerun count of every
+test, the durations of the logged test steps, the page objects each test
+used, and the run id, browser, environment and git commit of every run.
+The percentiles are computed by window functions in the database,
+so the queries stay fast with many thousands of runs:
+
+    python -m utils.run_history runs
+    python -m utils.run_history slowest --runs 50
+    python -m utils.run_history trend --test test_login
+    python -m utils.run_history flaky
+    python -m utils.run_history steps
+    python -m utils.run_history durations --browser chrome --output chrome.json
+    python -m utils.run_history import shard-1.sqlite3 shard-2.sqlite3
+"""
+
+import argparse
+from datetime import datetime
+import json
+import os
+import sqlite3
+import subprocess
+
+HISTORY_PATH = os.path.join(".test_history", "history.sqlite3")
+
+# SQL condition for the outcomes whose durations are comparable
+# (skipped tests did not run)
+_TIMED_OUTCOMES = "t.outcome IN ('passed', 'failed')"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    git_commit TEXT,
+    browser TEXT,
+    environment TEXT
+);
+CREATE TABLE IF NOT EXISTS test_results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    test_id TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    reruns INTEGER NOT NULL,
+    worker TEXT
+);
+CREATE TABLE IF NOT EXISTS step_results (
+    result_id INTEGER NOT NULL
+        REFERENCES test_results(id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    description TEXT,
+    state TEXT,
+    duration REAL
+);
+CREATE TABLE IF NOT EXISTS page_usage (
+    result_id INTEGER NOT NULL
+        REFERENCES test_results(id) ON DELETE CASCADE,
+    page TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS test_results_run ON test_results(run_id);
+CREATE INDEX IF NOT EXISTS test_results_test
+    ON test_results(test_id, run_id);
+CREATE INDEX IF NOT EXISTS step_results_result ON step_results(result_id);
+CREATE INDEX IF NOT EXISTS page_usage_page ON page_usage(page, result_id);
+"""
+
+# The recent runs, the queries only look at these
+_RECENT_RUNS = """
+recent AS (SELECT run_id, started_at FROM runs
+           ORDER BY started_at DESC LIMIT :runs)
+"""
+
+# The recent runs of one browser, or of all browsers if :browser is NULL
+_RECENT_BROWSER_RUNS = """
+recent AS (SELECT run_id, started_at FROM runs
+           WHERE :browser IS NULL OR browser = :browser
+           ORDER BY started_at DESC LIMIT :runs)
+"""
+
+# The runs at the same commit count as one run, like the shards and
+# browsers of a CI run. Runs without commit count on their own.
+_RUN_GROUP = "COALESCE(git_commit, run_id)"
+
+# The runs of the recent run groups
+_RECENT_RUN_GROUPS = f"""
+recent_groups AS (SELECT {_RUN_GROUP} AS run_group,
+                         MAX(started_at) AS started_at
+                  FROM runs
+                  GROUP BY run_group
+                  ORDER BY started_at DESC LIMIT :runs),
+recent AS (SELECT r.run_id, r.started_at FROM runs r
+           JOIN recent_groups g ON {_RUN_GROUP} = g.run_group)
+"""
+
+
+def _percentile_sql(percent):
+    """
+    Returns the SQL for a percentile of the ranked durations of a group
+    (nearest-rank method, like in the wait telemetry).
+    """
+    return (f"MAX(CASE WHEN position = ({percent} * n + 99) / 100 "
+            f"THEN duration END)")
+
+
+class RunHistory:
+    """
+    The run history database.
+    Runs are written by one process (the pytest-xdist controller),
+    in a single transaction per run.
+    """
+    def __init__(self, db_path=HISTORY_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def add_run(self, run_id, started_at, results, browser=None,
+                environment=None, git_commit=None):
+        """
+        Append a finished run with the results of its tests.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, started_at.isoformat(timespec="seconds"),
+                 datetime.now().isoformat(timespec="seconds"),
+                 git_commit, browser, environment))
+            for result in results:
+                cursor = self.connection.execute(
+                    "INSERT INTO test_results (run_id, test_id, outcome, "
+                    "duration, reruns, worker) VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, result["test_id"], result["outcome"],
+                     result["duration"], result["reruns"],
+                     result["worker"]))
+                self.connection.executemany(
+                    "INSERT INTO step_results VALUES (?, ?, ?, ?, ?)",
+                    [(cursor.lastrowid, *step) for step in result["steps"]])
+                self.connection.executemany(
+                    "INSERT INTO page_usage VALUES (?, ?)",
+                    [(cursor.lastrowid, page) for page in result["pages"]])
+
+    def recent_runs(self, runs=20):
+        """
+        Returns the recent runs with their number of tests and failures.
+        """
+        return self.connection.execute(f"""
+            WITH {_RECENT_RUNS}
+            SELECT r.run_id, r.started_at, r.git_commit, r.browser,
+                   r.environment,
+                   (julianday(r.finished_at) - julianday(r.started_at))
+                       * 86400 AS wall_time,
+                   COUNT(t.id) AS tests,
+                   SUM(t.outcome IN ('failed', 'error')) AS failures,
+                   SUM(t.reruns) AS reruns
+            FROM runs r JOIN recent USING (run_id)
+            LEFT JOIN test_results t USING (run_id)
+            GROUP BY r.run_id
+            ORDER BY r.started_at DESC
+        """, {"runs": runs}).fetchall()
+
+    def slowest_tests(self, runs=50, limit=10):
+        """
+        Returns the tests with the highest p95 duration
+        in the recent runs.
+        """
+        return self.connection.execute(f"""
+            WITH {_RECENT_RUNS},
+            ranked AS (
+                SELECT t.test_id, t.duration,
+                       ROW_NUMBER() OVER (PARTITION BY t.test_id
+                                          ORDER BY t.duration) AS position,
+                       COUNT(*) OVER (PARTITION BY t.test_id) AS n
+                FROM test_results t JOIN recent USING (run_id)
+                WHERE {_TIMED_OUTCOMES}
+            )
+            SELECT test_id, MAX(n) AS count, AVG(duration) AS mean,
+                   {_percentile_sql(50)} AS p50,
+                   {_percentile_sql(95)} AS p95,
+                   MAX(duration) AS max
+            FROM ranked
+            GROUP BY test_id
+            ORDER BY p95 DESC
+            LIMIT :limit
+        """, {"runs": runs, "limit": limit}).fetchall()
+
+    def duration_trend(self, runs=20, test=None):
+        """
+        Returns the p95 of the test durations of each recent run,
+        optionally only of the tests whose id contains `test`.
+        """
+        return self.connection.execute(f"""
+            WITH {_RECENT_RUNS},
+            ranked AS (
+                SELECT t.run_id, t.duration,
+                       ROW_NUMBER() OVER (PARTITION BY t.run_id
+                                          ORDER BY t.duration) AS position,
+                       COUNT(*) OVER (PARTITION BY t.run_id) AS n
+                FROM test_results t JOIN recent USING (run_id)
+                WHERE {_TIMED_OUTCOMES}
+                  AND (:test IS NULL OR instr(t.test_id, :test) > 0)
+            )
+            SELECT run_id, started_at, MAX(n) AS count,
+                   AVG(duration) AS mean,
+                   {_percentile_sql(95)} AS p95,
+                   MAX(duration) AS max
+            FROM ranked JOIN recent USING (run_id)
+            GROUP BY run_id
+            ORDER BY started_at
+        """, {"runs": runs, "test": test}).fetchall()
+
+    def flaky_tests(self, runs=50, limit=10):
+        """
+        Returns the tests that failed or only passed on a rerun
+        in the recent runs. The flake rate is the share of runs
+        in which a test passed on a rerun.
+        """
+        return self.connection.execute(f"""
+            WITH {_RECENT_RUNS}
+            SELECT test_id, COUNT(*) AS runs,
+                   SUM(outcome IN ('failed', 'error')) AS failures,
+                   SUM(outcome = 'passed' AND reruns > 0) AS flaky_passes,
+                   SUM(reruns) AS reruns,
+                   AVG(outcome = 'passed' AND reruns > 0) AS flake_rate
+            FROM test_results JOIN recent USING (run_id)
+            GROUP BY test_id
+            HAVING failures > 0 OR flaky_passes > 0
+            ORDER BY flake_rate DESC, failures DESC
+            LIMIT :limit
+        """, {"runs": runs, "limit": limit}).fetchall()
+
+    def slowest_steps(self, runs=50, limit=10):
+        """
+        Returns the finished test steps with the highest p95 duration
+        in the recent runs.
+        """
+        return self.connection.execute(f"""
+            WITH {_RECENT_RUNS},
+            ranked AS (
+                SELECT t.test_id, s.number, s.description, s.duration,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY t.test_id, s.number
+                           ORDER BY s.duration) AS position,
+                       COUNT(*) OVER (
+                           PARTITION BY t.test_id, s.number) AS n
+                FROM step_results s
+                JOIN test_results t ON t.id = s.result_id
+                JOIN recent USING (run_id)
+                WHERE s.duration IS NOT NULL
+            )
+            SELECT test_id, number, MAX(description) AS description,
+                   MAX(n) AS count,
+                   {_percentile_sql(50)} AS p50,
+                   {_percentile_sql(95)} AS p95
+            FROM ranked
+            GROUP BY test_id, number
+            ORDER BY p95 DESC
+            LIMIT :limit
+        """, {"runs": runs, "limit": limit}).fetchall()
+
+    def recent_failures(self, runs=10):
+        """
+        Returns the tests that failed or only passed on a rerun
+        in the recent runs, the latest failure first.
+        The shards of a run count as one run, see _RUN_GROUP.
+        """
+        return self.connection.execute(f"""
+            WITH {_RECENT_RUN_GROUPS}
+            SELECT t.test_id,
+                   SUM(t.outcome IN ('failed', 'error')) AS failures,
+                   SUM(t.outcome = 'passed' AND t.reruns > 0)
+                       AS flaky_passes,
+                   MAX(CASE WHEN t.outcome IN ('failed', 'error')
+                       THEN r.started_at END) AS last_failure
+            FROM test_results t JOIN recent r USING (run_id)
+            GROUP BY t.test_id
+            HAVING failures > 0 OR flaky_passes > 0
+            ORDER BY last_failure IS NULL, last_failure DESC,
+                     failures DESC, flaky_passes DESC, t.test_id
+        """, {"runs": runs}).fetchall()
+
+    def last_green_commit(self):
+        """
+        Returns the latest git commit whose runs had no failures,
+        or None. All shards of a run have to be green,
+        since they share the commit.
+        """
+        row = self.connection.execute("""
+            SELECT r.git_commit
+            FROM runs r JOIN test_results t USING (run_id)
+            WHERE r.git_commit IS NOT NULL
+            GROUP BY r.git_commit
+            HAVING SUM(t.outcome IN ('failed', 'error')) = 0
+            ORDER BY MAX(r.started_at) DESC
+            LIMIT 1
+        """).fetchone()
+        return row["git_commit"] if row else None
+
+    def tests_using_pages(self, pages, runs=20):
+        """
+        Returns the tests that used one of the page modules
+        in the recent runs.
+        """
+        pages = sorted(pages)
+        placeholders = ", ".join("?" * len(pages))
+        rows = self.connection.execute(f"""
+            SELECT DISTINCT t.test_id
+            FROM page_usage p
+            JOIN test_results t ON t.id = p.result_id
+            WHERE p.page IN ({placeholders})
+              AND t.run_id IN (SELECT run_id FROM runs
+                               ORDER BY started_at DESC LIMIT ?)
+            ORDER BY t.test_id
+        """, (*pages, runs)).fetchall()
+        return [row["test_id"] for row in rows]
+
+    def median_durations(self, runs=20, browser=None):
+        """
+        Returns the median duration of every test in the recent runs,
+        e.g. to balance shards. With a browser, only its runs count,
+        since the same test takes different times in other browsers.
+        """
+        rows = self.connection.execute(f"""
+            WITH {_RECENT_BROWSER_RUNS},
+            ranked AS (
+                SELECT t.test_id, t.duration,
+                       ROW_NUMBER() OVER (PARTITION BY t.test_id
+                                          ORDER BY t.duration) AS position,
+                       COUNT(*) OVER (PARTITION BY t.test_id) AS n
+                FROM test_results t JOIN recent USING (run_id)
+                WHERE {_TIMED_OUTCOMES}
+            )
+            SELECT test_id, {_percentile_sql(50)} AS median
+            FROM ranked
+            GROUP BY test_id
+        """, {"runs": runs, "browser": browser}).fetchall()
+        return {row["test_id"]: row["median"] for row in rows}
+
+    def import_runs(self, db_path):
+        """
+        Copy the runs of another history database that are not in this one,
+        e.g. of the shards of a run on other machines.
+        Returns the number of imported runs.
+        """
+        source = sqlite3.connect(db_path)
+        source.row_factory = sqlite3.Row
+        try:
+            known_runs = {row[0] for row in
+                          self.connection.execute("SELECT run_id FROM runs")}
+            new_runs = [run for run in source.execute("SELECT * FROM runs")
+                        if run["run_id"] not in known_runs]
+            with self.connection:
+                for run in new_runs:
+                    self.connection.execute(
+                        "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                        tuple(run))
+                    for result in source.execute(
+                            "SELECT * FROM test_results WHERE run_id = ?",
+                            (run["run_id"],)).fetchall():
+                        cursor = self.connection.execute(
+                            "INSERT INTO test_results (run_id, test_id, "
+                            "outcome, duration, reruns, worker) "
+                            "VALUES (?, ?, ?, ?, ?, ?)", tuple(result)[1:])
+                        self.connection.executemany(
+                            "INSERT INTO step_results VALUES (?, ?, ?, ?, ?)",
+                            [(cursor.lastrowid, *tuple(step)[1:])
+                             for step in source.execute(
+                                 "SELECT * FROM step_results "
+                                 "WHERE result_id = ?", (result["id"],))])
+                        self.connection.executemany(
+                            "INSERT INTO page_usage VALUES (?, ?)",
+                            [(cursor.lastrowid, usage["page"])
+                             for usage in source.execute(
+                                 "SELECT * FROM page_usage "
+                                 "WHERE result_id = ?", (result["id"],))])
+        finally:
+            source.close()
+        return len(new_runs)
+
+
+class TestResultCollector:
+    """
+    Collect the result of every test from its pytest reports.
+    With pytest-xdist, the controller receives the reports of all workers.
+    Steps and the used page modules are read from the "steps" and "pages"
+    user properties of the teardown report.
+    """
+    __test__ = False  # Not a test class
+
+    def __init__(self):
+        self.results = []
+        self._attempts = {}
+        self._reruns = {}
+
+    def add_report(self, report):
+        """
+        Add a setup, call or teardown report of a test.
+        """
+        attempt = self._attempts.setdefault(
+            report.nodeid, {"outcome": "passed", "duration": 0.0})
+        attempt["duration"] += report.duration
+        if report.outcome == "rerun":
+            # pytest-rerunfailures runs the test again
+            self._reruns[report.nodeid] = \
+                self._reruns.get(report.nodeid, 0) + 1
+            del self._attempts[report.nodeid]
+            return
+        if report.failed:
+            attempt["outcome"] = "failed" if report.when == "call" \
+                else "error"
+        elif report.skipped and attempt["outcome"] == "passed":
+            attempt["outcome"] = "skipped"
+
+        if report.when == "teardown":
+            del self._attempts[report.nodeid]
+            node = getattr(report, "node", None)
+            properties = dict(report.user_properties)
+            self.results.append({
+                "test_id": report.nodeid,
+                "outcome": attempt["outcome"],
+                "duration": attempt["duration"],
+                "reruns": self._reruns.pop(report.nodeid, 0),
+                "worker": getattr(getattr(node, "gateway", None), "id",
+                                  None),
+                "steps": properties.get("steps", []),
+                "pages": properties.get("pages", [])
+            })
+
+
+test_results = TestResultCollector()
+
+
+def get_git_commit():
+    """
+    Returns the commit of the working directory, or None outside git.
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _format_rows(rows, columns):
+    """
+    Returns the lines of a table of rows.
+    Columns are (name, width, format) tuples.
+    """
+    lines = ["".join(f"{name:>{width}}" if index else f"{name:<{width}}"
+                     for index, (name, width, _) in enumerate(columns))]
+    for row in rows:
+        cells = []
+        for index, (name, width, value_format) in enumerate(columns):
+            value = row[name]
+            text = "-" if value is None else format(value, value_format)
+            if index:
+                cells.append(f"{text[:width - 1]:>{width}}")
+            else:
+                # Keep the end of long test ids, it names the test
+                cells.append(f"{text[-(width - 1):]:<{width}}")
+        lines.append("".join(cells))
+    return lines
+
+
+def main(args=None):
+    """
+    Query the run history from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.run_history",
+        description="Show trends of the recorded test runs.")
+    parser.add_argument("--db", default=HISTORY_PATH,
+                        help="Path of the run history database")
+    parser.add_argument("--runs", type=int, default=50,
+                        help="Number of recent runs to look at")
+    parser.add_argument("--limit", type=int, default=10,
+                        help="Maximum number of rows")
+    parser.add_argument("--test", default=None,
+                        help="Only tests whose id contains this text (trend)")
+    parser.add_argument("--browser", default=None,
+                        help="Only runs of this browser (durations)")
+    parser.add_argument("--output", default=None,
+                        help="File to write the durations to (durations)")
+    parser.add_argument("query",
+                        choices=("runs", "slowest", "trend", "flaky",
+                                 "steps", "durations", "import"))
+    parser.add_argument("paths", nargs="*",
+                        help="History databases to import (import)")
+    options = parser.parse_args(args)
+
+    if options.query == "import":
+        history = RunHistory(options.db)
+        try:
+            for path in options.paths:
+                print(f"{path}: {history.import_runs(path)} runs imported")
+        finally:
+            history.close()
+        return
+    if options.query == "durations":
+        durations = {}
+        if os.path.isfile(options.db):
+            history = RunHistory(options.db)
+            try:
+                durations = history.median_durations(options.runs,
+                                                     options.browser)
+            finally:
+                history.close()
+        text = json.dumps(durations, indent=4, sort_keys=True)
+        if options.output:
+            with open(options.output, "w", encoding="utf-8") as file:
+                file.write(text)
+        else:
+            print(text)
+        return
+
+    if not os.path.isfile(options.db):
+        parser.error(f"No run history at {options.db}")
+    history = RunHistory(options.db)
+    try:
+        if options.query == "runs":
+            lines = _format_rows(
+                history.recent_runs(options.runs),
+                (("run_id", 32, ""), ("started_at", 21, ""),
+                 ("browser", 10, ""), ("tests", 7, "d"),
+                 ("failures", 10, "d"), ("reruns", 8, "d"),
+                 ("wall_time", 11, ".1f")))
+        elif options.query == "slowest":
+            lines = _format_rows(
+                history.slowest_tests(options.runs, options.limit),
+                (("test_id", 60, ""), ("count", 7, "d"),
+                 ("mean", 9, ".2f"), ("p50", 9, ".2f"),
+                 ("p95", 9, ".2f"), ("max", 9, ".2f")))
+        elif options.query == "trend":
+            lines = _format_rows(
+                history.duration_trend(options.runs, options.test),
+                (("run_id", 32, ""), ("started_at", 21, ""),
+                 ("count", 7, "d"), ("mean", 9, ".2f"),
+                 ("p95", 9, ".2f"), ("max", 9, ".2f")))
+        elif options.query == "flaky":
+            lines = _format_rows(
+                history.flaky_tests(options.runs, options.limit),
+                (("test_id", 60, ""), ("runs", 6, "d"),
+                 ("failures", 10, "d"), ("flaky_passes", 14, "d"),
+                 ("reruns", 8, "d"), ("flake_rate", 12, ".0%")))
+        else:
+            lines = _format_rows(
+                history.slowest_steps(options.runs, options.limit),
+                (("test_id", 50, ""), ("number", 8, "d"),
+                 ("description", 40, ""), ("count", 7, "d"),
+                 ("p50", 9, ".2f"), ("p95", 9, ".2f")))
+    finally:
+        history.close()
+    print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+This module provides the full-page screenshots of failed tests.
+The screenshot is captured natively by the browser (CDP in Chrome,
+the full-page screenshot command in Firefox), so the window size is
+never changed. Decoding, PNG compression and writing the file happen
+on a background thread pool, so the test teardown is not blocked.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from utils.artifact_store import write_atomic
+import base64
+import os
+import struct
+import threading
+import zlib
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def capture_full_page(driver):
+    """
+    Capture a screenshot of the whole page.
+    Returns the PNG as base64 string. Browsers without a native full-page
+    screenshot fall back to a screenshot of the viewport.
+    """
+    browser_name = driver.capabilities.get("browserName", "").lower()
+    if browser_name in ("chrome", "msedge"):
+        metrics = driver.execute("executeCdpCommand", {
+            "cmd": "Page.getLayoutMetrics", "params": {}})["value"]
+        content_size = metrics["cssContentSize"]
+        return driver.execute("executeCdpCommand", {
+            "cmd": "Page.captureScreenshot",
+            "params": {"format": "png",
+                       "captureBeyondViewport": True,
+                       "clip": {"x": 0, "y": 0,
+                                "width": content_size["width"],
+                                "height": content_size["height"],
+                                "scale": 1}}})["value"]["data"]
+    if browser_name == "firefox":
+        return driver.execute("FULL_PAGE_SCREENSHOT")["value"]
+    return driver.get_screenshot_as_base64()
+
+
+def compress_png(png, level=9):
+    """
+    Compress the image data of a PNG losslessly with the given zlib level.
+    Browsers encode screenshots for speed, not for size.
+    """
+    if not png.startswith(_PNG_SIGNATURE):
+        raise ValueError("Not a PNG image")
+    chunks = []
+    image_data = []
+    position = len(_PNG_SIGNATURE)
+    while position < len(png):
+        length, chunk_type = struct.unpack(">I4s",
+                                           png[position:position + 8])
+        data = png[position + 8:position + 8 + length]
+        position += 12 + length
+        if chunk_type == b"IDAT":
+            if not image_data:
+                chunks.append((b"IDAT", None))  # Position of the image data
+            image_data.append(data)
+        else:
+            chunks.append((chunk_type, data))
+
+    compressed = zlib.compress(zlib.decompress(b"".join(image_data)), level)
+    if len(compressed) >= sum(len(data) for data in image_data):
+        return png
+
+    output = [_PNG_SIGNATURE]
+    for chunk_type, data in chunks:
+        if data is None:
+            data = compressed
+        output.append(struct.pack(">I", len(data)) + chunk_type + data
+                      + struct.pack(">I", zlib.crc32(chunk_type + data)))
+    return b"".join(output)
+
+
+class ScreenshotWriter:
+    """
+    Decode, compress and write screenshots on a background thread pool.
+    Errors are kept and raised when the writer is closed.
+    """
+    def __init__(self, max_workers=2, compression_level=9):
+        self.compression_level = compression_level
+        self.errors = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="screenshots")
+        self._lock = threading.Lock()
+
+    def submit(self, screenshot, file_path):
+        """
+        Queue a base64 PNG screenshot for writing. Returns immediately.
+        """
+        future = self._executor.submit(self._write, screenshot, file_path)
+        future.add_done_callback(self._keep_error)
+        return future
+
+    def close(self):
+        """
+        Wait until all queued screenshots are written.
+        """
+        self._executor.shutdown(wait=True)
+        if self.errors:
+            raise RuntimeError(
+                f"{len(self.errors)} screenshot(s) could not be written"
+            ) from self.errors[0]
+
+    def _write(self, screenshot, file_path):
+        png = base64.b64decode(screenshot)
+        if self.compression_level:
+            try:
+                png = compress_png(png, self.compression_level)
+            except (ValueError, struct.error, zlib.error):
+                pass  # Keep the screenshot as the browser encoded it
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        write_atomic(file_path, png)
+
+    def _keep_error(self, future):
+        if future.exception():
+            with self._lock:
+                self.errors.append(future.exception())
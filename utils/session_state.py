@@ -0,0 +1,79 @@
+"""
+This file contains helpers to put the browser directly into a
+logged in state, without going through the login form.
+SauceDemo keeps the session in a cookie and the cart in localStorage,
+so both can be written straight into the browser.
+"""
+
+import json
+from urllib.parse import urljoin, urlparse
+
+SESSION_COOKIE = "session-username"
+CART_STORAGE_KEY = "cart-contents"
+# Small same-origin document to write the state in, if the browser
+# can't run a script before the page scripts. A 404 page works as well.
+STATE_PAGE = "robots.txt"
+
+_INJECT_STATE_FUNCTION = """
+    function injectState(cookieName, username, cartKey, cartContents) {
+        document.cookie = `${cookieName}=${username}; path=/`;
+        if (cartContents === null) {
+            window.localStorage.removeItem(cartKey);
+        } else {
+            window.localStorage.setItem(cartKey, cartContents);
+        }
+    }
+"""
+
+_INJECT_STATE_SCRIPT = _INJECT_STATE_FUNCTION + """
+    injectState(...arguments);
+"""
+
+
+def inject_session(driver, base_url, username, cart_product_ids=()):
+    """
+    Write the session cookie and the cart contents into the browser
+    and open the inventory page directly, with a single page load.
+    Chrome writes the state via CDP in the new document, before the
+    page scripts run. Other browsers write it in a small same-origin
+    document first, so the cookie and localStorage are set for the
+    right domain.
+    """
+    cart_contents = None
+    if cart_product_ids:
+        cart_contents = json.dumps([int(i) for i in cart_product_ids])
+    state = [SESSION_COOKIE, username, CART_STORAGE_KEY, cart_contents]
+    base_url = base_url.rstrip("/") + "/"
+    inventory_url = urljoin(base_url, "inventory.html")
+
+    if driver.caps.get("browserName") == "chrome":
+        _inject_before_page_scripts(driver, base_url, inventory_url, state)
+        return
+    driver.get(urljoin(base_url, STATE_PAGE))
+    driver.execute_script(_INJECT_STATE_SCRIPT, *state)
+    driver.get(inventory_url)
+
+
+def _inject_before_page_scripts(driver, base_url, url, state):
+    """
+    Open the URL and write the state into its document before the
+    page scripts run. The script is removed again after the page load,
+    so later navigations keep the state the test created.
+    """
+    url_parts = urlparse(base_url)
+    origin = f"{url_parts.scheme}://{url_parts.netloc}"
+    source = (f"if (location.origin === {json.dumps(origin)}) {{"
+              f"{_INJECT_STATE_FUNCTION}"
+              f"injectState(...{json.dumps(state)});"
+              f"}}")
+    response = driver.execute(
+        "executeCdpCommand",
+        {"cmd": "Page.addScriptToEvaluateOnNewDocument",
+         "params": {"source": source}})
+    try:
+        driver.get(url)
+    finally:
+        driver.execute(
+            "executeCdpCommand",
+            {"cmd": "Page.removeScriptToEvaluateOnNewDocument",
+             "params": {"identifier": response["value"]["identifier"]}})
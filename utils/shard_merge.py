@@ -0,0 +1,242 @@
+"""
+This module stitches the test reports of the shards of a run back together.
+Each shard (`--shard=i/n`) runs on its own machine and writes its own
+test_reports folder. The merge combines them into one folder:
+the artifact stores, the NDJSON logs, the test log report, the wait
+metrics and the pytest-html report with the tests of all shards.
+
+    python -m utils.shard_merge --output test_reports shard-1 shard-2
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import shutil
+from utils.artifact_store import pack_html_report
+from utils.html_report_writer import FRAGMENT_EXTENSION, assemble_html_report
+from utils.wait_telemetry import (format_wait_summary_html, load_wait_records,
+                                  save_wait_summary, summarize_waits)
+
+_JSONBLOB = re.compile(r'data-jsonblob="([^"]*)"')
+_POSTFIX = re.compile(
+    r'(<div class="additional-summary postfix">).*?(</div>)', re.S)
+# The filter checkbox of an outcome, and the checkbox with its count.
+# pytest-html 4.1 closes the checkbox with "/>", 4.2 with ">".
+_OUTCOME_CHECKBOX = re.compile(r'<input\b[^>]*\bdata-test-result="\w+"')
+_OUTCOME_COUNT = re.compile(
+    r'(<input\b[^>]*\bdata-test-result="(\w+)"[^>]*>)'
+    r'(\s*<span class="\2">)\d+')
+_DISABLED = re.compile(r'\s+disabled(="[^"]*")?(?=[\s/>])')
+_RUN_COUNT = re.compile(r'<p class="run-count">.*?</p>')
+
+
+def merge_shards(shard_dirs, output_dir, pack=False):
+    """
+    Merge the report folders of all shards into the output folder.
+    Returns the path of the merged pytest-html report, or None.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    merge_artifacts(shard_dirs, os.path.join(output_dir, "artifacts"))
+    merge_logs(shard_dirs, os.path.join(output_dir, "logs"))
+
+    fragment_path = os.path.join(output_dir, "test_log_fragments")
+    metrics_path = os.path.join(output_dir, "metrics")
+    for number, shard_dir in enumerate(shard_dirs, start=1):
+        _copy_files(os.path.join(shard_dir, "test_log_fragments"),
+                    fragment_path, f"shard{number}-",
+                    lambda name: name.endswith(FRAGMENT_EXTENSION))
+        _copy_files(os.path.join(shard_dir, "metrics"), metrics_path,
+                    f"shard{number}-",
+                    lambda name: name.endswith(".json")
+                    and name != "waits-summary.json")
+    assemble_html_report(os.path.join(output_dir, "test_log.html"),
+                         fragment_path, "Test log (all shards)")
+
+    wait_summary = None
+    records = load_wait_records(metrics_path)
+    if records:
+        wait_summary = summarize_waits(records)
+        save_wait_summary(wait_summary,
+                          os.path.join(metrics_path, "waits-summary.json"))
+
+    report_files = [os.path.join(shard_dir, "report.html")
+                    for shard_dir in shard_dirs]
+    report_files = [file for file in report_files if os.path.isfile(file)]
+    if not report_files:
+        return None
+    merged_report = os.path.join(output_dir, "report.html")
+    merge_html_reports(report_files, merged_report, wait_summary)
+    if pack:
+        pack_html_report(merged_report,
+                         os.path.join(output_dir, "report.packed.html"),
+                         "artifacts")
+    return merged_report
+
+
+def merge_artifacts(shard_dirs, artifact_path):
+    """
+    Copy the artifacts of all shards into one store.
+    Artifacts are named by their content, so each is copied only once.
+    """
+    for shard_dir in shard_dirs:
+        shard_artifacts = os.path.join(shard_dir, "artifacts")
+        if os.path.isdir(shard_artifacts):
+            shutil.copytree(shard_artifacts, artifact_path,
+                            dirs_exist_ok=True)
+
+
+def merge_logs(shard_dirs, log_path):
+    """
+    Concatenate the merged NDJSON logs of all shards into one logfile.
+    Returns the path of the logfile, or None without logs.
+    """
+    log_files = []
+    for shard_dir in shard_dirs:
+        shard_logs = os.path.join(shard_dir, "logs")
+        if os.path.isdir(shard_logs):
+            log_files.extend(
+                os.path.join(shard_logs, name)
+                for name in sorted(os.listdir(shard_logs))
+                if os.path.isfile(os.path.join(shard_logs, name)))
+    if not log_files:
+        return None
+
+    extensions = {os.path.basename(file).split(".", 1)[1]
+                  for file in log_files}
+    if len(extensions) > 1:
+        raise ValueError("Cannot merge compressed and uncompressed logs: "
+                         f"{sorted(extensions)}")
+    os.makedirs(log_path, exist_ok=True)
+    merged_log_file = os.path.join(log_path, f"shards.{extensions.pop()}")
+    with open(merged_log_file, "wb") as merged_log:
+        for log_file in log_files:
+            with open(log_file, "rb") as shard_log:
+                shutil.copyfileobj(shard_log, merged_log)
+    return merged_log_file
+
+
+def merge_html_reports(report_files, merged_file, wait_summary=None):
+    """
+    Merge pytest-html reports into one report with the tests of all.
+    The first report is the base: its environment and layout are kept,
+    the test data, the result counts and the wait summary are replaced.
+    """
+    with open(report_files[0], encoding="utf-8") as file:
+        report = file.read()
+
+    data = _read_report_data(report, report_files[0])
+    for report_file in report_files[1:]:
+        with open(report_file, encoding="utf-8") as file:
+            shard_data = _read_report_data(file.read(), report_file)
+        for test_id, entries in shard_data["tests"].items():
+            data["tests"].setdefault(test_id, []).extend(entries)
+
+    counts = {}
+    for entries in data["tests"].values():
+        for entry in entries:
+            result = entry.get("result", "").lower()
+            counts[result] = counts.get(result, 0) + 1
+
+    report = _JSONBLOB.sub(
+        lambda _: f'data-jsonblob="{html.escape(json.dumps(data))}"',
+        report, count=1)
+
+    def replace_count(match):
+        checkbox, result, label = match.groups()
+        count = counts.get(result, 0)
+        return f"{_set_disabled(checkbox, count == 0)}{label}{count}"
+
+    # Fail loudly instead of keeping the counts of the first shard
+    outcomes = len(_OUTCOME_CHECKBOX.findall(report))
+    report, replaced = _OUTCOME_COUNT.subn(replace_count, report)
+    if not outcomes or replaced != outcomes:
+        raise ValueError(
+            f"Found {replaced} outcome counts for {outcomes} outcomes in "
+            f"{report_files[0]}, unknown pytest-html report layout")
+    tests = sum(counts.get(result, 0)
+                for result in ("passed", "failed", "xpassed", "xfailed"))
+    report, replaced = _RUN_COUNT.subn(
+        f'<p class="run-count">{tests} tests '
+        f'in {len(report_files)} shards.</p>',
+        report, count=1)
+    if not replaced:
+        raise ValueError(f"No run count in {report_files[0]}, "
+                         f"unknown pytest-html report layout")
+    if wait_summary:
+        report = _POSTFIX.sub(
+            lambda match: (f"{match.group(1)}"
+                           f"{format_wait_summary_html(wait_summary)}"
+                           f"{match.group(2)}"),
+            report, count=1)
+
+    with open(merged_file, "w", encoding="utf-8") as file:
+        file.write(report)
+    return merged_file
+
+
+def _set_disabled(tag, disabled):
+    """
+    Returns the HTML start tag with or without the disabled attribute,
+    e.g. to enable the filter of an outcome that now has tests.
+    """
+    tag = _DISABLED.sub("", tag)
+    if not disabled:
+        return tag
+    end = -2 if tag.endswith("/>") else -1
+    return f"{tag[:end].rstrip()} disabled{tag[end:]}"
+
+
+def _read_report_data(report, report_file):
+    """
+    Returns the test data that pytest-html embeds in its report.
+    """
+    match = _JSONBLOB.search(report)
+    if not match:
+        raise ValueError(f"No pytest-html test data in {report_file}")
+    return json.loads(html.unescape(match.group(1)))
+
+
+def _copy_files(source_dir, target_dir, prefix, include):
+    """
+    Copy the files of a directory with a prefix,
+    so files of different shards don't overwrite each other.
+    """
+    if not os.path.isdir(source_dir):
+        return
+    os.makedirs(target_dir, exist_ok=True)
+    for name in sorted(os.listdir(source_dir)):
+        if include(name):
+            if name.startswith(("waits-", "startup-")):
+                # Keep the prefix the metric loaders look for
+                kind, rest = name.split("-", 1)
+                target_name = f"{kind}-{prefix}{rest}"
+            else:
+                target_name = f"{prefix}{name}"
+            shutil.copyfile(os.path.join(source_dir, name),
+                            os.path.join(target_dir, target_name))
+
+
+def main(args=None):
+    """
+    Merge the report folders of the shards from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.shard_merge",
+        description="Merge the test reports of the shards of a run.")
+    parser.add_argument("--output", default="test_reports",
+                        help="Folder for the merged reports")
+    parser.add_argument("--pack", action="store_true",
+                        help="Also write a single-file report for archiving")
+    parser.add_argument("shard_dirs", nargs="+",
+                        help="The test_reports folders of the shards")
+    options = parser.parse_args(args)
+    merged_report = merge_shards(options.shard_dirs, options.output,
+                                 options.pack)
+    print(f"Merged {len(options.shard_dirs)} shards into "
+          f"{merged_report or options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+This module splits the tests of a run into shards for several machines.
+The tests are assigned by their historical durations with the
+longest-processing-time rule: the longest test goes to the shard with the
+least work so far, so all shards finish at about the same time.
+Tests without history are estimated with the median of the known tests.
+The assignment only depends on the test ids and the durations, so every
+machine computes the same shards from the same durations file.
+"""
+
+import heapq
+import json
+import os
+import statistics
+
+# Estimate for new tests if there is no history at all
+DEFAULT_DURATION = 10.0
+
+
+def parse_shard(value):
+    """
+    Parse a shard option "i/n" into the 1-based shard index and count.
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(
+            f"Invalid shard '{value}', expected i/n, e.g. 1/4") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{value}', "
+                         f"i has to be between 1 and n")
+    return index, count
+
+
+def load_durations(file_path):
+    """
+    Load the per-test durations from a JSON file ({test_id: seconds}),
+    e.g. written by `python -m utils.run_history durations`.
+    """
+    if not os.path.isfile(file_path):
+        return {}
+    with open(file_path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def assign_shards(test_ids, durations, shard_count):
+    """
+    Assign the tests to shards.
+    Returns a list with the test ids of each shard
+    and a list with the estimated duration of each shard.
+    """
+    default = statistics.median(durations.values()) if durations \
+        else DEFAULT_DURATION
+    # Longest first, ties sorted by id, so every machine gets the same order
+    tests = sorted(((durations.get(test_id, default), test_id)
+                    for test_id in set(test_ids)),
+                   key=lambda test: (-test[0], test[1]))
+
+    shards = [[] for _ in range(shard_count)]
+    loads = [(0.0, index) for index in range(shard_count)]
+    for duration, test_id in tests:
+        load, index = heapq.heappop(loads)
+        shards[index].append(test_id)
+        heapq.heappush(loads, (load + duration, index))
+    estimates = [0.0] * shard_count
+    for load, index in loads:
+        estimates[index] = load
+    return shards, estimates
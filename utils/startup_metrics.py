@@ -0,0 +1,198 @@
+"""
+This file contains classes to measure where the time goes
+when a WebDriver session is started, and a persistent cache
+of the resolved driver and browser binaries.
+The phases of a session startup are:
+- resolve: finding the driver and browser binaries (Selenium Manager)
+- launch: starting the driver service process
+- session: the new session handshake, including the browser launch
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+
+PHASES = ("resolve", "launch", "session")
+
+
+class StartupRecord:
+    """ Timings of the startup of one WebDriver session """
+    def __init__(self, browser_name, remote):
+        self.browser_name = browser_name
+        self.remote = remote
+        self.cached = False
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measure the duration of a startup phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, duration):
+        """
+        Add a duration to a startup phase.
+        """
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def to_dict(self):
+        """
+        Returns the record as JSON serializable dictionary.
+        """
+        return {
+            "browser": self.browser_name,
+            "remote": self.remote,
+            "cached": self.cached,
+            "phases": self.phases,
+            "total": sum(self.phases.values())
+        }
+
+
+class StartupRecorder:
+    """
+    Collect the startup records of all sessions of this process.
+    """
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, browser_name, remote):
+        """
+        Create a record for a session startup. The record is only kept,
+        if the session was started successfully.
+        """
+        record = StartupRecord(browser_name, remote)
+        yield record
+        with self._lock:
+            self.records.append(record.to_dict())
+
+    def save(self, file_path):
+        """
+        Write the records of this process to a JSON file.
+        """
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(records, file)
+
+
+class DriverPathCache:
+    """
+    Persistent cache of the resolved driver and browser binaries.
+    Repeated runs can skip the resolution with Selenium Manager.
+    Entries are only used, if the binaries still exist.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+
+    def get(self, browser_name):
+        """
+        Returns the cached paths for a browser or None.
+        """
+        entry = self._read().get(self._key(browser_name))
+        if not entry:
+            return None
+        if not os.path.isfile(entry["driver_path"]):
+            return None
+        if entry["browser_path"] and \
+                not os.path.isfile(entry["browser_path"]):
+            return None
+        return entry
+
+    def put(self, browser_name, driver_path, browser_path, versions):
+        """
+        Store the resolved paths and versions of a browser.
+        """
+        with self._lock:
+            entries = self._read()
+            entries[self._key(browser_name)] = {
+                "driver_path": driver_path,
+                "browser_path": browser_path,
+                "versions": versions
+            }
+            self._write(entries)
+
+    def invalidate(self, browser_name):
+        """
+        Remove the cached paths of a browser.
+        """
+        with self._lock:
+            entries = self._read()
+            if entries.pop(self._key(browser_name), None):
+                self._write(entries)
+
+    @staticmethod
+    def _key(browser_name):
+        return f"{browser_name.lower()}-{platform.system()}-" \
+            f"{platform.machine()}"
+
+    def _read(self):
+        try:
+            with open(self.file_path, encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        """
+        Write atomically, so parallel workers never read a partial file.
+        """
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, indent=4)
+        os.replace(tmp_path, self.file_path)
+
+
+def load_startup_records(metrics_path):
+    """
+    Load the startup records that all workers of a run saved.
+    """
+    records = []
+    if not os.path.isdir(metrics_path):
+        return records
+    for file_name in sorted(os.listdir(metrics_path)):
+        if file_name.startswith("startup-") and file_name.endswith(".json"):
+            with open(os.path.join(metrics_path, file_name),
+                      encoding="utf-8") as file:
+                records.extend(json.load(file))
+    return records
+
+
+def format_startup_summary(records):
+    """
+    Returns the lines of a summary table of the startup phases.
+    """
+    cache_hits = sum(1 for r in records if r["cached"])
+    lines = [
+        f"sessions started: {len(records)} "
+        f"(driver path cache hits: {cache_hits})",
+        f"{'phase':<10}{'count':>8}{'mean':>10}{'max':>10}{'total':>10}"
+    ]
+    for phase in PHASES + ("total",):
+        if phase == "total":
+            durations = [r["total"] for r in records]
+        else:
+            durations = [r["phases"][phase] for r in records
+                         if phase in r["phases"]]
+        if not durations:
+            continue
+        lines.append(f"{phase:<10}{len(durations):>8}"
+                     f"{statistics.mean(durations):>9.2f}s"
+                     f"{max(durations):>9.2f}s"
+                     f"{sum(durations):>9.2f}s")
+    return lines
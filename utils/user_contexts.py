@@ -0,0 +1,454 @@
+"""
+This module lets one browser process host several isolated test sessions.
+It uses WebDriver BiDi user contexts: every context has its own cookies
+and storage, and gets its own tab. Each context is handed out as a
+driver object, so page objects and fixtures can use it like a
+normal WebDriver instance.
+Navigation and scripts (and with them all waits of the page objects)
+are sent over BiDi to the tab of the context, so contexts make progress
+at the same time. The other commands run in the current window of the
+session, they are short and take turns.
+Selenium's BiDi connection sends one command at a time per thread and
+is not thread-safe. On the Selenium versions in _CONCURRENT_BIDI_VERSIONS,
+_ConcurrentWebSocketConnection lets the commands of several contexts
+be in flight at the same time. On other versions, the BiDi commands of
+the contexts take turns as well: the contexts stay isolated, but their
+waits no longer overlap.
+"""
+
+from contextlib import contextmanager, nullcontext
+import json
+import os
+import tempfile
+import threading
+import warnings
+import selenium
+from selenium import webdriver
+from selenium.common.exceptions import (JavascriptException,
+                                        TimeoutException,
+                                        WebDriverException)
+from selenium.webdriver.common.bidi.common import command_builder
+from selenium.webdriver.common.options import ArgOptions
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.remote.websocket_connection import \
+    WebSocketConnection
+from utils.driver_factory import DriverFactory
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Selenium versions (major, minor) whose WebSocketConnection internals
+# _ConcurrentWebSocketConnection was checked against
+_CONCURRENT_BIDI_VERSIONS = {(4, 34)}
+_SELENIUM_VERSION = tuple(int(part)
+                          for part in selenium.__version__.split(".")[:2])
+
+# BiDi navigation waits like the classic page load strategies
+_NAVIGATION_WAIT = {"normal": "complete", "eager": "interactive",
+                    "none": "none"}
+
+# Runs a classic async script, which gets a callback as last argument,
+# as a function that returns a promise
+_ASYNC_SCRIPT_PREFIX = """function () {
+    const args = Array.from(arguments);
+    return new Promise((resolve, reject) => {
+        try {
+            (function () {
+"""
+_ASYNC_SCRIPT_SUFFIX = """
+            }).apply(this, args.concat([resolve]));
+        } catch (error) {
+            reject(error);
+        }
+    });
+}"""
+
+
+class UserContextBrowser:
+    """
+    A single browser that hosts up to `max_contexts` user contexts at once.
+    All contexts share one WebDriver session and can be used from several
+    threads, and with `attach`, from several processes at the same time.
+    Use `launch` to start the browser.
+    """
+    def __init__(self, driver, max_contexts=4, acquire_timeout=60,
+                 lock_file=None, command_timeout=60):
+        self.driver = driver
+        self.max_contexts = max_contexts
+        self.acquire_timeout = acquire_timeout
+        self.owner = lock_file is None
+        self.lock_file = lock_file or os.path.join(
+            tempfile.gettempdir(), f"user-contexts-{driver.session_id}.lock")
+        self.window_lock = _WindowLock(self.lock_file)
+        self._slots = threading.BoundedSemaphore(max_contexts)
+        self._command_lock = threading.Lock()
+        # Accessing a BiDi module connects to the browser
+        self.connection = driver.browser.conn
+        self.concurrent = _enable_concurrent_commands(self.connection,
+                                                      command_timeout)
+
+    @classmethod
+    def launch(cls, browser_name, remote, max_contexts=4, **driver_options):
+        """
+        Start a browser for user contexts.
+        Additional keyword arguments are passed to
+        DriverFactory.create_driver.
+        """
+        driver = DriverFactory.create_driver(browser_name,
+                                             remote,
+                                             enable_bidi=True,
+                                             **driver_options)
+        return cls(driver, max_contexts)
+
+    @classmethod
+    def attach(cls, session_info, max_contexts=4):
+        """
+        Use the browser that another process launched,
+        e.g. the pytest-xdist controller. `session_info` comes from
+        `session_info()` of the launching process.
+        """
+        driver = DriverFactory.attach_driver(session_info["executor_url"],
+                                             session_info["session_id"],
+                                             session_info["capabilities"])
+        return cls(driver, max_contexts,
+                   lock_file=session_info["lock_file"])
+
+    def session_info(self):
+        """
+        Returns what another process needs to attach to this browser.
+        """
+        return {
+            "executor_url":
+                self.driver.command_executor.client_config.remote_server_addr,
+            "session_id": self.driver.session_id,
+            "capabilities": self.driver.caps,
+            "lock_file": self.lock_file
+        }
+
+    def new_context(self):
+        """
+        Create a new user context with its own tab.
+        Blocks if `max_contexts` contexts are already in use.
+        Returns a driver that sends all its commands to this tab.
+        """
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(
+                f"No user context available after {self.acquire_timeout}s "
+                f"(max contexts: {self.max_contexts})")
+        try:
+            with self.bidi_turn():
+                user_context = self.driver.browser.create_user_context()
+                handle = self.driver.browsing_context.create(
+                    "tab", user_context=user_context)
+        except Exception:
+            self._slots.release()
+            raise
+        return UserContextDriver(self, user_context, handle)
+
+    def close_context(self, context_driver):
+        """
+        Remove a user context together with all its tabs,
+        cookies and storage.
+        """
+        try:
+            with self.bidi_turn():
+                self.driver.browser.remove_user_context(
+                    context_driver.user_context)
+        except WebDriverException:
+            pass
+        finally:
+            self._slots.release()
+
+    def bidi_turn(self):
+        """
+        Context manager to hold while sending BiDi commands.
+        Only makes the commands take turns if they can't be
+        sent at the same time.
+        """
+        return nullcontext() if self.concurrent else self._command_lock
+
+    def execute_bidi(self, method, params):
+        """
+        Send a BiDi command that has no method in Selenium's BiDi modules
+        and wait for its result.
+        """
+        with self.bidi_turn():
+            return self.connection.execute(command_builder(method, params))
+
+    def quit(self):
+        """
+        Quit the browser and all contexts that are still open.
+        Attached processes only disconnect from the browser.
+        """
+        self.driver.quit()
+        self.window_lock.close()
+        if self.owner:
+            os.remove(self.lock_file)
+
+
+def _enable_concurrent_commands(connection, command_timeout):
+    """
+    Let several threads send BiDi commands over the connection at the
+    same time. Returns False on Selenium versions this was not checked
+    with, the commands have to take turns then.
+    """
+    if isinstance(connection, _ConcurrentWebSocketConnection):
+        return True
+    if _SELENIUM_VERSION not in _CONCURRENT_BIDI_VERSIONS:
+        warnings.warn(
+            f"Concurrent BiDi commands are not supported with Selenium "
+            f"{selenium.__version__}, the waits of user contexts "
+            f"take turns")
+        return False
+    _ConcurrentWebSocketConnection.adopt(connection, command_timeout)
+    return True
+
+
+class _ConcurrentWebSocketConnection(WebSocketConnection):
+    """
+    Selenium's BiDi connection that lets several threads have commands
+    in flight. Selenium's execute counts the command ids without a lock
+    and polls for the response every 100ms for at most 30s.
+    Relies on the internals of WebSocketConnection, so it is only used
+    with the versions in _CONCURRENT_BIDI_VERSIONS.
+    """
+
+    @classmethod
+    def adopt(cls, connection, command_timeout):
+        """
+        Turn an open connection into a concurrent one. All its users,
+        including Selenium's BiDi modules, then share the id counter.
+        """
+        connection._send_lock = threading.Lock()
+        connection._responses = threading.Condition()
+        connection.command_timeout = command_timeout
+        connection.__class__ = cls
+
+    def execute(self, command):
+        payload = self._serialize_command(command)
+        with self._send_lock:
+            self._id += 1
+            command_id = payload["id"] = self._id
+            if self.session_id:
+                payload["sessionId"] = self.session_id
+            self._ws.send(json.dumps(payload))
+
+        with self._responses:
+            if not self._responses.wait_for(
+                    lambda: command_id in self._messages,
+                    timeout=self.command_timeout):
+                raise TimeoutException(f"No response to {payload['method']}")
+            response = self._messages.pop(command_id)
+        if "error" in response:
+            raise WebDriverException(
+                f"{response['error']}: {response.get('message', '')}")
+        return self._deserialize_result(response["result"], command)
+
+    def _process_message(self, message):
+        super()._process_message(message)
+        with self._responses:
+            self._responses.notify_all()
+
+
+class _WindowLock:
+    """
+    Lock for the commands that run in the current window of the session.
+    Threads take turns with a thread lock, processes that share the browser
+    with a lock file. The file holds the handle of the current window,
+    so every process knows if it has to switch windows.
+    """
+    def __init__(self, lock_file):
+        open(lock_file, "ab").close()
+        self._file = open(lock_file, "r+b", buffering=0)
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        """Hold the lock of the current window."""
+        with self._thread_lock:
+            _lock_file(self._file)
+            try:
+                yield self
+            finally:
+                _unlock_file(self._file)
+
+    def get_current_handle(self):
+        """Returns the handle of the current window (with the lock held)."""
+        self._file.seek(0)
+        return self._file.read().decode("utf-8")
+
+    def set_current_handle(self, handle):
+        """Save the handle of the current window (with the lock held)."""
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(handle.encode("utf-8"))
+
+    def close(self):
+        """Close the lock file."""
+        self._file.close()
+
+
+def _lock_file(file):
+    if fcntl:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        return
+    file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass  # Gives up after 10s, keep waiting
+
+
+def _unlock_file(file):
+    if fcntl:
+        fcntl.flock(file, fcntl.LOCK_UN)
+        return
+    file.seek(0)
+    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class UserContextDriver(webdriver.Remote):
+    """
+    Driver for the tab of one user context. Joins the session of the
+    browser that hosts the context and uses its command executor and
+    BiDi connection. Scripts run in the top-level document of the tab.
+    Created by UserContextBrowser.new_context.
+    """
+    def __init__(self, context_browser, user_context, handle):
+        self.context_browser = context_browser
+        self.user_context = user_context
+        self.context_handle = handle
+        host = context_browser.driver
+        super().__init__(command_executor=host.command_executor,
+                         options=ArgOptions())
+
+    def start_session(self, capabilities):
+        """Use the session of the host browser instead of a new one."""
+        host = self.context_browser.driver
+        self.session_id, self.caps = host.session_id, host.caps
+
+    def get(self, url):
+        """Navigate the tab, without blocking the other contexts."""
+        host = self.context_browser
+        with host.bidi_turn():
+            host.driver.browsing_context.navigate(
+                self.context_handle, url, wait=self._navigation_wait())
+
+    def refresh(self):
+        """Reload the tab, without blocking the other contexts."""
+        host = self.context_browser
+        with host.bidi_turn():
+            host.driver.browsing_context.reload(
+                self.context_handle, wait=self._navigation_wait())
+
+    def execute_script(self, script, *args):
+        """Run a script in the tab, without blocking the other contexts."""
+        return self._call_function(f"function () {{\n{script}\n}}", args,
+                                   await_promise=False)
+
+    def execute_async_script(self, script, *args):
+        """
+        Run an async script in the tab, without blocking the other
+        contexts. The script resolves with the callback that is passed
+        as last argument.
+        """
+        return self._call_function(
+            _ASYNC_SCRIPT_PREFIX + script + _ASYNC_SCRIPT_SUFFIX, args,
+            await_promise=True)
+
+    def execute(self, driver_command, params=None):
+        host = self.context_browser
+        with host.window_lock.acquire() as window:
+            if window.get_current_handle() != self.context_handle:
+                super().execute(Command.SWITCH_TO_WINDOW,
+                                {"handle": self.context_handle})
+                window.set_current_handle(self.context_handle)
+
+            response = super().execute(driver_command, params)
+
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                self.context_handle = params["handle"]
+                window.set_current_handle(params["handle"])
+            return response
+
+    def quit(self):
+        """Close this user context. The browser keeps running."""
+        self.context_browser.close_context(self)
+
+    def _navigation_wait(self):
+        """Returns the BiDi navigation wait of the page load strategy."""
+        return _NAVIGATION_WAIT[self.caps.get("pageLoadStrategy", "normal")]
+
+    def _call_function(self, function, args, await_promise):
+        """
+        Call a function in the tab with script.callFunction.
+        Raises a JavascriptException if it throws or the document is
+        unloaded before it returns, like classic scripts do.
+        """
+        try:
+            result = self.context_browser.execute_bidi(
+                "script.callFunction",
+                {"functionDeclaration": function,
+                 "arguments": [_to_local_value(arg) for arg in args],
+                 "target": {"context": self.context_handle},
+                 "awaitPromise": await_promise,
+                 "resultOwnership": "none",
+                 "serializationOptions": {"maxDomDepth": 0}})
+        except TimeoutException:
+            raise
+        except WebDriverException as e:
+            raise JavascriptException(e.msg) from e
+        if result["type"] == "exception":
+            raise JavascriptException(result["exceptionDetails"]["text"])
+        return self._from_remote_value(result["result"])
+
+    def _from_remote_value(self, value):
+        """
+        Convert a BiDi remote value into the Python value
+        a classic script returns. Nodes become WebElements.
+        """
+        kind = value["type"]
+        if kind == "node":
+            return self.create_web_element(value["sharedId"]) \
+                if "sharedId" in value else None
+        if kind in ("array", "set"):
+            return [self._from_remote_value(item)
+                    for item in value.get("value", [])]
+        if kind in ("object", "map"):
+            return {key if isinstance(key, str)
+                    else self._from_remote_value(key):
+                    self._from_remote_value(item)
+                    for key, item in value.get("value", [])}
+        if kind == "number" and isinstance(value["value"], str):
+            return float(value["value"])  # NaN, -0, Infinity
+        return value.get("value")
+
+
+def _to_local_value(value):
+    """
+    Convert a script argument into a BiDi local value.
+    """
+    if isinstance(value, WebElement):
+        return {"sharedId": value.id}
+    if value is None:
+        return {"type": "null"}
+    if isinstance(value, bool):
+        return {"type": "boolean", "value": value}
+    if isinstance(value, (int, float)):
+        return {"type": "number", "value": value}
+    if isinstance(value, str):
+        return {"type": "string", "value": value}
+    if isinstance(value, (list, tuple)):
+        return {"type": "array",
+                "value": [_to_local_value(item) for item in value]}
+    if isinstance(value, dict):
+        return {"type": "object",
+                "value": [[str(key), _to_local_value(item)]
+                          for key, item in value.items()]}
+    raise TypeError(f"Unsupported script argument: {type(value).__name__}")
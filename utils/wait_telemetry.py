@@ -0,0 +1,288 @@
+"""
+This file contains the wait telemetry of the page objects.
+Every wait records what it waited for, which page object method
+called it, how long it took, how often the condition was checked
+and how it ended. After the run, the records of all workers are
+summarized per locator (p50/p95/p99) and the slowest waits are listed,
+so the waits that eat the most time can be improved first.
+Waits that run inside another wait, e.g. the ready element of
+wait_for_page_ready, are part of the outer wait and are not recorded
+separately, so no waiting time is counted twice.
+"""
+
+from contextlib import contextmanager
+import functools
+import html
+import json
+import math
+import os
+import sys
+import threading
+import time
+from selenium.common.exceptions import TimeoutException
+
+# Frames of these files are skipped when looking for the calling method
+_WAIT_FILES = ("base_page.py", "async_base_page.py", "wait_telemetry.py")
+
+
+class WaitRecord:
+    """ Telemetry of one wait """
+    def __init__(self, wait, target, caller, test):
+        self.wait = wait
+        self.target = target
+        self.caller = caller
+        self.test = test
+        self.polls = 0
+        self.outcome = "ok"
+        self.elapsed = 0.0
+
+    def to_dict(self):
+        """
+        Returns the record as JSON serializable dictionary.
+        """
+        return {
+            "wait": self.wait,
+            "target": self.target,
+            "caller": self.caller,
+            "test": self.test,
+            "elapsed": self.elapsed,
+            "polls": self.polls,
+            "outcome": self.outcome
+        }
+
+
+class WaitRecorder:
+    """
+    Collect the wait records of all page objects of this process.
+    """
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, wait, target, caller):
+        """
+        Create a record for a wait. Failed waits are kept too,
+        with the outcome "timeout" or the name of the exception.
+        """
+        test = os.environ.get("PYTEST_CURRENT_TEST", "").split(" ")[0]
+        record = WaitRecord(wait, target, caller, test)
+        start = time.perf_counter()
+        try:
+            yield record
+        except TimeoutException:
+            record.outcome = "timeout"
+            raise
+        except Exception as e:
+            record.outcome = type(e).__name__
+            raise
+        finally:
+            record.elapsed = time.perf_counter() - start
+            with self._lock:
+                self.records.append(record.to_dict())
+
+    def save(self, file_path):
+        """
+        Write the records of this process to a JSON file.
+        """
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(records, file)
+
+
+wait_recorder = WaitRecorder()
+
+
+def recorded_wait(method):
+    """
+    Decorator for the wait methods of BasePage.
+    Only the outermost wait of a page is recorded, nested waits count
+    their polls for the outermost wait.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.wait_records:
+            return method(self, *args, **kwargs)
+        with wait_recorder.measure(method.__name__,
+                                   _describe_target(self, args),
+                                   _find_caller()) as record:
+            self.wait_records.append(record)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.wait_records.pop()
+    return wrapper
+
+
+def recorded_async_wait(method):
+    """
+    Decorator for the wait methods of AsyncBasePage.
+    Only the outermost wait of a page is recorded.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if self.wait_records:
+            return await method(self, *args, **kwargs)
+        with wait_recorder.measure(method.__name__,
+                                   _describe_target(self, args),
+                                   _find_caller()) as record:
+            self.wait_records.append(record)
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                self.wait_records.pop()
+    return wrapper
+
+
+def _describe_target(page, args):
+    """
+    Describe what a wait waits for: a locator, an element,
+    a URL substring, the page itself or a value on the page.
+    """
+    if not args or args[0] is None:
+        return type(page).__name__
+    target = args[0]
+    if isinstance(target, tuple):
+        return f"{target[0]}: {target[1]}"
+    if isinstance(target, str):
+        return f"'{target}'"
+    if isinstance(target, (int, float)):
+        return f"{type(page).__name__} ({target})"
+    return "element"
+
+
+def _find_caller():
+    """
+    Returns the name of the method that called the wait,
+    skipping the methods of the base pages.
+    """
+    frame = sys._getframe(2)
+    while frame and os.path.basename(frame.f_code.co_filename) in _WAIT_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return frame.f_code.co_qualname
+
+
+def load_wait_records(metrics_path):
+    """
+    Load the wait records that all workers of a run saved.
+    """
+    records = []
+    if not os.path.isdir(metrics_path):
+        return records
+    for file_name in sorted(os.listdir(metrics_path)):
+        if file_name.startswith("waits-") and file_name.endswith(".json") \
+                and file_name != "waits-summary.json":
+            with open(os.path.join(metrics_path, file_name),
+                      encoding="utf-8") as file:
+                records.extend(json.load(file))
+    return records
+
+
+def summarize_waits(records, hot_spots=10):
+    """
+    Returns the per-locator latency statistics,
+    sorted by the total time spent waiting,
+    and the slowest single waits (hot spots).
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault((record["wait"], record["target"]),
+                          []).append(record)
+
+    locators = []
+    for (wait, target), group in groups.items():
+        durations = sorted(r["elapsed"] for r in group)
+        locators.append({
+            "wait": wait,
+            "target": target,
+            "callers": sorted({r["caller"] for r in group}),
+            "count": len(group),
+            "timeouts": sum(1 for r in group if r["outcome"] == "timeout"),
+            "errors": sum(1 for r in group
+                          if r["outcome"] not in ("ok", "timeout")),
+            "mean_polls": sum(r["polls"] for r in group) / len(group),
+            "p50": _percentile(durations, 50),
+            "p95": _percentile(durations, 95),
+            "p99": _percentile(durations, 99),
+            "max": durations[-1],
+            "total": sum(durations)
+        })
+    locators.sort(key=lambda entry: entry["total"], reverse=True)
+
+    slowest = sorted(records, key=lambda r: r["elapsed"], reverse=True)
+    return {
+        "waits": len(records),
+        "total": sum(r["elapsed"] for r in records),
+        "locators": locators,
+        "hot_spots": slowest[:hot_spots]
+    }
+
+
+def save_wait_summary(summary, file_path):
+    """
+    Write the summary as machine-readable JSON.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=4)
+
+
+def format_wait_summary_html(summary):
+    """
+    Returns the summary as HTML tables for the test report.
+    """
+    locator_rows = "".join(
+        "<tr>"
+        f"<td>{html.escape(entry['wait'])}</td>"
+        f"<td>{html.escape(entry['target'])}</td>"
+        f"<td>{html.escape(', '.join(entry['callers']))}</td>"
+        f"<td>{entry['count']}</td>"
+        f"<td>{entry['timeouts']}</td>"
+        f"<td>{entry['mean_polls']:.1f}</td>"
+        f"<td>{entry['p50']:.3f}s</td>"
+        f"<td>{entry['p95']:.3f}s</td>"
+        f"<td>{entry['p99']:.3f}s</td>"
+        f"<td>{entry['total']:.2f}s</td>"
+        "</tr>"
+        for entry in summary["locators"])
+    hot_spot_rows = "".join(
+        "<tr>"
+        f"<td>{record['elapsed']:.3f}s</td>"
+        f"<td>{html.escape(record['wait'])}</td>"
+        f"<td>{html.escape(record['target'])}</td>"
+        f"<td>{html.escape(record['caller'])}</td>"
+        f"<td>{html.escape(record['test'])}</td>"
+        f"<td>{html.escape(record['outcome'])}</td>"
+        "</tr>"
+        for record in summary["hot_spots"])
+
+    return f"""
+        <h2>Waits</h2>
+        <p>{summary['waits']} waits, {summary['total']:.2f}s in total</p>
+        <table>
+            <tr><th>Wait</th><th>Locator</th><th>Called by</th>
+            <th>Count</th><th>Timeouts</th><th>Polls</th><th>p50</th>
+            <th>p95</th><th>p99</th><th>Total</th></tr>
+            {locator_rows}
+        </table>
+        <h3>Slowest waits</h3>
+        <table>
+            <tr><th>Time</th><th>Wait</th><th>Locator</th><th>Called by</th>
+            <th>Test</th><th>Outcome</th></tr>
+            {hot_spot_rows}
+        </table>
+    """
+
+
+def _percentile(sorted_values, percent):
+    """
+    Returns the percentile of sorted values (nearest-rank method).
+    """
+    rank = math.ceil(percent / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]